@@ -0,0 +1,83 @@
+"""Practice streaks and calendar heatmaps from the daily_activity rollup.
+
+A trigger on student_answers adds every completion to its student's
+(day, category) row, so a year of history is at most a few hundred rows
+and never requires reading student_answers. Days are UTC dates, matching
+student_answers.timestamp.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+HEATMAP_DAYS = 365
+
+
+def utc_today():
+    return datetime.now(timezone.utc).date()
+
+
+def daily_totals(cursor, student_id, since=None):
+    """[(day, completed, {category: completed})] in date order."""
+    params = [student_id]
+    since_filter = ""
+    if since is not None:
+        since_filter = "AND day >= ?"
+        params.append(since.isoformat())
+    cursor.execute(f"""
+        SELECT day, category, completed FROM daily_activity
+        WHERE student_id = ? {since_filter}
+        ORDER BY day
+    """, params)
+    days = {}
+    for day, category, completed in cursor.fetchall():
+        entry = days.setdefault(day, [0, {}])
+        entry[0] += completed
+        entry[1][category] = completed
+    return [(day, total, by_category) for day, (total, by_category) in days.items()]
+
+
+def streaks(cursor, student_id, today=None):
+    """Current and longest run of consecutive active days.
+
+    The current streak still counts when the last active day was yesterday,
+    since today is not over yet.
+    """
+    today = today or utc_today()
+    cursor.execute("""
+        SELECT DISTINCT day FROM daily_activity
+        WHERE student_id = ? AND completed > 0
+        ORDER BY day
+    """, (student_id,))
+    active = [date.fromisoformat(row[0]) for row in cursor.fetchall()]
+
+    longest = run = 0
+    previous = None
+    for day in active:
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+
+    current = 0
+    if active and today - active[-1] <= timedelta(days=1):
+        current = run
+    return {
+        'current_streak': current,
+        'longest_streak': longest,
+        'active_days': len(active),
+        'last_active': active[-1].isoformat() if active else None
+    }
+
+
+def heatmap(cursor, student_id, days=HEATMAP_DAYS, today=None):
+    """Completions for each of the last `days` days, oldest first.
+
+    Days without activity are included with a count of 0, so the calendar
+    can be drawn straight from the list.
+    """
+    today = today or utc_today()
+    start = today - timedelta(days=days - 1)
+    totals = {day: (total, by_category) for day, total, by_category in daily_totals(cursor, student_id, start)}
+    result = []
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        total, by_category = totals.get(day, (0, {}))
+        result.append({'date': day, 'completed': total, 'categories': by_category})
+    return result
@@ -1,5 +1,6 @@
 import traceback
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_file, g, has_app_context, make_response
+from functools import wraps
 import sqlite3
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timezone
@@ -7,9 +8,26 @@ import time
 import os
 import threading
 import json
+import queue
 import uuid
 import random
 from werkzeug.utils import secure_filename
+import activity
+import bitmaps
+import cohort_analytics
+import cohort_export
+import database
+import facets
+import leaderboard
+import migrations
+import placement
+import problem_registry
+import progress
+import progress_cache
+import progress_events
+import reports
+import student_search
+import topic_catalog
 <<<<<<< HEAD
 from analysis import analyze_interview_response
 =======
@@ -37,174 +55,22 @@ sqlite3.register_converter("timestamp", convert_datetime)
 # SQLite Configuration
 def get_db_connection():
     try:
-        conn = sqlite3.connect('placement_preparation.db', timeout=60, detect_types=sqlite3.PARSE_DECLTYPES)
-        conn.row_factory = sqlite3.Row
-        return conn
+        conn = database.get_connection()
     except sqlite3.Error as e:
         print(f"Database connection error: {e}")
         raise
+    # Remember request-scoped checkouts so teardown can return any that leak
+    if has_app_context():
+        g.setdefault('db_connections', []).append(conn)
+    return conn
 
-# Ensure the 'id' column exists in required tables
-def ensure_id_column():
-    """Ensure the 'id' column exists in required tables."""
-    try:
-        db = get_db_connection()
-        cursor = db.cursor()
-
-        # Ensure 'id' column in 'users' table
-        cursor.execute("PRAGMA table_info(users)")
-        columns = [row['name'] for row in cursor.fetchall()]
-        if 'id' not in columns:
-            cursor.execute("ALTER TABLE users ADD COLUMN id INTEGER PRIMARY KEY AUTOINCREMENT")
-            print("Added 'id' column to 'users' table.")
-
-        # Ensure 'id' column in 'students' table
-        cursor.execute("PRAGMA table_info(students)")
-        columns = [row['name'] for row in cursor.fetchall()]
-        if 'id' not in columns:
-            cursor.execute("ALTER TABLE students ADD COLUMN id INTEGER PRIMARY KEY AUTOINCREMENT")
-            print("Added 'id' column to 'students' table.")
-
-        # Add similar checks for other tables if needed
-        db.commit()
-    except Exception as e:
-        print(f"Error ensuring 'id' column: {e}")
-    finally:
-        if db:
-            db.close()
-
-def ensure_id_columns():
-    """Ensure the 'id' column exists in required tables."""
-    try:
-        db = get_db_connection()
-        cursor = db.cursor()
-
-        # Ensure 'id' column in 'questions' table
-        cursor.execute("PRAGMA table_info(questions)")
-        columns = [row['name'] for row in cursor.fetchall()]
-        if 'id' not in columns:
-            # Create a new table with the correct schema
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS questions_new (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    question_text TEXT NOT NULL,
-                    correct_answer TEXT
-                )
-            """)
-            # Migrate data from the old table to the new table
-            cursor.execute("INSERT INTO questions_new (question_text, correct_answer) SELECT question_text, correct_answer FROM questions")
-            # Drop the old table and rename the new table
-            cursor.execute("DROP TABLE questions")
-            cursor.execute("ALTER TABLE questions_new RENAME TO questions")
-            print("Recreated 'questions' table with 'id' column.")
-
-        # Ensure 'id' column in 'users' table
-        cursor.execute("PRAGMA table_info(users)")
-        columns = [row['name'] for row in cursor.fetchall()]
-        if 'id' not in columns:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users_new (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    email TEXT NOT NULL UNIQUE,
-                    password TEXT NOT NULL,
-                    role TEXT NOT NULL
-                )
-            """)
-            cursor.execute("INSERT INTO users_new (name, email, password, role) SELECT name, email, password, role FROM users")
-            cursor.execute("DROP TABLE users")
-            cursor.execute("ALTER TABLE users_new RENAME TO users")
-            print("Recreated 'users' table with 'id' column.")
-
-        # Ensure 'id' column in 'students' table
-        cursor.execute("PRAGMA table_info(students)")
-        columns = [row['name'] for row in cursor.fetchall()]
-        if 'id' not in columns:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS students_new (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    name TEXT NOT NULL,
-                    email TEXT NOT NULL,
-                    phone TEXT,
-                    department TEXT,
-                    graduation_year INTEGER
-                )
-            """)
-            cursor.execute("INSERT INTO students_new (user_id, name, email, phone, department, graduation_year) SELECT user_id, name, email, phone, department, graduation_year FROM students")
-            cursor.execute("DROP TABLE students")
-            cursor.execute("ALTER TABLE students_new RENAME TO students")
-            print("Recreated 'students' table with 'id' column.")
-
-        # Add similar checks for other tables if needed
-        db.commit()
-    except Exception as e:
-        print(f"Error ensuring 'id' column: {e}")
-    finally:
-        if db:
-            db.close()
-
-def ensure_questions_table_id_column():
-    """Ensure the 'id' column exists in the 'questions' table."""
-    try:
-        db = get_db_connection()
-        cursor = db.cursor()
-
-        # Check if 'id' column exists in 'questions' table
-        cursor.execute("PRAGMA table_info(questions)")
-        columns = [row['name'] for row in cursor.fetchall()]
-        if 'id' not in columns:
-            cursor.execute("ALTER TABLE questions ADD COLUMN id INTEGER PRIMARY KEY AUTOINCREMENT")
-            print("Added 'id' column to 'questions' table.")
-
-        db.commit()
-    except Exception as e:
-        print(f"Error ensuring 'id' column in 'questions' table: {e}")
-    finally:
-        if db:
-            db.close()
-
-def initialize_questions_table():
-    """Ensure the 'questions' table is populated with sample data."""
-    try:
-        db = get_db_connection()
-        cursor = db.cursor()
-
-        # Check if the 'questions' table is empty
-        cursor.execute("SELECT COUNT(*) FROM questions")
-        count = cursor.fetchone()[0]
-
-        if count == 0:
-            # Insert sample questions and answers
-            cursor.executemany("""
-                INSERT INTO questions (question_text, correct_answer) 
-                VALUES (?, ?)
-            """, [
-                ("Tell me about yourself.", "I am a [your role] with [X] years of experience in [industry/field]. I have expertise in [key skills] and have worked on [notable projects/achievements]. I'm passionate about [relevant interests] and am looking to [career goals]."),
-                ("What are your strengths and weaknesses?", "My strengths include [list 2-3 key strengths with examples]. As for weaknesses, I'm working on [mention a genuine area of improvement] and have taken steps like [specific actions] to address it."),
-                ("Why do you want to work here?", "I want to work here because [company name] is known for [specific company strengths/values]. I'm particularly interested in [specific aspects of the company] and believe my skills in [relevant skills] align well with the role."),
-                ("Describe a situation where you had to deal with a difficult coworker.", "In a previous role, I dealt with a difficult coworker by [specific approach]. I focused on [key actions taken] and the outcome was [positive result]. This taught me the importance of [key learning]."),
-                ("What are your career goals for the next five years?", "My career goals include [specific short-term goals] and [long-term aspirations]. I plan to achieve these through [specific steps/strategies]."),
-                ("Tell me about a time you failed at something and what you learned.", "A significant failure I experienced was [describe situation]. From this, I learned [key lessons] and implemented [specific changes] to prevent similar issues in the future."),
-                ("Explain the concept of closures in JavaScript.", "Closures in JavaScript are functions that have access to variables in their outer scope, even after the outer function has returned. They're useful for [specific use cases] and help maintain [specific benefits]."),
-                ("Write a function to reverse a linked list.", "To reverse a linked list, you need to [algorithm steps]. The time complexity is O(n) and space complexity is O(1). Here's how it works: [explanation]"),
-                ("What are the differences between SQL and NoSQL databases?", "SQL databases are [characteristics] while NoSQL databases are [characteristics]. The main differences are [key differences] and each is better suited for [specific use cases]."),
-                ("Describe how virtual memory works in operating systems.", "Virtual memory works by [explanation]. The key components are [components] and it provides benefits like [benefits]."),
-                ("Explain the concept of multithreading and its benefits.", "Multithreading allows [explanation]. The benefits include [benefits] and it's particularly useful for [use cases]."),
-                ("What is dynamic programming and when would you use it?", "Dynamic programming is [explanation]. It's best used when [conditions] and involves [key steps]. The main advantages are [advantages].")
-            ])
-            print("Initialized 'questions' table with sample data.")
+@app.teardown_appcontext
+def release_db_connections(exception):
+    for conn in g.pop('db_connections', []):
+        conn.close()
 
-        db.commit()
-    except Exception as e:
-        print(f"Error initializing 'questions' table: {e}")
-    finally:
-        if db:
-            db.close()
-
-# Ensure all necessary columns exist during app initialization
-ensure_id_columns()
-initialize_questions_table()
+# Bring the schema up to date before serving requests
+migrations.migrate()
 
 # Home/Login Page
 @app.route('/')
@@ -339,9 +205,51 @@ def logout():
     flash("You have been logged out.", "info")
     return redirect(url_for('home'))  # Redirect to homepage after logout
 
+def conditional_progress(view):
+    """Serve a progress read as 304 when the client's ETag is still current.
+
+    The ETag is built from the student's progress_versions counter and the
+    topic catalog version, so a matching If-None-Match is answered without
+    computing or serialising the progress.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if 'user_id' not in session:
+            return view(*args, **kwargs)
+        db = get_db_connection()
+        try:
+            cursor = db.cursor()
+            row = progress.progress_version(cursor, session['user_id'])
+            catalog_version = topic_catalog.get_catalog(cursor).version
+        finally:
+            db.close()
+        if row is None:
+            return view(*args, **kwargs)
+
+        student_id, version = row
+        etag = f"{view.__name__}-{student_id}-{version}-{catalog_version}"
+        # Lets the view's progress_cache lookups reject entries from older versions
+        g.progress_version = version
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        # Browsers keep the body but revalidate it on every fetch
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
+
 def get_student_progress():
     if 'user_id' not in session:
         return {'success': False, 'message': 'Not logged in'}
+    
+    cache = progress_cache.get_cache()
+    cached = cache.lookup(session['user_id'], 'progress', g.get('progress_version'))
+    if cached is not None:
+        return dict(cached)
         
     try:
         db = get_db_connection()
@@ -356,57 +264,19 @@ def get_student_progress():
         student_id = result[0]
         print(f"Fetching progress for student_id: {student_id}")
         
-        # Get all topics
-        cursor.execute("SELECT topic_id, parent_topic, total_questions FROM progress_topics")
-        topics = cursor.fetchall()
+        # Topic totals come from the in-process catalog; the answers are
+        # counted per topic in one grouped query
+        catalog = topic_catalog.get_catalog(cursor)
+        progress_data = progress.category_progress(cursor, student_id, catalog)
         
-        if not topics:
-            return {
-                'success': True,
-                'DSA': 0,
-                'Communication': 0,
-                'Aptitude': 0,
-                'total_completed': 0  # Added total completed questions
-            }
-            
-        # Initialize counters
-        completed_by_category = {'DSA': 0, 'Communication': 0, 'Aptitude': 0}
-        total_by_category = {'DSA': 0, 'Communication': 0, 'Aptitude': 0}
-        total_completed = 0  # Counter for total completed questions
-        
-        # Count completed questions by category
-        for topic in topics:
-            topic_id, parent_topic, total_questions = topic
-            total_by_category[parent_topic] += total_questions
-            
-            cursor.execute("""
-                SELECT COUNT(*) FROM student_answers 
-                WHERE student_id = ? AND topic_id = ? AND is_correct = 1
-            """, (student_id, topic_id))
-            
-            completed = cursor.fetchone()[0]
-            completed_by_category[parent_topic] += completed
-            total_completed += completed  # Increment total completed questions
-            
-        print(f"Completed by Category: {completed_by_category}")
-        print(f"Total by Category: {total_by_category}")
-        
-        # Calculate progress percentages
-        progress_data = {}
-        for category in completed_by_category:
-            if total_by_category[category] > 0:
-                progress = (completed_by_category[category] / total_by_category[category]) * 100
-                progress_data[category] = round(progress, 2)
-            else:
-                progress_data[category] = 0
-                
         print(f"Calculated Progress Data: {progress_data}")
         
-        return {
+        result = {
             'success': True,
-            **progress_data,
-            'total_completed': total_completed  # Return total completed questions
+            **progress_data
         }
+        cache.store(session['user_id'], student_id, 'progress', result, g.get('progress_version'))
+        return dict(result)
         
     except Exception as e:
         traceback.print_exc()
@@ -416,6 +286,7 @@ def get_student_progress():
             db.close()
 
 @app.route('/get_progress', methods=['GET'])
+@conditional_progress
 def get_progress():
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
@@ -431,6 +302,162 @@ def get_progress():
         'Aptitude': progress_data.get('Aptitude', 0)
     })
 
+@app.route('/progress_snapshot')
+@conditional_progress
+def progress_snapshot():
+    """Progress sections for a page load in one request.
+
+    ?fields=categories,topics picks the sections (default: all of
+    progress.SNAPSHOT_FIELDS). All of them come from one student lookup and
+    one read transaction.
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+
+    requested = request.args.get('fields')
+    requested = set(requested.split(',')) if requested else set(progress.SNAPSHOT_FIELDS)
+    unknown = requested - set(progress.SNAPSHOT_FIELDS)
+    if unknown:
+        return jsonify({'success': False, 'message': f"Unknown fields: {', '.join(sorted(unknown))}"}), 400
+    fields = [field for field in progress.SNAPSHOT_FIELDS if field in requested]
+
+    cache = progress_cache.get_cache()
+    cache_key = 'snapshot:' + ','.join(fields)
+    cached = cache.lookup(session['user_id'], cache_key, g.get('progress_version'))
+    if cached is not None:
+        return jsonify(cached)
+
+    db = None
+    try:
+        db = get_db_connection()
+        cursor = db.cursor()
+        # Sections read in one transaction see the same committed state
+        cursor.execute("BEGIN")
+
+        cursor.execute("SELECT id FROM students WHERE user_id = ?", (session['user_id'],))
+        result = cursor.fetchone()
+        if not result:
+            return jsonify({'success': False, 'message': 'Student not found'}), 404
+        student_id = result[0]
+
+        catalog = topic_catalog.get_catalog(cursor)
+        result = {'success': True, **progress.snapshot(cursor, student_id, catalog, fields)}
+        db.commit()
+
+        cache.store(session['user_id'], student_id, cache_key, result, g.get('progress_version'))
+        return jsonify(result)
+
+    except Exception as e:
+        print(f"Error building progress snapshot: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    finally:
+        if db:
+            db.close()
+
+@app.route('/activity_streak')
+def activity_streak():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+
+    db = None
+    try:
+        db = get_db_connection()
+        cursor = db.cursor()
+        cursor.execute("SELECT id FROM students WHERE user_id = ?", (session['user_id'],))
+        result = cursor.fetchone()
+        if not result:
+            return jsonify({'success': False, 'message': 'Student not found'}), 404
+
+        return jsonify({'success': True, **activity.streaks(cursor, result[0])})
+
+    except Exception as e:
+        print(f"Error fetching activity streak: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    finally:
+        if db:
+            db.close()
+
+@app.route('/activity_heatmap')
+def activity_heatmap():
+    """Completions per day for the calendar heatmap, ?days=N (default 365)."""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+
+    days = request.args.get('days', activity.HEATMAP_DAYS, type=int)
+    if not days or not 1 <= days <= activity.HEATMAP_DAYS + 1:
+        return jsonify({'success': False, 'message': f'days must be between 1 and {activity.HEATMAP_DAYS + 1}'}), 400
+
+    db = None
+    try:
+        db = get_db_connection()
+        cursor = db.cursor()
+        cursor.execute("SELECT id FROM students WHERE user_id = ?", (session['user_id'],))
+        result = cursor.fetchone()
+        if not result:
+            return jsonify({'success': False, 'message': 'Student not found'}), 404
+
+        return jsonify({'success': True, 'days': activity.heatmap(cursor, result[0], days)})
+
+    except Exception as e:
+        print(f"Error fetching activity heatmap: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    finally:
+        if db:
+            db.close()
+
+# Seconds between keep-alive comments on an idle event stream
+EVENT_STREAM_HEARTBEAT = 20
+
+@app.route('/progress_events')
+def progress_events_stream():
+    """Server-sent events with the student's progress changes.
+
+    The pooled connection is released before streaming starts; an open
+    stream only waits on its in-memory queue.
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+
+    db = get_db_connection()
+    try:
+        row = progress.progress_version(db.cursor(), session['user_id'])
+    finally:
+        db.close()
+    if row is None:
+        return jsonify({'success': False, 'message': 'Student not found'}), 404
+    student_id, version = row
+
+    broker = progress_events.get_broker()
+    try:
+        events = broker.subscribe(student_id, version)
+    except progress_events.BrokerFull as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
+
+    def stream():
+        try:
+            yield f"retry: 5000\nevent: hello\ndata: {json.dumps({'version': version})}\n\n"
+            while True:
+                try:
+                    event = events.get(timeout=EVENT_STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(student_id, events)
+
+    return app.response_class(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop reverse proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/progress_events_stats')
+def progress_events_stats():
+    if 'role' not in session or session['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+    return jsonify({'success': True, **progress_events.get_broker().stats()})
+
 @app.route('/admin_dashboard')
 def admin_dashboard():
     if 'role' not in session or session['role'] != 'admin':
@@ -505,91 +532,32 @@ def update_progress():
         student_id = result[0]
         print(f"✅ Found student ID: {student_id}")
 
-        # Check if this question is already completed
-        cursor.execute("""
-            SELECT * FROM student_answers 
-            WHERE student_id = ? AND question_id = ? AND topic_id = ?
-        """, (student_id, question_id, topic_id))
-        
-        if cursor.fetchone():
+        # Topic total and category come from the cached catalog
+        catalog = topic_catalog.get_catalog(cursor)
+        topic_total = catalog.total_for(topic_id)
+        parent_topic = catalog.parent_of(topic_id)
+
+        # Mark question as completed; the topic and category counters are
+        # incremented in place instead of recounted
+        added, completed_questions = progress.record_completion(
+            cursor, student_id, topic_id, question_id, catalog, given_answer=''
+        )
+        if not added:
             print("🚨 Question already completed!")
             return jsonify({'success': False, 'message': 'Question already completed!'})
 
-        # Mark question as completed
-        cursor.execute("""
-            INSERT INTO student_answers 
-            (student_id, question_id, topic_id, given_answer, is_correct) 
-            VALUES (?, ?, ?, '', 1)
-        """, (student_id, question_id, topic_id))
-
-        # Get total questions for current topic
-        cursor.execute("""
-            SELECT total_questions FROM progress_topics 
-            WHERE topic_id = ?
-        """, (topic_id,))
-        topic_total = cursor.fetchone()[0]
-
-        # Get current completed questions count
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM student_answers 
-            WHERE student_id = ? AND topic_id = ?
-        """, (student_id, topic_id))
-        completed_questions = cursor.fetchone()[0]
-
-        # Update progress for the specific topic
-        cursor.execute("""
-            INSERT OR REPLACE INTO student_progress 
-            (student_id, topic_id, completed_questions, total_questions, is_completed) 
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            student_id, 
-            topic_id, 
-            completed_questions, 
-            topic_total, 
-            1 if completed_questions >= topic_total else 0
-        ))
-
-        # Get parent topic for the current topic
-        cursor.execute("SELECT parent_topic FROM progress_topics WHERE topic_id = ?", (topic_id,))
-        parent_topic = cursor.fetchone()[0]
-
-        # For DSA topics only, update the dsa_overall_progress table if it exists
-        if parent_topic == 'DSA':
-            try:
-                # Calculate DSA progress
-                cursor.execute("""
-                    SELECT SUM(total_questions) 
-                    FROM progress_topics 
-                    WHERE parent_topic = 'DSA'
-                """)
-                total_dsa_questions = cursor.fetchone()[0] or 0
-
-                cursor.execute("""
-                    SELECT COUNT(*) 
-                    FROM student_answers sa
-                    JOIN progress_topics pt ON sa.topic_id = pt.topic_id
-                    WHERE sa.student_id = ? AND pt.parent_topic = 'DSA'
-                """, (student_id,))
-                completed_dsa_questions = cursor.fetchone()[0] or 0
-
-                # Update DSA progress if table exists
-                cursor.execute("""
-                    INSERT OR REPLACE INTO dsa_overall_progress 
-                    (student_id, completed_questions, total_questions, is_completed, last_updated)
-                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (
-                    student_id, 
-                    completed_dsa_questions, 
-                    total_dsa_questions,
-                    1 if completed_dsa_questions >= total_dsa_questions else 0
-                ))
-            except sqlite3.OperationalError as e:
-                # If the dsa_overall_progress table doesn't exist, just log and continue
-                print(f"Note: DSA progress table not updated - {e}")
-                pass
-
+        version = progress_events.current_version(cursor, student_id)
         db.commit()
+        progress_cache.get_cache().invalidate(student_id)
+        leaderboard.record(cursor, student_id)
+        progress_events.get_broker().publish(student_id, {
+            'type': 'progress',
+            'topic_id': topic_id,
+            'parent_topic': parent_topic,
+            'completed': completed_questions,
+            'total': topic_total,
+            'version': version
+        }, version)
         print("✅ Successfully updated progress!")
 
         # Return the updated progress without accessing aptitude_overall_progress
@@ -611,10 +579,18 @@ def update_progress():
 
 # Update Student Progress
 @app.route('/student_progress', methods=['GET'])
+@conditional_progress
 def student_progress():
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
 
+    cache = progress_cache.get_cache()
+    cache_key = f"topic:{request.args.get('topic_id')}"
+    cached = cache.lookup(session['user_id'], cache_key, g.get('progress_version'))
+    if cached is not None:
+        return jsonify(cached)
+
+    db = None
     try:
         topic_id = request.args.get('topic_id')
         if not topic_id:
@@ -631,14 +607,8 @@ def student_progress():
 
         student_id = result[0]
 
-        # Get topic-specific progress
-        cursor.execute("""
-            SELECT COUNT(*) as completed_count
-            FROM student_answers
-            WHERE student_id = ? AND topic_id = ?
-        """, (student_id, topic_id))
-        topic_result = cursor.fetchone()
-        topic_completed = topic_result[0] if topic_result else 0
+        # Get topic-specific progress from the topic's completion bitmap
+        completed_bits = bitmaps.load_bitmap(cursor, student_id, topic_id)
 
         # Get overall DSA progress
         cursor.execute("""
@@ -648,12 +618,15 @@ def student_progress():
         """, (student_id,))
         dsa_progress = cursor.fetchone()
 
-        return jsonify({
+        result = {
             'success': True,
-            'completed_questions': topic_completed,
+            'completed_questions': bitmaps.popcount(completed_bits),
+            'completed_problems': bitmaps.members(completed_bits),
             'dsa_completed': dsa_progress[0] if dsa_progress else 0,
             'dsa_total': dsa_progress[1] if dsa_progress else 0
-        })
+        }
+        cache.store(session['user_id'], student_id, cache_key, result, g.get('progress_version'))
+        return jsonify(result)
 
     except Exception as e:
         print(f"Error fetching progress: {e}")
@@ -741,8 +714,7 @@ def user_profile():
 
     user_id = session['user_id']
     
-    conn = sqlite3.connect("placement_preparation.db")
-    conn.row_factory = sqlite3.Row  
+    conn = get_db_connection()
     cursor = conn.cursor()
     
     cursor.execute("SELECT * FROM students WHERE user_id = ?", (user_id,))
@@ -766,7 +738,7 @@ def get_topic_id(topic_name):
 
 @app.route('/debug_db')
 def debug_db():
-    conn = sqlite3.connect("placement_preparation.db")
+    conn = get_db_connection()
     cursor = conn.cursor()
     
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
@@ -776,6 +748,18 @@ def debug_db():
     
     return {"tables": [table[0] for table in tables]}  # Check if 'students' exists
 
+@app.route('/db_pool_stats')
+def db_pool_stats():
+    if 'role' not in session or session['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+    return jsonify({'success': True, **database.get_pool().stats()})
+
+@app.route('/progress_cache_stats')
+def progress_cache_stats():
+    if 'role' not in session or session['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+    return jsonify({'success': True, **progress_cache.get_cache().stats()})
+
 @app.route('/update_aptitude_progress', methods=['POST'])
 def update_aptitude_progress():
     if 'user_id' not in session:
@@ -790,6 +774,8 @@ def update_aptitude_progress():
         problem_id = data.get('problem_id')
         topic_id = data.get('topic_id')
         is_completed = data.get('status', True)
+        if not all([topic_id, problem_id]):
+            return jsonify({'success': False, 'message': 'Invalid data'}), 400
         
         # Get student ID from user_id
         db = get_db_connection()
@@ -802,38 +788,38 @@ def update_aptitude_progress():
         
         student_id = result[0]
 
-        # Insert or update the problem completion status
-        cursor.execute("""
-            INSERT OR REPLACE INTO aptitude_progress 
-            (student_id, problem_id, is_completed) 
-            VALUES (?, ?, ?)
-        """, (student_id, problem_id, is_completed))
+        catalog = topic_catalog.get_catalog(cursor)
+
+        # Insert or update the problem completion status under its
+        # (topic_id, ordinal) key
+        topic_id, ordinal = problem_registry.mark_problem(
+            cursor, 'Aptitude', student_id, topic_id, problem_id, 1 if is_completed else 0
+        )
+        # Moves the student_progress and category counters like mark_complete,
+        # back down when the problem is unchecked
+        if is_completed:
+            progress.record_completion(cursor, student_id, topic_id, ordinal, catalog)
+        else:
+            progress.remove_completion(cursor, student_id, topic_id, ordinal, catalog)
         
         # Count completed problems for this topic
-        cursor.execute("""
-            SELECT COUNT(*) FROM aptitude_progress 
-            WHERE student_id = ? AND problem_id LIKE ? AND is_completed = 1
-        """, (student_id, problem_id[0] + '%'))
-        completed_count = cursor.fetchone()[0]
+        completed_count = problem_registry.count_completed(cursor, 'Aptitude', student_id, topic_id)
         
         # Get total problems for this topic
-        cursor.execute("SELECT total_questions FROM progress_topics WHERE topic_id = ?", (topic_id,))
-        total_questions = cursor.fetchone()[0]
-        
-        # Update student progress for this topic
-        cursor.execute("""
-            INSERT OR REPLACE INTO student_progress 
-            (student_id, topic_id, completed_questions, total_questions, is_completed)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            student_id,
-            topic_id,
-            completed_count,
-            total_questions,
-            1 if completed_count >= total_questions else 0
-        ))
+        total_questions = catalog.total_for(topic_id)
 
+        version = progress_events.current_version(cursor, student_id)
         db.commit()
+        progress_cache.get_cache().invalidate(student_id)
+        leaderboard.record(cursor, student_id)
+        progress_events.get_broker().publish(student_id, {
+            'type': 'progress',
+            'topic_id': topic_id,
+            'parent_topic': 'Aptitude',
+            'completed': completed_count,
+            'total': total_questions,
+            'version': version
+        }, version)
         print("Successfully updated progress")
         return jsonify({
             'success': True,
@@ -854,10 +840,17 @@ def update_aptitude_progress():
 
 
 @app.route('/get_aptitude_progress')
+@conditional_progress
 def get_aptitude_progress():
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
     
+    cache = progress_cache.get_cache()
+    cached = cache.lookup(session['user_id'], 'aptitude', g.get('progress_version'))
+    if cached is not None:
+        return jsonify(cached)
+    
+    db = None
     try:
         db = get_db_connection()
         cursor = db.cursor()
@@ -880,7 +873,7 @@ def get_aptitude_progress():
         
         # Get overall aptitude progress
         cursor.execute("""
-            SELECT SUM(completed_questions) as completed, SUM(total_questions) as total
+            SELECT SUM(sp.completed_questions) as completed, SUM(sp.total_questions) as total
             FROM student_progress sp
             JOIN progress_topics pt ON sp.topic_id = pt.topic_id
             WHERE sp.student_id = ? AND pt.parent_topic = 'Aptitude'
@@ -892,11 +885,13 @@ def get_aptitude_progress():
             'total': overall[1] or 0
         }
         
-        return jsonify({
+        result = {
             'success': True,
             'progress': progress,
             'overall_progress': overall_progress
-        })
+        }
+        cache.store(session['user_id'], student_id, 'aptitude', result, g.get('progress_version'))
+        return jsonify(result)
         
     except Exception as e:
         print(f"Error fetching progress: {e}")
@@ -1169,239 +1164,43 @@ def mark_complete():
         student_id = result[0]
         print(f"✅ Found student ID: {student_id} for problem {problem_id} in topic {topic_id}")
 
-        # Convert problem_id to string if it's not already
-        problem_id_str = str(problem_id)
-        
-        # Create question_id from problem_id
-        if ('-' in problem_id_str):
-            try:
-                question_id = int(problem_id_str.split('-')[-1])
-            except (ValueError, IndexError):
-                question_id = 1
-        else:
-            # If no hyphen, just use the number as is or default to 1
-            try:
-                question_id = int(problem_id_str)
-            except ValueError:
-                question_id = 1
+        # Map the page's problem id onto its canonical (topic_id, ordinal) key
+        topic_id, question_id = problem_registry.resolve(cursor, topic_id, problem_id)
         
         print(f"✅ Converted problem ID '{problem_id}' to question ID '{question_id}'")
         
-        # First check if this answer is already recorded
-        cursor.execute("""
-            SELECT * FROM student_answers 
-            WHERE student_id = ? AND topic_id = ? AND question_id = ?
-        """, (student_id, topic_id, question_id))
+        # Topic and category totals come from the cached catalog
+        catalog = topic_catalog.get_catalog(cursor)
+        parent_topic = catalog.parent_of(topic_id) or 'Unknown'
+        topic_total = catalog.total_for(topic_id) or 10
         
-        if not cursor.fetchone():
-            # Insert into student_answers table
-            cursor.execute("""
-                INSERT INTO student_answers 
-                (student_id, question_id, topic_id, given_answer, is_correct) 
-                VALUES (?, ?, ?, 'completed', 1)
-            """, (student_id, question_id, topic_id))
-            
+        # Record the answer; the topic and category counters only move when
+        # this is a new completion
+        added, completed_questions = progress.record_completion(
+            cursor, student_id, topic_id, question_id, catalog
+        )
+        if added:
             print(f"✅ Inserted into student_answers: student_id={student_id}, question_id={question_id}, topic_id={topic_id}")
         
-        # Get parent topic for the current topic
-        cursor.execute("SELECT parent_topic FROM progress_topics WHERE topic_id = ?", (topic_id,))
-        topic_result = cursor.fetchone()
-        parent_topic = topic_result[0] if topic_result else 'Unknown'
-        
         # Update specific progress based on the parent topic
-        if parent_topic == 'Aptitude':
-            # Check if aptitude_progress table has a student_id column
-            try:
-                cursor.execute("PRAGMA table_info(aptitude_progress)")
-                columns = [row['name'] for row in cursor.fetchall()]
-                
-                if 'student_id' in columns:
-                    # Table has student_id column, use it
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO aptitude_progress 
-                        (student_id, problem_id, is_completed) 
-                        VALUES (?, ?, 1)
-                    """, (student_id, problem_id))
-                    print(f"✅ Inserted into aptitude_progress with student_id: {student_id}, problem_id={problem_id}")
-                elif 'user_id' in columns:
-                    # Table has user_id column instead, use that
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO aptitude_progress 
-                        (user_id, problem_id, is_completed) 
-                        VALUES (?, ?, 1)
-                    """, (session['user_id'], problem_id))
-                    print(f"✅ Inserted into aptitude_progress with user_id: {session['user_id']}, problem_id={problem_id}")
-                else:
-                    print("⚠️ aptitude_progress table has neither student_id nor user_id column, skipping this update")
-            except Exception as e:
-                print(f"⚠️ Error updating aptitude_progress: {e}")
-                # Continue with the function even if this part fails
-        
-        elif parent_topic == 'Communication':
-            # Check if communication_progress table exists and has appropriate columns
-            try:
-                # First try to create the table if it doesn't exist
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS communication_progress (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        student_id INTEGER,
-                        user_id INTEGER,
-                        problem_id TEXT NOT NULL,
-                        is_completed INTEGER DEFAULT 0,
-                        UNIQUE(problem_id, student_id)
-                    )
-                """)
-                
-                cursor.execute("PRAGMA table_info(communication_progress)")
-                columns = [row['name'] for row in cursor.fetchall()]
-                
-                if 'student_id' in columns:
-                    # Table has student_id column, use it
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO communication_progress 
-                        (student_id, problem_id, is_completed) 
-                        VALUES (?, ?, 1)
-                    """, (student_id, problem_id))
-                    print(f"✅ Inserted into communication_progress with student_id: {student_id}, problem_id={problem_id}")
-                elif 'user_id' in columns:
-                    # Table has user_id column instead, use that
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO communication_progress 
-                        (user_id, problem_id, is_completed) 
-                        VALUES (?, ?, 1)
-                    """, (session['user_id'], problem_id))
-                    print(f"✅ Inserted into communication_progress with user_id: {session['user_id']}, problem_id={problem_id}")
-                else:
-                    print("⚠️ communication_progress table has neither student_id nor user_id column, skipping this update")
-            except Exception as e:
-                print(f"⚠️ Error updating communication_progress: {e}")
-                # Continue with the function even if this part fails
-        
-        # Get total questions for current topic
-        cursor.execute("SELECT total_questions FROM progress_topics WHERE topic_id = ?", (topic_id,))
-        topic_result = cursor.fetchone()
-        topic_total = topic_result[0] if topic_result else 10
-        
-        # Get count of completed questions for this topic
-        cursor.execute("""
-            SELECT COUNT(*) FROM student_answers
-            WHERE student_id = ? AND topic_id = ? AND is_correct = 1
-        """, (student_id, topic_id))
-        completed_questions = cursor.fetchone()[0]
+        if parent_topic in problem_registry.PROBLEM_TABLES:
+            problem_registry.mark_problem(cursor, parent_topic, student_id, topic_id, problem_id)
+            print(f"✅ Marked {parent_topic} problem {problem_id} complete for student_id: {student_id}")
         
         print(f"✅ Topic {topic_id}: {completed_questions} of {topic_total} completed")
         
-        # Update student_progress table
-        cursor.execute("""
-            INSERT OR REPLACE INTO student_progress 
-            (student_id, topic_id, completed_questions, total_questions, is_completed) 
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            student_id, 
-            topic_id, 
-            completed_questions, 
-            topic_total, 
-            1 if completed_questions >= topic_total else 0
-        ))
-        
-        # Update category-specific overall progress
-        if parent_topic == 'Aptitude':
-            try:
-                # Calculate Aptitude progress
-                cursor.execute("""
-                    SELECT SUM(total_questions) 
-                    FROM progress_topics 
-                    WHERE parent_topic = 'Aptitude'
-                """)
-                total_aptitude_questions = cursor.fetchone()[0] or 10
-
-                cursor.execute("""
-                    SELECT COUNT(*) 
-                    FROM student_answers sa
-                    JOIN progress_topics pt ON sa.topic_id = pt.topic_id
-                    WHERE sa.student_id = ? AND pt.parent_topic = 'Aptitude'
-                """, (student_id,))
-                completed_aptitude_questions = cursor.fetchone()[0] or 0
-
-                # Update Aptitude progress
-                cursor.execute("""
-                    INSERT OR REPLACE INTO aptitude_overall_progress 
-                    (student_id, completed_questions, total_questions, is_completed, last_updated)
-                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (
-                    student_id, 
-                    completed_aptitude_questions, 
-                    total_aptitude_questions,
-                    1 if completed_aptitude_questions >= total_aptitude_questions else 0
-                ))
-            except Exception as e:
-                print(f"⚠️ Note: Could not update aptitude overall progress - {e}")
-        
-        elif parent_topic == 'Communication':
-            try:
-                # Calculate Communication progress
-                cursor.execute("""
-                    SELECT SUM(total_questions) 
-                    FROM progress_topics 
-                    WHERE parent_topic = 'Communication'
-                """)
-                total_comm_questions = cursor.fetchone()[0] or 10
-
-                cursor.execute("""
-                    SELECT COUNT(*) 
-                    FROM student_answers sa
-                    JOIN progress_topics pt ON sa.topic_id = pt.topic_id
-                    WHERE sa.student_id = ? AND pt.parent_topic = 'Communication'
-                """, (student_id,))
-                completed_comm_questions = cursor.fetchone()[0] or 0
-
-                # Update Communication progress
-                cursor.execute("""
-                    INSERT OR REPLACE INTO communication_overall_progress 
-                    (student_id, completed_questions, total_questions, is_completed, last_updated)
-                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (
-                    student_id, 
-                    completed_comm_questions, 
-                    total_comm_questions,
-                    1 if completed_comm_questions >= total_comm_questions else 0
-                ))
-            except Exception as e:
-                print(f"⚠️ Note: Could not update communication overall progress - {e}")
-        
-        elif parent_topic == 'DSA':
-            try:
-                # Calculate DSA progress
-                cursor.execute("""
-                    SELECT SUM(total_questions) 
-                    FROM progress_topics 
-                    WHERE parent_topic = 'DSA'
-                """)
-                total_dsa_questions = cursor.fetchone()[0] or 10
-
-                cursor.execute("""
-                    SELECT COUNT(*) 
-                    FROM student_answers sa
-                    JOIN progress_topics pt ON sa.topic_id = pt.topic_id
-                    WHERE sa.student_id = ? AND pt.parent_topic = 'DSA'
-                """, (student_id,))
-                completed_dsa_questions = cursor.fetchone()[0] or 0
-
-                # Update DSA progress
-                cursor.execute("""
-                    INSERT OR REPLACE INTO dsa_overall_progress 
-                    (student_id, completed_questions, total_questions, is_completed, last_updated)
-                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (
-                    student_id, 
-                    completed_dsa_questions, 
-                    total_dsa_questions,
-                    1 if completed_dsa_questions >= total_dsa_questions else 0
-                ))
-            except Exception as e:
-                print(f"⚠️ Note: Could not update DSA overall progress - {e}")
-        
+        version = progress_events.current_version(cursor, student_id)
         db.commit()
+        progress_cache.get_cache().invalidate(student_id)
+        leaderboard.record(cursor, student_id)
+        progress_events.get_broker().publish(student_id, {
+            'type': 'progress',
+            'topic_id': topic_id,
+            'parent_topic': parent_topic,
+            'completed': completed_questions,
+            'total': topic_total,
+            'version': version
+        }, version)
         print("✅ Successfully updated progress!")
         
         # Return updated progress information
@@ -1424,430 +1223,157 @@ def mark_complete():
         if 'db' in locals():
             db.close()
 
-@app.route('/debug_progress')
-def debug_progress():
-    if 'user_id' not in session:
-        return jsonify({'error': 'Not logged in'})
-    
-    try:
-        db = get_db_connection()
-        cursor = db.cursor()
-        
-        # Get student ID
-        cursor.execute("SELECT id FROM students WHERE user_id = ?", (session['user_id'],))
-        result = cursor.fetchone()
-        if not result:
-            return jsonify({'error': 'Student not found'})
-        
-        student_id = result[0]
-        
-        # Get all tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        # Get topic information
-        cursor.execute("SELECT * FROM progress_topics")
-        topics = [dict(row) for row in cursor.fetchall()]
-        
-        # Get student answers
-        cursor.execute("""
-            SELECT sa.*, pt.parent_topic, pt.topic_name
-            FROM student_answers sa
-            JOIN progress_topics pt ON sa.topic_id = pt.topic_id
-            WHERE sa.student_id = ?
-        """, (student_id,))
-        answers = [dict(row) for row in cursor.fetchall()]
-        
-        # Get aptitude progress
-        cursor.execute("SELECT * FROM aptitude_progress WHERE student_id = ?", (student_id,))
-        aptitude_progress = [dict(row) for row in cursor.fetchall()]
-        
-        # Get student_progress
-        cursor.execute("""
-            SELECT sp.*, pt.parent_topic, pt.topic_name
-            FROM student_progress sp
-            JOIN progress_topics pt ON sp.topic_id = pt.topic_id
-            WHERE sp.student_id = ?
-        """, (student_id,))
-        progress = [dict(row) for row in cursor.fetchall()]
-        
-        # Return all the collected data
-        return jsonify({
-            'success': True,
-            'student_id': student_id,
-            'tables': tables,
-            'topics': topics,
-            'answers': answers,
-            'aptitude_progress': aptitude_progress,
-            'student_progress': progress,
-            'progress_summary': get_student_progress()
-        })
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify({'error': str(e)})
-    finally:
-        if 'db' in locals():
-            db.close()
+# Most completions one batch request may carry
+MAX_BATCH_COMPLETIONS = 500
 
-@app.route('/init_mock_progress')
-def init_mock_progress():
+@app.route('/mark_complete_batch', methods=['POST'])
+def mark_complete_batch():
+    """Apply a list of {topic_id, problem_id} completions in one transaction."""
     if 'user_id' not in session:
-        return jsonify({'success': False, 'message': 'Not logged in'}), 401
-        
-    try:
-        db = get_db_connection()
-        cursor = db.cursor()
-        
-        # Get student ID
-        cursor.execute("SELECT id FROM students WHERE user_id = ?", (session['user_id'],))
-        result = cursor.fetchone()
-        if not result:
-            return jsonify({'success': False, 'message': 'Student not found'}), 404
-            
-        student_id = result[0]
-        
-        # Check if progress_topics exists and has aptitude topics
-        cursor.execute("SELECT COUNT(*) FROM progress_topics WHERE parent_topic = 'Aptitude'")
-        aptitude_topic_count = cursor.fetchone()[0]
-        
-        if aptitude_topic_count == 0:
-            # Create some aptitude topics if none exist
-            cursor.execute("""
-                INSERT OR IGNORE INTO progress_topics 
-                (topic_id, topic_name, parent_topic, description, total_questions) 
-                VALUES 
-            (?, 2, 102, 'answer2', 1)
-        """, (student_id, student_id, student_id, student_id, student_id))
-        
-        # Add some mock student answers for Communication topics
-        cursor.execute("""
-            INSERT OR IGNORE INTO student_answers 
-            (student_id, question_id, topic_id, given_answer, is_correct) 
-            VALUES 
-            (?, 1, 201, 'answer1', 1),
-            (?, 2, 201, 'answer2', 1),
-            (?, 3, 201, 'answer3', 1),
-            (?, 1, 202, 'answer1', 1)
-        """, (student_id, student_id, student_id, student_id))
-        
-        db.commit()
-        
-        # Return the current progress after initialization
-        return jsonify({
-            'success': True,
-            'message': 'Mock data initialized',
-            'progress': get_student_progress()
-        })
-        
-    except Exception as e:
-        if db:
-            db.rollback()
-        return jsonify({'success': False, 'message': str(e)}), 500
-    finally:
-        if db:
-            db.close()
+        return jsonify({"status": "error", "message": "Not logged in"}), 401
 
-@app.route('/fix_db_schema')
-def fix_db_schema():
-    if 'user_id' not in session:
-        return jsonify({'success': False, 'message': 'Not logged in'}), 401
-        
-    try:
-        db = get_db_connection()
-        cursor = db.cursor()
-        
-        # Get all tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = [row[0] for row in cursor.fetchall()]
-        
-        # Check and create progress_topics table if needed
-        if 'progress_topics' not in tables:
-            cursor.execute("""
-                CREATE TABLE progress_topics (
-                    topic_id INTEGER PRIMARY KEY,
-                    topic_name TEXT NOT NULL,
-                    parent_topic TEXT NOT NULL,
-                    description TEXT,
-                    total_questions INTEGER DEFAULT 10
-                )
-            """)
-            
-        # Check and create student_answers table if needed
-        if 'student_answers' not in tables:
-            cursor.execute("""
-                CREATE TABLE student_answers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id INTEGER NOT NULL,
-                    question_id INTEGER NOT NULL,
-                    topic_id INTEGER NOT NULL,
-                    given_answer TEXT,
-                    is_correct INTEGER DEFAULT 0,
-                    UNIQUE(student_id, question_id, topic_id)
-                )
-            """)
-            
-        # Check and create student_progress table if needed
-        if 'student_progress' not in tables:
-            cursor.execute("""
-                CREATE TABLE student_progress (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id INTEGER NOT NULL,
-                    topic_id INTEGER NOT NULL,
-                    completed_questions INTEGER DEFAULT 0,
-                    total_questions INTEGER DEFAULT 10,
-                    is_completed INTEGER DEFAULT 0,
-                    UNIQUE(student_id, topic_id)
-                )
-            """)
-            
-        # Check and create aptitude_progress table if needed
-        if 'aptitude_progress' not in tables:
-            cursor.execute("""
-                CREATE TABLE aptitude_progress (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id INTEGER NOT NULL,
-                    problem_id TEXT NOT NULL,
-                    is_completed INTEGER DEFAULT 0,
-                    UNIQUE(student_id, problem_id)
-                )
-            """)
-        else:
-            # Fix aptitude_progress schema if it has a user_id column instead of student_id
-            cursor.execute("PRAGMA table_info(aptitude_progress)")
-            columns = [row['name'] for row in cursor.fetchall()]
-            
-            if 'user_id' in columns and 'student_id' not in columns:
-                # Create a new table with correct schema
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS aptitude_progress_new (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        student_id INTEGER NOT NULL,
-                        problem_id TEXT NOT NULL,
-                        is_completed INTEGER DEFAULT 0,
-                        UNIQUE(student_id, problem_id)
-                    )
-                """)
-                
-                # Get student_id for each user_id and copy data
-                cursor.execute("SELECT * FROM aptitude_progress")
-                rows = cursor.fetchall()
-                
-                for row in rows:
-                    cursor.execute("SELECT id FROM students WHERE user_id = ?", (row[1],))  # user_id is at index 1
-                    student = cursor.fetchone()
-                    if student:
-                        cursor.execute("""
-                            INSERT OR IGNORE INTO aptitude_progress_new 
-                            (student_id, problem_id, is_completed) 
-                            VALUES (?, ?, ?)
-                        """, (student[0], row[2], row[3]))  # problem_id at index 2, is_completed at index 3
-                
-                # Drop old table and rename new one
-                cursor.execute("DROP TABLE aptitude_progress")
-                cursor.execute("ALTER TABLE aptitude_progress_new RENAME TO aptitude_progress")
-        
-        # Add default topics if empty
-        cursor.execute("SELECT COUNT(*) FROM progress_topics")
-        topic_count = cursor.fetchone()[0]
-        
-        if (topic_count == 0):
-            # Add some default topics for each category
-            cursor.execute("""
-                INSERT INTO progress_topics (topic_id, topic_name, parent_topic, description, total_questions)
-                VALUES
-                (1, 'Basic Programming', 'DSA', 'Basic programming concepts', 15),
-                (2, 'Arrays and Strings', 'DSA', 'Array and string manipulation', 12),
-                (3, 'Linked Lists', 'DSA', 'Linked list operations', 10),
-                (4, 'Stacks and Queues', 'DSA', 'Stack and queue implementations', 8),
-                
-                (101, 'Reading Comprehension', 'Communication', 'Reading and understanding passages', 50),
-                (102, 'Parajumbles', 'Communication', 'Sentence rearrangement', 50),
-                
-                (201, 'Bar Graphs', 'Aptitude', 'Bar graph interpretation', 50),
-                (202, 'Pie Charts', 'Aptitude', 'Pie chart analysis', 50),
-                (203, 'Line Graphs', 'Aptitude', 'Line graph interpretation', 50),
-                (204, 'Tabulation', 'Aptitude', 'Data table analysis', 50)
-            """)
-        
-        # Insert mock data for testing
-        student_id = None
-        cursor.execute("SELECT id FROM students WHERE user_id = ?", (session['user_id'],))
-        result = cursor.fetchone()
-        if result:
-            student_id = result[0]
-            
-            # Add some mock answers if none exist
-            cursor.execute("SELECT COUNT(*) FROM student_answers WHERE student_id = ?", (student_id,))
-            if cursor.fetchone()[0] == 0:
-                # Insert mock answers for each category
-                cursor.execute("""
-                    INSERT OR IGNORE INTO student_answers (student_id, question_id, topic_id, given_answer, is_correct)
-                    VALUES
-                    (?, 1, 1, 'answer1', 1),
-                    (?, 2, 1, 'answer2', 1),
-                    (?, 1, 2, 'answer1', 1),
-                    
-                    (?, 1, 101, 'answer1', 1),
-                    (?, 2, 101, 'answer2', 1),
-                    (?, 1, 102, 'answer1', 1),
-                    
-                    (?, 1, 201, 'answer1', 1),
-                    (?, 2, 201, 'answer2', 1),
-                    (?, 1, 202, 'answer1', 1)
-                """, (student_id,)*9)
-        
-        db.commit()
-        
-        # Return diagnostic information
-        return jsonify({
-            'success': True,
-            'message': 'Database schema verified and fixed',
-            'tables': tables,
-            'progress_data': get_student_progress()
-        })
-        
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify({'success': False, 'message': str(e)}), 500
-    finally:
-        if 'db' in locals():
-            db.close()
+    data = request.get_json(silent=True) or {}
+    completions = data.get('completions')
+    if not isinstance(completions, list) or not completions:
+        return jsonify({"status": "error", "message": "completions must be a non-empty list"}), 400
+    if len(completions) > MAX_BATCH_COMPLETIONS:
+        return jsonify({"status": "error", "message": f"At most {MAX_BATCH_COMPLETIONS} completions per batch"}), 400
+
+    items = []
+    for item in completions:
+        if not isinstance(item, dict) or not all([item.get('topic_id'), item.get('problem_id')]):
+            return jsonify({"status": "error", "message": "Invalid data", "item": item}), 400
+        try:
+            topic_id = int(item['topic_id'])
+        except (TypeError, ValueError):
+            return jsonify({"status": "error", "message": "Invalid topic_id", "item": item}), 400
+        items.append((topic_id, item['problem_id']))
 
-@app.route('/fix_missing_tables')
-def fix_missing_tables():
-    if 'user_id' not in session:
-        return jsonify({'success': False, 'message': 'Not logged in'}), 401
-        
+    db = None
     try:
         db = get_db_connection()
         cursor = db.cursor()
-        
-        # Create the aptitude_overall_progress table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS aptitude_overall_progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id INTEGER NOT NULL,
-                completed_questions INTEGER DEFAULT 0,
-                total_questions INTEGER DEFAULT 0,
-                is_completed INTEGER DEFAULT 0,
-                last_updated TIMESTAMP,
-                UNIQUE(student_id)
-            )
-        """)
-        
-        # Create the dsa_overall_progress table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS dsa_overall_progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id INTEGER NOT NULL,
-                completed_questions INTEGER DEFAULT 0,
-                total_questions INTEGER DEFAULT 0,
-                is_completed INTEGER DEFAULT 0,
-                last_updated TIMESTAMP,
-                UNIQUE(student_id)
-            )
-        """)
-        
-        # Create the communication_overall_progress table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS communication_overall_progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id INTEGER NOT NULL,
-                completed_questions INTEGER DEFAULT 0,
-                total_questions INTEGER DEFAULT 0,
-                is_completed INTEGER DEFAULT 0,
-                last_updated TIMESTAMP,
-                UNIQUE(student_id)
-            )
-        """)
-        
+
+        cursor.execute("SELECT id FROM students WHERE user_id = ?", (session['user_id'],))
+        result = cursor.fetchone()
+        if not result:
+            return jsonify({'status': 'error', 'message': 'Student not found'}), 404
+        student_id = result[0]
+
+        catalog = topic_catalog.get_catalog(cursor)
+        added_by_topic = progress.record_completions(
+            cursor, student_id,
+            [problem_registry.resolve(cursor, topic_id, problem_id) for topic_id, problem_id in items],
+            catalog
+        )
+
+        # Per-problem completion flags for the aptitude and communication pages
+        for topic_id, problem_id in items:
+            parent_topic = catalog.parent_of(topic_id)
+            if parent_topic in problem_registry.PROBLEM_TABLES:
+                problem_registry.mark_problem(cursor, parent_topic, student_id, topic_id, problem_id)
+
+        version = progress_events.current_version(cursor, student_id)
         db.commit()
-        
+        progress_cache.get_cache().invalidate(student_id)
+        leaderboard.record(cursor, student_id)
+
+        topics = progress.topic_progress(cursor, student_id, [topic_id for topic_id, _ in items], catalog)
+        categories = progress.category_progress(cursor, student_id, catalog)
+        applied = sum(added_by_topic.values())
+        progress_events.get_broker().publish(student_id, {
+            'type': 'progress',
+            'topics': {str(topic_id): topic for topic_id, topic in topics.items()},
+            'categories': categories,
+            'version': version
+        }, version)
+        print(f"✅ Batch for student {student_id}: {applied} new of {len(items)} completions")
+
         return jsonify({
-            'success': True,
-            'message': 'Missing tables created successfully'
+            "status": "success",
+            "applied": applied,
+            "duplicates": len(items) - applied,
+            # JSON object keys are strings
+            "topics": {str(topic_id): topic for topic_id, topic in topics.items()},
+            "categories": categories
         })
-        
+
     except Exception as e:
+        traceback.print_exc()
+        print(f"Error in mark_complete_batch: {e}")
         if db:
             db.rollback()
-        return jsonify({'success': False, 'message': str(e)}), 500
+        return jsonify({"status": "error", "message": str(e)}), 500
     finally:
         if db:
             db.close()
 
-@app.route('/fix_aptitude_schema')
-def fix_aptitude_schema():
+@app.route('/debug_progress')
+def debug_progress():
     if 'user_id' not in session:
-        return jsonify({'success': False, 'message': 'Not logged in'}), 401
-        
+        return jsonify({'error': 'Not logged in'})
+    
     try:
         db = get_db_connection()
         cursor = db.cursor()
         
-        # Check if aptitude_progress table exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='aptitude_progress'")
-        if not cursor.fetchone():
-            # Create the table with proper schema
-            cursor.execute("""
-                CREATE TABLE aptitude_progress (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER, 
-                    student_id INTEGER,
-                    problem_id TEXT NOT NULL,
-                    is_completed INTEGER DEFAULT 0,
-                    UNIQUE(problem_id, student_id)
-                )
-            """)
-            print("Created aptitude_progress table with both columns")
-        else:
-            # Check current schema
-            cursor.execute("PRAGMA table_info(aptitude_progress)")
-            columns = {row['name']: row for row in cursor.fetchall()}
-            
-            # Add missing columns if needed
-            if 'student_id' not in columns:
-                cursor.execute("ALTER TABLE aptitude_progress ADD COLUMN student_id INTEGER")
-                print("Added student_id column to aptitude_progress")
-                
-                # If user_id exists, populate student_id based on it
-                if 'user_id' in columns:
-                    cursor.execute("""
-                        UPDATE aptitude_progress 
-                        SET student_id = (
-                            SELECT id FROM students WHERE user_id = aptitude_progress.user_id
-                        )
-                        WHERE user_id IS NOT NULL
-                    """)
-                    print("Populated student_id values from user_id")
-            
-            if 'user_id' not in columns:
-                cursor.execute("ALTER TABLE aptitude_progress ADD COLUMN user_id INTEGER")
-                print("Added user_id column to aptitude_progress")
+        # Get student ID
+        cursor.execute("SELECT id FROM students WHERE user_id = ?", (session['user_id'],))
+        result = cursor.fetchone()
+        if not result:
+            return jsonify({'error': 'Student not found'})
         
-        db.commit()
+        student_id = result[0]
         
-        # Return the fixed schema info
-        cursor.execute("PRAGMA table_info(aptitude_progress)")
-        columns = [row['name'] for row in cursor.fetchall()]
+        # Get all tables
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = [row[0] for row in cursor.fetchall()]
+        
+        # Get topic information
+        topics = list(topic_catalog.get_catalog(cursor).topics.values())
+        
+        # Get student answers
+        cursor.execute("""
+            SELECT sa.*, pt.parent_topic, pt.topic_name
+            FROM student_answers sa
+            JOIN progress_topics pt ON sa.topic_id = pt.topic_id
+            WHERE sa.student_id = ?
+        """, (student_id,))
+        answers = [dict(row) for row in cursor.fetchall()]
+        
+        # Get aptitude progress
+        cursor.execute("SELECT * FROM aptitude_progress WHERE student_id = ?", (student_id,))
+        aptitude_progress = [dict(row) for row in cursor.fetchall()]
+        
+        # Get student_progress
+        cursor.execute("""
+            SELECT sp.*, pt.parent_topic, pt.topic_name
+            FROM student_progress sp
+            JOIN progress_topics pt ON sp.topic_id = pt.topic_id
+            WHERE sp.student_id = ?
+        """, (student_id,))
+        progress = [dict(row) for row in cursor.fetchall()]
         
+        # Return all the collected data
         return jsonify({
             'success': True,
-            'message': 'Aptitude progress table schema fixed',
-            'columns': columns
+            'student_id': student_id,
+            'tables': tables,
+            'topics': topics,
+            'answers': answers,
+            'aptitude_progress': aptitude_progress,
+            'student_progress': progress,
+            'progress_summary': get_student_progress()
         })
-        
     except Exception as e:
         traceback.print_exc()
-        if 'db' in locals():
-            db.rollback()
-        return jsonify({'success': False, 'message': str(e)}), 500
+        return jsonify({'error': str(e)})
     finally:
         if 'db' in locals():
             db.close()
 
-@app.route('/fix_communication_schema')
-def fix_communication_schema():
+@app.route('/init_mock_progress')
+def init_mock_progress():
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
         
@@ -1855,80 +1381,75 @@ def fix_communication_schema():
         db = get_db_connection()
         cursor = db.cursor()
         
-        # Create the communication_overall_progress table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS communication_overall_progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id INTEGER NOT NULL,
-                completed_questions INTEGER DEFAULT 0,
-                total_questions INTEGER DEFAULT 0,
-                is_completed INTEGER DEFAULT 0,
-                last_updated TIMESTAMP,
-                UNIQUE(student_id)
-            )
-        """)
-        
-        # Also ensure we have a way to track individual communication exercises
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS communication_progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id INTEGER,
-                user_id INTEGER,
-                problem_id TEXT NOT NULL,
-                is_completed INTEGER DEFAULT 0,
-                UNIQUE(problem_id, student_id)
-            )
-        """)
-        
-        # Check current schema of communication_progress
-        try:
-            cursor.execute("PRAGMA table_info(communication_progress)")
-            columns = {row['name']: row for row in cursor.fetchall()}
-            
-            # Add missing columns if needed
-            if 'student_id' not in columns:
-                cursor.execute("ALTER TABLE communication_progress ADD COLUMN student_id INTEGER")
-                print("Added student_id column to communication_progress")
-                
-                # If user_id exists, populate student_id based on it
-                if 'user_id' in columns:
-                    cursor.execute("""
-                        UPDATE communication_progress 
-                        SET student_id = (
-                            SELECT id FROM students WHERE user_id = communication_progress.user_id
-                        )
-                        WHERE user_id IS NOT NULL
-                    """)
-                    print("Populated student_id values from user_id")
+        # Get student ID
+        cursor.execute("SELECT id FROM students WHERE user_id = ?", (session['user_id'],))
+        result = cursor.fetchone()
+        if not result:
+            return jsonify({'success': False, 'message': 'Student not found'}), 404
             
-            if 'user_id' not in columns:
-                cursor.execute("ALTER TABLE communication_progress ADD COLUMN user_id INTEGER")
-                print("Added user_id column to communication_progress")
-        except Exception as e:
-            print(f"Error checking communication_progress schema: {e}")
-            # Table doesn't exist yet, will be created earlier
+        student_id = result[0]
+        
+        # Check if progress_topics exists and has aptitude topics
+        cursor.execute("SELECT COUNT(*) FROM progress_topics WHERE parent_topic = 'Aptitude'")
+        aptitude_topic_count = cursor.fetchone()[0]
+        
+        if aptitude_topic_count == 0:
+            # Create some aptitude topics if none exist
+            cursor.execute("""
+                INSERT OR IGNORE INTO progress_topics 
+                (topic_id, topic_name, parent_topic, description, total_questions) 
+                VALUES 
+            (?, 2, 102, 'answer2', 1)
+        """, (student_id, student_id, student_id, student_id, student_id))
+        
+        # Add some mock student answers for Communication topics
+        cursor.execute("""
+            INSERT OR IGNORE INTO student_answers 
+            (student_id, question_id, topic_id, given_answer, is_correct) 
+            VALUES 
+            (?, 1, 201, 'answer1', 1),
+            (?, 2, 201, 'answer2', 1),
+            (?, 3, 201, 'answer3', 1),
+            (?, 1, 202, 'answer1', 1)
+        """, (student_id, student_id, student_id, student_id))
+        
+        # The mock answers bypass record_completion, so recompute the
+        # counters and bitmaps derived from them
+        progress.rebuild_counters(cursor, topic_catalog.load_catalog(cursor), student_id)
+        bitmaps.rebuild(cursor, student_id)
         
         db.commit()
+        # progress_topics may have changed; other workers see it via cache_versions
+        topic_catalog.invalidate()
+        progress_cache.get_cache().invalidate(student_id)
         
+        # Return the current progress after initialization
         return jsonify({
             'success': True,
-            'message': 'Communication progress tables created/fixed successfully'
+            'message': 'Mock data initialized',
+            'progress': get_student_progress()
         })
         
     except Exception as e:
-        traceback.print_exc()
-        if 'db' in locals():
+        if db:
             db.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
     finally:
-        if 'db' in locals():
+        if db:
             db.close()
 
 @app.route('/get_communication_progress')
+@conditional_progress
 def get_communication_progress():
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Not logged in'}), 401
     
+    cache = progress_cache.get_cache()
+    cached = cache.lookup(session['user_id'], 'communication', g.get('progress_version'))
+    if cached is not None:
+        return jsonify(cached)
+    
+    db = None
     try:
         db = get_db_connection()
         cursor = db.cursor()
@@ -1941,18 +1462,6 @@ def get_communication_progress():
         
         student_id = result[0]
         
-        # Create the communication_progress table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS communication_progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id INTEGER,
-                user_id INTEGER,
-                problem_id TEXT NOT NULL,
-                is_completed INTEGER DEFAULT 0,
-                UNIQUE(problem_id, student_id)
-            )
-        """)
-        
         # Get individual communication exercises progress
         cursor.execute("""
             SELECT problem_id, is_completed 
@@ -1964,7 +1473,7 @@ def get_communication_progress():
         
         # Get overall communication progress
         cursor.execute("""
-            SELECT SUM(completed_questions) as completed, SUM(total_questions) as total
+            SELECT SUM(sp.completed_questions) as completed, SUM(sp.total_questions) as total
             FROM student_progress sp
             JOIN progress_topics pt ON sp.topic_id = pt.topic_id
             WHERE sp.student_id = ? AND pt.parent_topic = 'Communication'
@@ -1976,11 +1485,13 @@ def get_communication_progress():
             'total': overall[1] or 0
         }
         
-        return jsonify({
+        result = {
             'success': True,
             'progress': progress,
             'overall_progress': overall_progress
-        })
+        }
+        cache.store(session['user_id'], student_id, 'communication', result, g.get('progress_version'))
+        return jsonify(result)
         
     except Exception as e:
         print(f"Error fetching communication progress: {e}")
@@ -2675,76 +2186,57 @@ def verify_admin():
 def registered_students():
     return render_template('admin/registered_students.html')
 
-@app.route('/placement')
-def placement():
-    return render_template('admin/placement.html')
+@app.route('/placement', endpoint='placement')
+def placement_funnel_page():
+    if 'role' not in session or session['role'] != 'admin':
+        return redirect(url_for('home'))
+    db = get_db_connection()
+    try:
+        cursor = db.cursor()
+        return render_template('admin/placement.html', stages=placement.STAGES,
+                               overall=placement.funnel(cursor),
+                               by_company=placement.funnel(cursor, 'company'))
+    finally:
+        db.close()
 
 @app.route('/companies')
 def companies():
     return render_template('admin/companies.html')
 
+def cohort_page_args(default_sort='id'):
+    """Sort order and page cursor of a paginated admin student table."""
+    sort = request.args.get('sort', default_sort)
+    if sort not in progress.COHORT_SORTS:
+        sort = default_sort
+    return {
+        'sort': sort,
+        'descending': request.args.get('order') == 'desc',
+        'page_cursor': request.args.get('cursor') or None
+    }
+
 @app.route('/list_of_students')
 def list_of_students():
     try:
         db = get_db_connection()
         cursor = db.cursor()
 
-        # Fetch all students from the database
-        cursor.execute("SELECT id, name, email, department FROM students")
-        students = cursor.fetchall()
-
-        student_list = []
-
-        for student in students:
-            student_id = student['id']
-
-            # Calculate overall progress for DSA
-            cursor.execute("""
-                SELECT SUM(sp.completed_questions) as completed, SUM(pt.total_questions) as total
-                FROM student_progress sp
-                JOIN progress_topics pt ON sp.topic_id = pt.topic_id
-                WHERE sp.student_id = ? AND pt.parent_topic = 'DSA'
-            """, (student_id,))
-            dsa_progress = cursor.fetchone()
-            dsa_completed = dsa_progress['completed'] or 0
-            dsa_total = dsa_progress['total'] or 0
-            dsa_percentage = (dsa_completed / dsa_total * 100) if dsa_total > 0 else 0
-
-            # Calculate overall progress for Aptitude
-            cursor.execute("""
-                SELECT SUM(sp.completed_questions) as completed, SUM(pt.total_questions) as total
-                FROM student_progress sp
-                JOIN progress_topics pt ON sp.topic_id = pt.topic_id
-                WHERE sp.student_id = ? AND pt.parent_topic = 'Aptitude'
-            """, (student_id,))
-            apti_progress = cursor.fetchone()
-            apti_completed = apti_progress['completed'] or 0
-            apti_total = apti_progress['total'] or 0
-            apti_percentage = (apti_completed / apti_total * 100) if apti_total > 0 else 0
-
-            # Calculate overall progress for Communication
-            cursor.execute("""
-                SELECT SUM(sp.completed_questions) as completed, SUM(pt.total_questions) as total
-                FROM student_progress sp
-                JOIN progress_topics pt ON sp.topic_id = pt.topic_id
-                WHERE sp.student_id = ? AND pt.parent_topic = 'Communication'
-            """, (student_id,))
-            comm_progress = cursor.fetchone()
-            comm_completed = comm_progress['completed'] or 0
-            comm_total = comm_progress['total'] or 0
-            comm_percentage = (comm_completed / comm_total * 100) if comm_total > 0 else 0
-
-            student_list.append({
-                'id': student['id'],
-                'name': student['name'],
-                'email': student['email'],
-                'course': student['department'],
-                'dsa_progress': round(dsa_percentage, 2),
-                'apti_progress': round(apti_percentage, 2),
-                'comm_progress': round(comm_percentage, 2)
-            })
-
-        return render_template('admin/list_of_students.html', students=student_list)
+        # One page of the per-category rollup, in index order
+        page_args = cohort_page_args()
+        students, next_cursor = progress.cohort_page(cursor, **page_args)
+        student_list = [{
+            'id': student['id'],
+            'name': student['name'],
+            'email': student['email'],
+            'course': student['department'],
+            'dsa_progress': student['dsa']['percentage'],
+            'apti_progress': student['apti']['percentage'],
+            'comm_progress': student['comm']['percentage']
+        } for student in students]
+
+        return render_template('admin/list_of_students.html', students=student_list,
+                               page=dict(page_args, next_cursor=next_cursor))
+    except ValueError as e:
+        return f"Invalid page: {e}", 400
     except Exception as e:
         print(f"Error fetching students: {e}")
         return "An error occurred while fetching the student list.", 500
@@ -2758,19 +2250,34 @@ def student_status():
 
 @app.route('/company_status')
 def company_status():
-    return render_template('admin/company_status.html')
+    if 'role' not in session or session['role'] != 'admin':
+        return redirect(url_for('home'))
+    db = get_db_connection()
+    try:
+        return render_template('admin/company_status.html', by_job=placement.funnel(db.cursor(), 'job'))
+    finally:
+        db.close()
 
 @app.route('/resume')
 def resume():
     return render_template('admin/resume.html')
 
+def render_report(name):
+    if 'role' not in session or session['role'] != 'admin':
+        return redirect(url_for('home'))
+    db = get_db_connection()
+    try:
+        return render_template('admin/report.html', report=reports.get_report(db.cursor(), name))
+    finally:
+        db.close()
+
 @app.route('/placed_students')
 def placed_students():
-    return render_template('admin/placed_students.html')
+    return render_report('placement_summary')
 
 @app.route('/preparation_status')
 def preparation_status():
-    return render_template('admin/preparation_status.html')
+    return render_report('preparation_summary')
 
 @app.route('/view_resumes')
 def view_resumes():
@@ -2792,95 +2299,232 @@ def all_students_progress():
         search_query = request.args.get('search', '').strip()
         selected_branch = request.args.get('branch', '').strip()  # Get selected branch
         
-        # Fetch all branches from the database
-        cursor.execute("SELECT DISTINCT department FROM students")
-        branches = [row['department'] for row in cursor.fetchall()]
+        # Branch filter and summary cards come from the maintained facets
+        branches = facets.departments(cursor)
+        summary = facets.summary(cursor, selected_branch)
 
-        # Fetch all students with optional search and branch filter
-        if search_query:
-            cursor.execute("""
-                SELECT id, name FROM students 
-                WHERE (name LIKE ? OR id LIKE ?) AND (department = ? OR ? = '')
-            """, (f'%{search_query}%', f'%{search_query}%', selected_branch, selected_branch))
-        else:
-            cursor.execute("""
-                SELECT id, name FROM students 
-                WHERE department = ? OR ? = ''
-            """, (selected_branch, selected_branch))
-        
-        students = cursor.fetchall()
+        # Searches list the best matches first unless a column sort was picked
+        page_args = cohort_page_args('relevance' if search_query else 'id')
+        students, next_cursor = progress.cohort_page(cursor, search_query, selected_branch, **page_args)
+        progress_summary = [{
+            'student_id': student['id'],
+            'student_name': student['name'],
+            'progress': {key: student[key] for key in progress.COHORT_CATEGORIES.values()}
+        } for student in students]
         
-        progress_summary = []
+        return render_template('admin/all_students_progress.html', progress_summary=progress_summary, search_query=search_query, branches=branches, selected_branch=selected_branch,
+                               summary=summary, page=dict(page_args, next_cursor=next_cursor))
         
-        for student in students:
-            student_id = student['id']
-            student_name = student['name']
-            
-            # Get completed questions for each category
-            progress_data = {}
-            
-            # DSA Progress
-            cursor.execute("""
-                SELECT SUM(sp.completed_questions) as completed, SUM(pt.total_questions) as total
-                FROM student_progress sp
-                JOIN progress_topics pt ON sp.topic_id = pt.topic_id
-                WHERE sp.student_id = ? AND pt.parent_topic = 'DSA'
-            """, (student_id,))
-            dsa_progress = cursor.fetchone()
-            dsa_completed = dsa_progress['completed'] or 0
-            dsa_total = dsa_progress['total'] or 0
-            dsa_percentage = (dsa_completed / dsa_total * 100) if dsa_total > 0 else 0
-            progress_data['dsa'] = {
-                'completed': dsa_completed,
-                'total': dsa_total,
-                'percentage': round(dsa_percentage, 2)
-            }
+    except ValueError as e:
+        return f"Invalid page: {e}", 400
+    except Exception as e:
+        print(f"Error fetching all students' progress: {e}")
+        return "An error occurred while fetching the student progress.", 500
+    finally:
+        if 'db' in locals():
+            db.close()
 
-            # Aptitude Progress
-            cursor.execute("""
-                SELECT SUM(sp.completed_questions) as completed, SUM(pt.total_questions) as total
-                FROM student_progress sp
-                JOIN progress_topics pt ON sp.topic_id = pt.topic_id
-                WHERE sp.student_id = ? AND pt.parent_topic = 'Aptitude'
-            """, (student_id,))
-            apti_progress = cursor.fetchone()
-            apti_completed = apti_progress['completed'] or 0
-            apti_total = apti_progress['total'] or 0
-            apti_percentage = (apti_completed / apti_total * 100) if apti_total > 0 else 0
-            progress_data['apti'] = {
-                'completed': apti_completed,
-                'total': apti_total,
-                'percentage': round(apti_percentage, 2)
-            }
+@app.route('/export_cohort_progress', methods=['GET'])
+def export_cohort_progress():
+    """Cohort progress as CSV or XLSX, streamed while the query runs."""
+    if 'role' not in session or session['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+    export_format = request.args.get('format', 'csv')
+    if export_format not in cohort_export.EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': f'Unknown export format: {export_format}'}), 400
+    search_query = request.args.get('search', '').strip()
+    selected_branch = request.args.get('branch', '').strip()
+
+    def stream():
+        # Not a request-scoped connection: teardown runs before the body is sent
+        conn = database.get_connection()
+        try:
+            students = progress.iter_cohort(conn.cursor(), search_query, selected_branch)
+            yield from cohort_export.export_chunks(export_format, students)
+        finally:
+            conn.close()
 
-            # Communication Progress
-            cursor.execute("""
-                SELECT SUM(sp.completed_questions) as completed, SUM(pt.total_questions) as total
-                FROM student_progress sp
-                JOIN progress_topics pt ON sp.topic_id = pt.topic_id
-                WHERE sp.student_id = ? AND pt.parent_topic = 'Communication'
-            """, (student_id,))
-            comm_progress = cursor.fetchone()
-            comm_completed = comm_progress['completed'] or 0
-            comm_total = comm_progress['total'] or 0
-            comm_percentage = (comm_completed / comm_total * 100) if comm_total > 0 else 0
-            progress_data['comm'] = {
-                'completed': comm_completed,
-                'total': comm_total,
-                'percentage': round(comm_percentage, 2)
-            }
+    mimetype, extension = cohort_export.EXPORT_FORMATS[export_format]
+    return app.response_class(stream(), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=cohort_progress_{datetime.now():%Y%m%d}.{extension}',
+        'X-Accel-Buffering': 'no'
+    })
 
-            progress_summary.append({
-                'student_id': student_id,
-                'student_name': student_name,
-                'progress': progress_data
-            })
-        
-        return render_template('admin/all_students_progress.html', progress_summary=progress_summary, search_query=search_query, branches=branches, selected_branch=selected_branch)
-        
+@app.route('/cohort_facets', methods=['GET'])
+def cohort_facets():
+    """Student counts and mean/median progress per department and graduation year."""
+    if 'role' not in session or session['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+    db = get_db_connection()
+    try:
+        cursor = db.cursor()
+        return jsonify({
+            'success': True,
+            'overall': facets.summary(cursor),
+            'facets': facets.breakdown(cursor)
+        })
+    finally:
+        db.close()
+
+def analytics_args():
+    """category, department and graduation_year query arguments; ValueError if malformed."""
+    category = request.args.get('category', topic_catalog.CATEGORIES[0])
+    if category not in topic_catalog.CATEGORIES:
+        raise ValueError(f"Unknown category: {category}")
+    graduation_year = request.args.get('graduation_year', '').strip()
+    return category, request.args.get('department', '').strip(), int(graduation_year) if graduation_year else None
+
+@app.route('/analytics/<view>', methods=['GET'])
+def cohort_analytics_view(view):
+    """Percentiles, histograms, department distributions and topic difficulty curves of the cohort."""
+    if 'role' not in session or session['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+    try:
+        category, department, graduation_year = analytics_args()
+        bins = min(max(int(request.args.get('bins', 10)), 1), 100)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    with cohort_analytics.get_matrix() as matrix:
+        if view == 'percentiles':
+            result = cohort_analytics.percentiles(matrix, category, department, graduation_year)
+        elif view == 'histogram':
+            result = cohort_analytics.histogram(matrix, category, bins, department, graduation_year)
+        elif view == 'departments':
+            result = cohort_analytics.departments(matrix, category, graduation_year)
+        elif view == 'topics':
+            result = cohort_analytics.topics(matrix, category, department)
+        elif view == 'stats':
+            result = matrix.stats()
+        else:
+            return jsonify({'success': False, 'message': 'Unknown view'}), 404
+    return jsonify({'success': True, 'category': category, view: result})
+
+def leaderboard_args():
+    """category, limit and around query arguments; ValueError if malformed."""
+    category = request.args.get('category', leaderboard.OVERALL)
+    if category not in leaderboard.SCOPES:
+        raise ValueError(f"Unknown category: {category}")
+    limit = min(max(int(request.args.get('limit', 10)), 1), leaderboard.MAX_LIMIT)
+    around = min(max(int(request.args.get('around', 5)), 0), leaderboard.MAX_LIMIT // 2)
+    return category, limit, around
+
+@app.route('/leaderboard', methods=['GET'])
+def leaderboard_top():
+    """Top students overall or in one category, for the whole cohort or one department."""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+    try:
+        category, limit, _ = leaderboard_args()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    department = request.args.get('department', '').strip()
+    with leaderboard.get_leaderboard() as board:
+        entries = board.top(category, department, limit)
+        students = board.board(category, department).size
+    db = get_db_connection()
+    try:
+        top = leaderboard.describe(db.cursor(), entries)
+    finally:
+        db.close()
+    return jsonify({
+        'success': True,
+        'category': category,
+        'department': department or None,
+        'students': students,
+        'top': top
+    })
+
+@app.route('/leaderboard/standing', methods=['GET'])
+def leaderboard_standing():
+    """A student's rank and the students around them; admins may pass student_id."""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+    try:
+        category, _, around = leaderboard_args()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    within_department = request.args.get('within') == 'department'
+    db = get_db_connection()
+    try:
+        cursor = db.cursor()
+        if session.get('role') == 'admin' and request.args.get('student_id'):
+            student_id = request.args.get('student_id', type=int)
+        else:
+            cursor.execute("SELECT id FROM students WHERE user_id = ?", (session['user_id'],))
+            row = cursor.fetchone()
+            student_id = row[0] if row else None
+        if student_id is None:
+            return jsonify({'success': False, 'message': 'Student not found'}), 404
+        # Refreshes with this request's connection rather than a second one from the pool
+        with leaderboard.get_leaderboard(cursor) as board:
+            standing = board.standing(student_id, category, within_department, around)
+        if standing is None:
+            return jsonify({'success': False, 'message': 'Student not ranked'}), 404
+        standing['nearby'] = leaderboard.describe(cursor, standing['nearby'])
+    finally:
+        db.close()
+    standing['percentage'] = standing.pop('score') / 100
+    return jsonify({'success': True, 'category': category, 'student_id': student_id, **standing})
+
+@app.route('/reports/<name>', methods=['GET'])
+def report_snapshot(name):
+    """A precomputed admin report as JSON, with its generation time and staleness."""
+    if 'role' not in session or session['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+    if name not in reports.REPORTS:
+        return jsonify({'success': False, 'message': f'Unknown report: {name}'}), 404
+    db = get_db_connection()
+    try:
+        report = reports.get_report(db.cursor(), name)
+    finally:
+        db.close()
+    report.pop('fragment')
+    return jsonify({'success': True, **report})
+
+@app.route('/report_scheduler_stats')
+def report_scheduler_stats():
+    if 'role' not in session or session['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+    return jsonify({'success': True, **reports.get_scheduler().stats()})
+
+@app.route('/placement_funnel', methods=['GET'])
+def placement_funnel():
+    """Applied/interviewed/offered/accepted counts, overall or per company or job."""
+    if 'role' not in session or session['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+    by = request.args.get('by') or None
+    if by is not None and by not in placement.GROUPINGS:
+        return jsonify({'success': False, 'message': f'Unknown grouping: {by}'}), 400
+    company_id = request.args.get('company_id', type=int)
+    db = get_db_connection()
+    try:
+        cursor = db.cursor()
+        return jsonify({
+            'success': True,
+            'by': by,
+            'overall': placement.funnel(cursor, company_id=company_id),
+            'groups': placement.funnel(cursor, by, company_id) if by else []
+        })
+    finally:
+        db.close()
+
+@app.route('/search_students', methods=['GET'])
+def search_students():
+    """Ranked name/email/department/id matches for the admin search box."""
+    if 'role' not in session or session['role'] != 'admin':
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+    try:
+        limit = request.args.get('limit', student_search.SEARCH_LIMIT, type=int)
+        db = get_db_connection()
+        cursor = db.cursor()
+        students = student_search.search(
+            cursor, request.args.get('q', ''), request.args.get('branch', '').strip(),
+            min(max(limit, 1), 100)
+        )
+        return jsonify({'success': True, 'students': students})
     except Exception as e:
-        print(f"Error fetching all students' progress: {e}")
-        return "An error occurred while fetching the student progress.", 500
+        print(f"Error searching students: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
     finally:
         if 'db' in locals():
             db.close()
@@ -0,0 +1,818 @@
+"""Benchmarks for the SQLite hot paths.
+
+Every scenario runs against a scratch copy of placement_preparation.db, so
+the real database is never touched.
+
+    python benchmark.py storage --students 50 --seconds 10
+    python benchmark.py indexes --students 50000
+    python benchmark.py bitmaps --students 20000
+    python benchmark.py completions
+    python benchmark.py cohort --sizes 1000,10000,100000
+    python benchmark.py search --students 100000
+    python benchmark.py export --sizes 500,500000
+    python benchmark.py analytics --students 100000
+    python benchmark.py leaderboard --students 100000
+    python benchmark.py reports --students 100000
+    python benchmark.py placement --applications 300000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import bitmaps
+import change_seq_cache
+import cohort_analytics
+import cohort_export
+import database
+import leaderboard
+import migrations
+import placement
+import progress
+import reports
+import topic_catalog
+
+SOURCE_DB = 'placement_preparation.db'
+
+
+def make_cohort_db(path, students):
+    """Copy the app database to path and register `students` extra students."""
+    shutil.copyfile(SOURCE_DB, path)
+    conn = sqlite3.connect(path)
+    start = conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0] + 1
+    user_ids = list(range(start, start + students))
+    conn.executemany("""
+        INSERT INTO users (id, name, email, password, role)
+        VALUES (?, ?, ?, 'x', 'student')
+    """, [(uid, f'Bench {uid}', f'bench{uid}@example.com') for uid in user_ids])
+    conn.executemany("""
+        INSERT INTO students (user_id, name, email, department, graduation_year)
+        VALUES (?, ?, ?, ?, ?)
+    """, [
+        (uid, f'Bench {uid}', f'bench{uid}@example.com',
+         random.choice(['CSE', 'ISE', 'ECE', 'ME']), random.choice([2025, 2026, 2027]))
+        for uid in user_ids
+    ])
+    conn.commit()
+    conn.close()
+    return user_ids
+
+
+def build_large_cohort(path, students, answers_per_student, target=None):
+    """Create a migrated database holding a synthetic cohort with answers."""
+    migrations.migrate(path, target)
+    conn = sqlite3.connect(path)
+    topics = conn.execute("SELECT topic_id, total_questions FROM progress_topics").fetchall()
+    conn.executemany("""
+        INSERT INTO students (id, user_id, name, email, department, graduation_year)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        (i, 100000 + i, f'Student {i}', f'student{i}@example.com',
+         random.choice(['CSE', 'ISE', 'ECE', 'ME']), random.choice([2025, 2026, 2027]))
+        for i in range(1, students + 1)
+    ))
+
+    def answers():
+        for student_id in range(1, students + 1):
+            for topic_id, total in random.sample(topics, min(len(topics), answers_per_student // 4 or 1)):
+                for question_id in random.sample(range(1, total + 1), min(total, 4)):
+                    yield student_id, question_id, topic_id
+
+    conn.executemany("""
+        INSERT OR IGNORE INTO student_answers (student_id, question_id, topic_id, given_answer, is_correct)
+        VALUES (?, ?, ?, 'completed', 1)
+    """, answers())
+    conn.execute("""
+        INSERT INTO student_progress (student_id, topic_id, completed_questions, total_questions)
+        SELECT sa.student_id, sa.topic_id, COUNT(*), pt.total_questions
+        FROM student_answers sa JOIN progress_topics pt ON pt.topic_id = sa.topic_id
+        GROUP BY sa.student_id, sa.topic_id
+    """)
+    conn.commit()
+    conn.close()
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def simulate_mark_complete(conn, user_id, topics):
+    """Mirror the statements /mark_complete runs for one completion."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM students WHERE user_id = ?", (user_id,))
+    student_id = cursor.fetchone()[0]
+    topic_id, total_questions, parent_topic = random.choice(topics)
+    question_id = random.randint(1, total_questions)
+
+    progress.record_completion(
+        cursor, student_id, topic_id, question_id, topic_catalog.get_catalog(cursor)
+    )
+    conn.commit()
+
+
+def simulate_get_progress(conn, user_id):
+    """Run what /get_progress runs for one page view."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM students WHERE user_id = ?", (user_id,))
+    student_id = cursor.fetchone()[0]
+    progress.category_progress(cursor, student_id, topic_catalog.get_catalog(cursor))
+
+
+def run_storage_profile(profile, args, workdir):
+    path = os.path.join(workdir, f'{profile}.db')
+    user_ids = make_cohort_db(path, args.students)
+    database.apply_storage_profile(path, profile)
+    busy_timeout = args.busy_timeout or database.STORAGE_PROFILES[profile]['busy_timeout']
+    pool = database.ConnectionPool(
+        path,
+        size=args.pool_size,
+        timeout=busy_timeout / 1000,
+        acquire_timeout=60,
+        pragmas=database.connection_pragmas(profile, busy_timeout=busy_timeout)
+    )
+
+    conn = sqlite3.connect(path)
+    topics = [
+        (row[0], row[1], row[2]) for row in conn.execute(
+            "SELECT topic_id, total_questions, parent_topic FROM progress_topics WHERE parent_topic IS NOT NULL"
+        )
+    ]
+    conn.close()
+
+    reads, writes = [], []
+    lock_timeouts = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def student(user_id):
+        my_reads, my_writes, timeouts = [], [], 0
+        while time.perf_counter() < deadline:
+            is_write = random.random() < args.write_ratio
+            started = time.perf_counter()
+            db = pool.acquire()
+            try:
+                if is_write:
+                    simulate_mark_complete(db, user_id, topics)
+                else:
+                    simulate_get_progress(db, user_id)
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    raise
+                timeouts += 1
+                continue
+            finally:
+                db.close()
+            elapsed = (time.perf_counter() - started) * 1000
+            (my_writes if is_write else my_reads).append(elapsed)
+            if args.think_ms:
+                time.sleep(random.uniform(0, args.think_ms) / 1000)
+        with lock:
+            reads.extend(my_reads)
+            writes.extend(my_writes)
+            lock_timeouts[0] += timeouts
+
+    threads = [
+        threading.Thread(target=student, args=(random.choice(user_ids),))
+        for _ in range(args.students)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.close_all()
+
+    every = reads + writes
+    return {
+        'profile': profile,
+        'ops': len(every),
+        'ops_per_s': len(every) / args.seconds,
+        'p50': percentile(every, 50),
+        'p99': percentile(every, 99),
+        'read_p50': percentile(reads, 50),
+        'read_p99': percentile(reads, 99),
+        'write_p50': percentile(writes, 50),
+        'write_p99': percentile(writes, 99),
+        'lock_timeouts': lock_timeouts[0]
+    }
+
+
+def storage(args):
+    profiles = args.profile or list(database.STORAGE_PROFILES)
+    print(f"{args.students} students, {args.seconds}s per profile, "
+          f"{args.write_ratio:.0%} mark_complete / {1 - args.write_ratio:.0%} get_progress")
+    header = ("profile", "ops/s", "p50 ms", "p99 ms", "read p50", "read p99",
+              "write p50", "write p99", "lock timeouts")
+    print("{:<12} {:>8} {:>8} {:>8} {:>9} {:>9} {:>10} {:>10} {:>14}".format(*header))
+    with tempfile.TemporaryDirectory() as workdir:
+        for profile in profiles:
+            r = run_storage_profile(profile, args, workdir)
+            print("{:<12} {:>8.0f} {:>8.2f} {:>8.2f} {:>9.2f} {:>9.2f} {:>10.2f} {:>10.2f} {:>14}".format(
+                r['profile'], r['ops_per_s'], r['p50'], r['p99'], r['read_p50'], r['read_p99'],
+                r['write_p50'], r['write_p99'], r['lock_timeouts']
+            ))
+
+
+INDEXED_QUERIES = [
+    ("student lookup", "SELECT id FROM students WHERE user_id = ?",
+     lambda sid, topic, parent: (100000 + sid,)),
+    ("topic completion count", """
+        SELECT COUNT(*) FROM student_answers
+        WHERE student_id = ? AND topic_id = ? AND is_correct = 1
+    """, lambda sid, topic, parent: (sid, topic)),
+    ("category completion count", """
+        SELECT COUNT(*) FROM student_answers sa
+        JOIN progress_topics pt ON sa.topic_id = pt.topic_id
+        WHERE sa.student_id = ? AND pt.parent_topic = ?
+    """, lambda sid, topic, parent: (sid, parent)),
+    ("admin category sums", """
+        SELECT SUM(sp.completed_questions), SUM(pt.total_questions)
+        FROM student_progress sp
+        JOIN progress_topics pt ON sp.topic_id = pt.topic_id
+        WHERE sp.student_id = ? AND pt.parent_topic = ?
+    """, lambda sid, topic, parent: (sid, parent)),
+]
+
+
+def time_indexed_queries(path, students, samples):
+    conn = sqlite3.connect(path)
+    topics = conn.execute("SELECT topic_id, parent_topic FROM progress_topics").fetchall()
+    probes = [(random.randint(1, students), *random.choice(topics)) for _ in range(samples)]
+    results = {}
+    for name, query, params in INDEXED_QUERIES:
+        timings = []
+        for probe in probes:
+            started = time.perf_counter()
+            conn.execute(query, params(*probe)).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[name] = (sum(timings) / len(timings), percentile(timings, 99))
+    conn.close()
+    return results
+
+
+def indexes(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'cohort.db')
+        started = time.perf_counter()
+        build_large_cohort(path, args.students, args.answers, target=4)
+        print(f"Built {args.students} students in {time.perf_counter() - started:.1f}s")
+        before = time_indexed_queries(path, args.students, args.samples)
+        started = time.perf_counter()
+        migrations.migrate(path)
+        print(f"Created indexes in {time.perf_counter() - started:.1f}s")
+        after = time_indexed_queries(path, args.students, args.samples)
+
+    print("{:<28} {:>12} {:>12} {:>12} {:>12}".format("query", "before avg", "before p99", "after avg", "after p99"))
+    for name, _, _ in INDEXED_QUERIES:
+        print("{:<28} {:>10.3f}ms {:>10.3f}ms {:>10.3f}ms {:>10.3f}ms".format(name, *before[name], *after[name]))
+
+
+def table_bytes(conn, names):
+    placeholders = ', '.join('?' * len(names))
+    return conn.execute(f"SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN ({placeholders})",
+                        names).fetchone()[0]
+
+
+def completion_bitmaps(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'cohort.db')
+        started = time.perf_counter()
+        build_large_cohort(path, args.students, args.answers)
+        conn = sqlite3.connect(path)
+        bitmaps.rebuild(conn.cursor())
+        conn.commit()
+        conn.execute("VACUUM")
+        print(f"Built {args.students} students in {time.perf_counter() - started:.1f}s")
+
+        answer_indexes = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'student_answers'"
+        )]
+        rows_size = table_bytes(conn, ['student_answers', *answer_indexes])
+        bitmap_size = table_bytes(conn, ['completion_bitmaps'])
+        print(f"student_answers + indexes: {rows_size / 1024:>10.0f} KiB")
+        print(f"completion_bitmaps:        {bitmap_size / 1024:>10.0f} KiB")
+
+        probes = conn.execute(f"""
+            SELECT student_id, topic_id FROM completion_bitmaps
+            ORDER BY RANDOM() LIMIT {int(args.samples)}
+        """).fetchall()
+        cursor = conn.cursor()
+
+        def rows_layout(student_id, topic_id):
+            cursor.execute("""
+                SELECT question_id FROM student_answers
+                WHERE student_id = ? AND topic_id = ? AND is_correct = 1
+            """, (student_id, topic_id))
+            done = {row[0] for row in cursor.fetchall()}
+            return len(done), 3 in done
+
+        def bitmap_layout(student_id, topic_id):
+            bits = bitmaps.load_bitmap(cursor, student_id, topic_id)
+            return bitmaps.popcount(bits), bitmaps.has_bit(bits, 3)
+
+        print("{:<28} {:>10} {:>10}".format("topic completion state", "avg", "p99"))
+        for name, read in (("row per answer", rows_layout), ("bitmap", bitmap_layout)):
+            timings = []
+            for probe in probes:
+                started = time.perf_counter()
+                read(*probe)
+                timings.append((time.perf_counter() - started) * 1000)
+            print("{:<32} {:>8.3f}ms {:>8.3f}ms".format(
+                name, sum(timings) / len(timings), percentile(timings, 99)
+            ))
+        conn.close()
+
+
+def legacy_completion(cursor, student_id, topic_id, question_id, catalog):
+    """The check-then-insert and recount path mark_complete used to run."""
+    cursor.execute("""
+        SELECT * FROM student_answers
+        WHERE student_id = ? AND topic_id = ? AND question_id = ?
+    """, (student_id, topic_id, question_id))
+    if cursor.fetchone():
+        return
+    cursor.execute("""
+        INSERT INTO student_answers (student_id, question_id, topic_id, given_answer, is_correct)
+        VALUES (?, ?, ?, 'completed', 1)
+    """, (student_id, question_id, topic_id))
+    cursor.execute("""
+        SELECT COUNT(*) FROM student_answers
+        WHERE student_id = ? AND topic_id = ? AND is_correct = 1
+    """, (student_id, topic_id))
+    completed = cursor.fetchone()[0]
+    total = catalog.total_for(topic_id) or 10
+    cursor.execute("""
+        INSERT OR REPLACE INTO student_progress
+        (student_id, topic_id, completed_questions, total_questions, is_completed)
+        VALUES (?, ?, ?, ?, ?)
+    """, (student_id, topic_id, completed, total, 1 if completed >= total else 0))
+    cursor.execute("""
+        SELECT COUNT(*) FROM student_answers sa
+        JOIN progress_topics pt ON sa.topic_id = pt.topic_id
+        WHERE sa.student_id = ? AND pt.parent_topic = ?
+    """, (student_id, catalog.parent_of(topic_id)))
+
+
+def legacy_answer_insert(cursor, student_id, topic_id, question_id, catalog):
+    cursor.execute("""
+        SELECT * FROM student_answers
+        WHERE student_id = ? AND topic_id = ? AND question_id = ?
+    """, (student_id, topic_id, question_id))
+    if cursor.fetchone() is None:
+        cursor.execute("""
+            INSERT INTO student_answers (student_id, question_id, topic_id, given_answer, is_correct)
+            VALUES (?, ?, ?, 'completed', 1)
+        """, (student_id, question_id, topic_id))
+
+
+def upsert_answer_insert(cursor, student_id, topic_id, question_id, catalog):
+    cursor.execute("""
+        INSERT INTO student_answers (student_id, question_id, topic_id, given_answer, is_correct)
+        VALUES (?, ?, ?, 'completed', 1)
+        ON CONFLICT(student_id, question_id, topic_id) DO NOTHING
+        RETURNING answer_id
+    """, (student_id, question_id, topic_id))
+    cursor.fetchone()
+
+
+def completions(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'cohort.db')
+        build_large_cohort(path, args.students, args.answers)
+        database.apply_storage_profile(path, 'wal')
+        conn = sqlite3.connect(path)
+        for pragma in database.connection_pragmas('wal'):
+            conn.execute(f"PRAGMA {pragma}")
+        catalog = topic_catalog.load_catalog(conn.cursor())
+        topics = list(catalog.topics)
+
+        # Half of the clicks repeat a completion the student already has
+        clicks = []
+        for _ in range(args.samples):
+            click = (random.randint(1, args.students), random.choice(topics), random.randint(1, 10))
+            clicks += [click, click] if random.random() < 0.5 else [click]
+
+        print("{:<32} {:>10} {:>10}".format("completion path", "avg", "p99"))
+        for name, record in (
+            ("answer: select, then insert", legacy_answer_insert),
+            ("answer: insert ... returning", upsert_answer_insert),
+            ("full: check, insert, recount", legacy_completion),
+            ("full: progress.record_completion", progress.record_completion),
+        ):
+            conn.execute("DELETE FROM student_answers WHERE given_answer = 'completed' AND question_id <= 10")
+            conn.commit()
+            timings = []
+            for student_id, topic_id, question_id in clicks:
+                started = time.perf_counter()
+                record(conn.cursor(), student_id, topic_id, question_id, catalog)
+                conn.commit()
+                timings.append((time.perf_counter() - started) * 1000)
+            print("{:<32} {:>8.3f}ms {:>8.3f}ms".format(
+                name, sum(timings) / len(timings), percentile(timings, 99)
+            ))
+        conn.close()
+
+
+def legacy_cohort_progress(cursor):
+    """The per-student loop all_students_progress used to run: 3N+1 queries."""
+    cursor.execute("SELECT id, name FROM students")
+    result = []
+    for student_id, name in cursor.fetchall():
+        progress_data = {}
+        for key, category in (('dsa', 'DSA'), ('apti', 'Aptitude'), ('comm', 'Communication')):
+            cursor.execute("""
+                SELECT SUM(sp.completed_questions), SUM(pt.total_questions)
+                FROM student_progress sp
+                JOIN progress_topics pt ON sp.topic_id = pt.topic_id
+                WHERE sp.student_id = ? AND pt.parent_topic = ?
+            """, (student_id, category))
+            completed, total = cursor.fetchone()
+            completed, total = completed or 0, total or 0
+            progress_data[key] = round(completed / total * 100, 2) if total else 0
+        result.append((student_id, name, progress_data))
+    return result
+
+
+def time_cohort_pages(cursor, sort):
+    """(first page ms, last page ms) when paging through every student."""
+    timings, page_cursor = [], None
+    while True:
+        started = time.perf_counter()
+        _, page_cursor = progress.cohort_page(cursor, sort=sort, page_cursor=page_cursor)
+        timings.append((time.perf_counter() - started) * 1000)
+        if page_cursor is None:
+            return timings[0], timings[-1]
+
+
+def cohort(args):
+    print("{:>8} {:>14} {:>14} {:>14} {:>14} {:>10}".format(
+        "students", "per-student", "rollup", "page 1", "last page", "build"))
+    for students in (int(size) for size in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'cohort.db')
+            started = time.perf_counter()
+            build_large_cohort(path, students, args.answers)
+            built = time.perf_counter() - started
+            conn = sqlite3.connect(path)
+            timings = {}
+            for name, run in (('legacy', legacy_cohort_progress), ('rollup', progress.cohort_progress)):
+                samples = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    run(conn.cursor())
+                    samples.append((time.perf_counter() - started) * 1000)
+                timings[name] = min(samples)
+            first_page, last_page = time_cohort_pages(conn.cursor(), args.sort)
+            conn.close()
+        print("{:>8} {:>12.1f}ms {:>12.1f}ms {:>12.2f}ms {:>12.2f}ms {:>9.1f}s".format(
+            students, timings['legacy'], timings['rollup'], first_page, last_page, built))
+
+SEARCHES = [
+    ('one student', 'student4242', ''),
+    ('name and id prefix', 'Student 424', ''),
+    ('prefix with branch', '42', 'CSE'),
+    ('broad prefix', 'stu', ''),
+    ('no match', 'zzz', ''),
+]
+
+
+def search(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'cohort.db')
+        build_large_cohort(path, args.students, args.answers)
+        conn = sqlite3.connect(path)
+        print("{:<22} {:>12} {:>12}".format("search", "LIKE", "FTS5 page"))
+        for name, text, department in SEARCHES:
+            timings = {}
+            for path_name, run in (
+                ('like', lambda: conn.execute("""
+                    SELECT id, name FROM students
+                    WHERE (name LIKE ? OR id LIKE ?) AND (department = ? OR ? = '')
+                """, (f'%{text}%', f'%{text}%', department, department)).fetchall()),
+                ('fts', lambda: progress.cohort_page(conn.cursor(), text, department, sort='relevance')),
+            ):
+                samples = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    run()
+                    samples.append((time.perf_counter() - started) * 1000)
+                timings[path_name] = min(samples)
+            print("{:<22} {:>10.2f}ms {:>10.2f}ms".format(name, timings['like'], timings['fts']))
+        conn.close()
+
+
+def export(args):
+    print("{:>8} {:>6} {:>12} {:>10} {:>12} {:>12}".format(
+        "students", "format", "first byte", "total", "bytes", "peak memory"))
+    for students in (int(size) for size in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, 'cohort.db')
+            build_large_cohort(path, students, args.answers)
+            conn = sqlite3.connect(path)
+            for export_format in cohort_export.EXPORT_FORMATS:
+                started = time.perf_counter()
+                chunks = cohort_export.export_chunks(export_format, progress.iter_cohort(conn.cursor()))
+                size = len(next(chunks))
+                first_byte = (time.perf_counter() - started) * 1000
+                for chunk in chunks:
+                    size += len(chunk)
+                total = time.perf_counter() - started
+                # Traced separately: tracemalloc slows every allocation down
+                tracemalloc.start()
+                for _ in cohort_export.export_chunks(export_format, progress.iter_cohort(conn.cursor())):
+                    pass
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print("{:>8} {:>6} {:>10.2f}ms {:>9.2f}s {:>12} {:>10.0f}KB".format(
+                    students, export_format, first_byte, total, size, peak / 1024))
+            conn.close()
+
+
+def sql_percentiles(cursor, category):
+    """The pre-matrix way: read every percentage sorted and pick the ranks in Python."""
+    cursor.execute("""
+        SELECT percentage FROM student_category_progress WHERE category = ? ORDER BY percentage
+    """, (category,))
+    values = [row[0] for row in cursor.fetchall()]
+    return {p: values[min(len(values) - 1, len(values) * p // 100)] for p in cohort_analytics.PERCENTILES}
+
+
+def analytics(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'cohort.db')
+        build_large_cohort(path, args.students, args.answers)
+        conn = sqlite3.connect(path, isolation_level=None)
+        cursor = conn.cursor()
+        matrix = cohort_analytics.CohortMatrix()
+
+        def timed(run):
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                run()
+                samples.append((time.perf_counter() - started) * 1000)
+            return min(samples)
+
+        started = time.perf_counter()
+        matrix.refresh(cursor, now=0)
+        print(f"full load: {(time.perf_counter() - started) * 1000:.0f}ms, "
+              f"{(matrix.completed.nbytes + matrix.started.nbytes) / 1024 / 1024:.1f}MB")
+
+        topics = [row[0] for row in conn.execute("SELECT topic_id FROM progress_topics")]
+        conn.execute("BEGIN")
+        for student_id in random.sample(range(1, args.students + 1), min(args.changes, args.students)):
+            conn.execute("""
+                INSERT INTO student_progress (student_id, topic_id, completed_questions, total_questions)
+                VALUES (?, ?, 1, 10)
+                ON CONFLICT(student_id, topic_id) DO UPDATE SET completed_questions = completed_questions + 1
+            """, (student_id, random.choice(topics)))
+        conn.execute("COMMIT")
+        started = time.perf_counter()
+        matrix.refresh(cursor, now=change_seq_cache.REFRESH_INTERVAL)
+        print(f"incremental refresh after {args.changes} changed students: "
+              f"{(time.perf_counter() - started) * 1000:.1f}ms")
+
+        print("{:<28} {:>10}".format("view", "latency"))
+        for name, run in (
+            ('percentiles, SQL sort', lambda: sql_percentiles(cursor, 'DSA')),
+            ('percentiles', lambda: (matrix._percentages.clear(),
+                                     cohort_analytics.percentiles(matrix, 'DSA'))),
+            ('percentiles, cached', lambda: cohort_analytics.percentiles(matrix, 'DSA')),
+            ('percentiles, one department', lambda: cohort_analytics.percentiles(matrix, 'DSA', 'CSE', 2026)),
+            ('histogram', lambda: cohort_analytics.histogram(matrix, 'DSA', 20)),
+            ('departments', lambda: cohort_analytics.departments(matrix, 'DSA')),
+            ('topic curves', lambda: cohort_analytics.topics(matrix, 'DSA')),
+        ):
+            print("{:<28} {:>8.2f}ms".format(name, timed(run)))
+        conn.close()
+
+
+def sql_rank(cursor, student_id, category):
+    """The pre-leaderboard way: sort the cohort's percentages and find the student."""
+    cursor.execute("""
+        SELECT student_id, percentage FROM student_category_progress WHERE category = ?
+        ORDER BY percentage DESC, student_id
+    """, (category,))
+    rows = cursor.fetchall()
+    scores = [percentage for _, percentage in rows]
+    score = next(percentage for sid, percentage in rows if sid == student_id)
+    return scores.index(score) + 1
+
+
+def leaderboards(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'cohort.db')
+        build_large_cohort(path, args.students, args.answers)
+        conn = sqlite3.connect(path, isolation_level=None)
+        cursor = conn.cursor()
+        catalog = topic_catalog.load_catalog(cursor)
+        board = leaderboard.Leaderboard()
+        started = time.perf_counter()
+        board.refresh(cursor, now=0)
+        print(f"build: {(time.perf_counter() - started) * 1000:.0f}ms for {len(board.boards)} boards")
+
+        students = random.sample(range(1, args.students + 1), args.samples)
+        # Worst case for ties: the whole cohort on one score
+        tied = leaderboard.Board((student_id, 0) for student_id in range(1, args.students + 1))
+        print("{:<28} {:>12}".format("operation", "mean"))
+        for name, run in (
+            ('rank, SQL sort', lambda student_id: sql_rank(cursor, student_id, 'DSA')),
+            ('rank', lambda student_id: board.standing(student_id, 'DSA')),
+            ('rank in department', lambda student_id: board.standing(student_id, 'DSA', True)),
+            ('around, 5 either side', lambda student_id: board.standing(student_id, leaderboard.OVERALL, around=5)),
+            ('top 10', lambda student_id: board.top(leaderboard.OVERALL, limit=10)),
+            ('completion + record', lambda student_id: (
+                progress.record_completion(cursor, student_id, 2, random.randint(1, 12), catalog),
+                board.record(cursor, student_id))),
+            ('record only', lambda student_id: board.record(cursor, student_id)),
+            ('move within a full tie', lambda student_id: (tied.remove(student_id, 0), tied.insert(student_id, 0))),
+        ):
+            # The SQL sort takes a while per call; a few samples do
+            sample = students[:5] if 'SQL' in name else students
+            started = time.perf_counter()
+            for student_id in sample:
+                run(student_id)
+            print("{:<28} {:>10.3f}ms".format(name, (time.perf_counter() - started) * 1000 / len(sample)))
+        conn.close()
+
+
+def report_snapshots(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'cohort.db')
+        build_large_cohort(path, args.students, args.answers)
+        conn = sqlite3.connect(path)
+        cursor = conn.cursor()
+        print("{:<22} {:>14} {:>14} {:>10}".format("report", "built inline", "from snapshot", "fragment"))
+        for name in reports.REPORTS:
+            builds, reads = [], []
+            for _ in range(args.repeat):
+                data, fragment, duration_ms = reports.build(cursor, name)
+                builds.append(duration_ms)
+            cursor.execute("""
+                INSERT OR REPLACE INTO report_snapshots (name, payload, fragment, generated_at, duration_ms)
+                VALUES (?, ?, ?, ?, ?)
+            """, (name, json.dumps(data), fragment, time.time(), duration_ms))
+            conn.commit()
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                snapshot = reports.read_snapshot(cursor, name)
+                reports.is_due(name, snapshot, reports.completions(cursor), time.time())
+                reads.append((time.perf_counter() - started) * 1000)
+            print("{:<22} {:>12.1f}ms {:>12.2f}ms {:>8}KB".format(name, min(builds), min(reads), len(fragment) // 1024))
+        conn.close()
+
+
+def joined_funnel(cursor):
+    """The funnel per company from the raw tables, one probe per application."""
+    cursor.execute("""
+        SELECT j.company_id, COUNT(*),
+               SUM(EXISTS (SELECT 1 FROM interviews i WHERE i.application_id = a.application_id
+                                                      AND i.interview_status IS NOT 'Cancelled')),
+               SUM(EXISTS (SELECT 1 FROM job_offers jo WHERE jo.job_id = a.job_id AND jo.usn = a.usn)),
+               SUM(EXISTS (SELECT 1 FROM job_offers jo WHERE jo.job_id = a.job_id AND jo.usn = a.usn
+                                                       AND jo.offer_status = 'Accepted'))
+        FROM applications a
+        JOIN jobs j ON j.job_id = a.job_id
+        GROUP BY j.company_id
+    """)
+    return cursor.fetchall()
+
+
+def placement_funnel(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'cohort.db')
+        build_large_cohort(path, args.students, 4)
+        conn = sqlite3.connect(path)
+        cursor = conn.cursor()
+        cursor.executemany("INSERT INTO companies (company_id, name, email, phone, password) VALUES (?, ?, ?, ?, 'x')",
+                           ((i, f'Company {i}', f'c{i}@example.com', str(i)) for i in range(1, args.companies + 1)))
+        jobs = args.companies * 5
+        cursor.executemany("INSERT INTO jobs (job_id, company_id, job_title) VALUES (?, ?, ?)",
+                           ((i, (i - 1) // 5 + 1, f'Job {i}') for i in range(1, jobs + 1)))
+
+        started = time.perf_counter()
+        applications = [(random.randint(1, jobs), random.randint(1, args.students)) for _ in range(args.applications)]
+        cursor.executemany("INSERT INTO applications (job_id, usn) VALUES (?, ?)",
+                           ((job_id, f'USN{student_id}') for job_id, student_id in applications))
+        cursor.executemany("INSERT INTO interviews (application_id, interview_status) VALUES (?, ?)", (
+            (application_id, random.choice(['Scheduled', 'Completed', 'Cancelled']))
+            for application_id in random.sample(range(1, args.applications + 1), args.applications // 3)
+        ))
+        cursor.executemany("INSERT INTO job_offers (job_id, usn, offer_status) VALUES (?, ?, ?)", (
+            (job_id, f'USN{student_id}', random.choice(['Pending', 'Accepted', 'Declined']))
+            for job_id, student_id in random.sample(applications, args.applications // 10)
+        ))
+        conn.commit()
+        load = time.perf_counter() - started
+        print(f"loaded {args.applications} applications through the triggers in {load:.1f}s "
+              f"({load * 1e6 / args.applications:.0f}us each with its interviews and offers)")
+
+        print("{:<28} {:>12}".format("query", "latency"))
+        for name, run in (
+            ('per company, joined', lambda: joined_funnel(cursor)),
+            ('per company, rollup', lambda: placement.funnel(cursor, 'company')),
+            ('per job, rollup', lambda: placement.funnel(cursor, 'job')),
+            ('one company by job, rollup', lambda: placement.funnel(cursor, 'job', company_id=1)),
+            ('overall, rollup', lambda: placement.funnel(cursor)),
+        ):
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                run()
+                samples.append((time.perf_counter() - started) * 1000)
+            print("{:<28} {:>10.2f}ms".format(name, min(samples)))
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('storage', help='concurrent mark_complete/get_progress per storage profile')
+    p.add_argument('--students', type=int, default=50, help='concurrent simulated students')
+    p.add_argument('--seconds', type=float, default=10, help='run time per profile')
+    p.add_argument('--write-ratio', type=float, default=0.3, help='share of requests that are mark_complete')
+    p.add_argument('--think-ms', type=float, default=0, help='max random pause between requests')
+    p.add_argument('--pool-size', type=int, default=8, help='connections per pool')
+    p.add_argument('--busy-timeout', type=int, help='override the profile busy_timeout (ms)')
+    p.add_argument('--profile', action='append', choices=list(database.STORAGE_PROFILES),
+                   help='profile to run (repeatable, default: all)')
+    p.set_defaults(func=storage)
+
+    p = commands.add_parser('indexes', help='hot query timings before/after the index migration')
+    p.add_argument('--students', type=int, default=50000, help='students in the synthetic cohort')
+    p.add_argument('--answers', type=int, default=20, help='answers per student')
+    p.add_argument('--samples', type=int, default=200, help='probes per query')
+    p.set_defaults(func=indexes)
+
+    p = commands.add_parser('bitmaps', help='storage and read latency, answer rows vs completion bitmaps')
+    p.add_argument('--students', type=int, default=20000, help='students in the synthetic cohort')
+    p.add_argument('--answers', type=int, default=40, help='answers per student')
+    p.add_argument('--samples', type=int, default=500, help='(student, topic) probes')
+    p.set_defaults(func=completion_bitmaps)
+
+    p = commands.add_parser('completions', help='mark_complete write path, old check-then-insert vs upsert')
+    p.add_argument('--students', type=int, default=2000, help='students in the synthetic cohort')
+    p.add_argument('--answers', type=int, default=40, help='answers per student')
+    p.add_argument('--samples', type=int, default=2000, help='distinct clicks per path')
+    p.set_defaults(func=completions)
+
+    p = commands.add_parser('cohort', help='admin cohort pages, per-student queries vs the category rollup')
+    p.add_argument('--sizes', default='1000,10000,100000', help='comma-separated cohort sizes')
+    p.add_argument('--answers', type=int, default=20, help='answers per student')
+    p.add_argument('--repeat', type=int, default=3, help='runs per path; the fastest is reported')
+    p.add_argument('--sort', default='dsa', choices=list(progress.COHORT_SORTS), help='order of the paged walk')
+    p.set_defaults(func=cohort)
+
+    p = commands.add_parser('search', help='admin student search, LIKE scan vs the FTS5 index')
+    p.add_argument('--students', type=int, default=100000, help='students in the synthetic cohort')
+    p.add_argument('--answers', type=int, default=8, help='answers per student')
+    p.add_argument('--repeat', type=int, default=5, help='runs per search; the fastest is reported')
+    p.set_defaults(func=search)
+
+    p = commands.add_parser('export', help='streamed CSV/XLSX cohort export, latency and peak memory')
+    p.add_argument('--sizes', default='500,50000,500000', help='comma-separated cohort sizes')
+    p.add_argument('--answers', type=int, default=4, help='answers per student')
+    p.set_defaults(func=export)
+
+    p = commands.add_parser('analytics', help='cohort analytics matrix: load, incremental refresh and view latency')
+    p.add_argument('--students', type=int, default=100000, help='students in the synthetic cohort')
+    p.add_argument('--answers', type=int, default=20, help='answers per student')
+    p.add_argument('--changes', type=int, default=1000, help='students whose progress changes before the refresh')
+    p.add_argument('--repeat', type=int, default=5, help='runs per view; the fastest is reported')
+    p.set_defaults(func=analytics)
+
+    p = commands.add_parser('leaderboard', help='ranks from a cohort sort vs the in-memory boards')
+    p.add_argument('--students', type=int, default=100000, help='students in the synthetic cohort')
+    p.add_argument('--answers', type=int, default=20, help='answers per student')
+    p.add_argument('--samples', type=int, default=1000, help='students probed per operation')
+    p.set_defaults(func=leaderboards)
+
+    p = commands.add_parser('reports', help='admin reports built in the request vs read from report_snapshots')
+    p.add_argument('--students', type=int, default=100000, help='students in the synthetic cohort')
+    p.add_argument('--answers', type=int, default=20, help='answers per student')
+    p.add_argument('--repeat', type=int, default=3, help='runs per path; the fastest is reported')
+    p.set_defaults(func=report_snapshots)
+
+    p = commands.add_parser('placement', help='placement funnel from joined raw tables vs the placement_funnel rollup')
+    p.add_argument('--students', type=int, default=20000, help='students in the synthetic cohort')
+    p.add_argument('--applications', type=int, default=300000, help='applications across all jobs')
+    p.add_argument('--companies', type=int, default=200, help='companies, with five jobs each')
+    p.add_argument('--repeat', type=int, default=3, help='runs per query; the fastest is reported')
+    p.set_defaults(func=placement_funnel)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Per-student, per-topic completion bitmaps.
+
+completion_bitmaps holds one BLOB per (student, topic): bit i of the blob is
+set when question i of that topic is done (byte i // 8, bit i % 8). A topic
+page reads its whole completion state with one primary-key lookup,
+membership is a byte test and the completed count is a popcount.
+
+student_answers stays the record of truth; progress.record_completion and
+record_completions set the bits in the same transaction,
+progress.remove_completion clears them, and rebuild() recomputes them from
+student_answers.
+"""
+
+# Question ids at or above this are kept in student_answers only
+MAX_BITS = 8192
+
+
+def set_bits(bits, indexes):
+    """Return bits with every index in indexes set."""
+    indexes = [i for i in indexes if 0 <= i < MAX_BITS]
+    if not indexes:
+        return bytes(bits or b'')
+    buf = bytearray(bits or b'')
+    needed = max(indexes) // 8 + 1
+    if len(buf) < needed:
+        buf.extend(bytes(needed - len(buf)))
+    for i in indexes:
+        buf[i // 8] |= 1 << (i % 8)
+    return bytes(buf)
+
+
+def clear_bits(bits, indexes):
+    """Return bits with every index in indexes cleared."""
+    buf = bytearray(bits or b'')
+    for i in indexes:
+        if 0 <= i < len(buf) * 8:
+            buf[i // 8] &= ~(1 << (i % 8))
+    return bytes(buf)
+
+
+def has_bit(bits, index):
+    if not bits or index < 0 or index // 8 >= len(bits):
+        return False
+    return bool(bits[index // 8] & (1 << (index % 8)))
+
+
+def popcount(bits):
+    return int.from_bytes(bits or b'', 'little').bit_count()
+
+
+def members(bits):
+    """Sorted indexes of the set bits."""
+    value = int.from_bytes(bits or b'', 'little')
+    result = []
+    while value:
+        low = value & -value
+        result.append(low.bit_length() - 1)
+        value ^= low
+    return result
+
+
+def load_bitmap(cursor, student_id, topic_id):
+    cursor.execute("""
+        SELECT bits FROM completion_bitmaps WHERE student_id = ? AND topic_id = ?
+    """, (student_id, topic_id))
+    row = cursor.fetchone()
+    return row[0] if row else b''
+
+
+def load_bitmaps(cursor, student_id):
+    """Map topic_id -> bitmap for every topic the student has started."""
+    cursor.execute("SELECT topic_id, bits FROM completion_bitmaps WHERE student_id = ?", (student_id,))
+    return dict(cursor.fetchall())
+
+
+def mark(cursor, student_id, topic_id, question_ids):
+    """Set the bits for question_ids in one student's topic bitmap."""
+    bits = set_bits(load_bitmap(cursor, student_id, topic_id), question_ids)
+    cursor.execute("""
+        INSERT INTO completion_bitmaps (student_id, topic_id, bits) VALUES (?, ?, ?)
+        ON CONFLICT(student_id, topic_id) DO UPDATE SET bits = excluded.bits
+    """, (student_id, topic_id, bits))
+
+
+def unmark(cursor, student_id, topic_id, question_ids):
+    """Clear the bits for question_ids in one student's topic bitmap."""
+    cursor.execute("""
+        UPDATE completion_bitmaps SET bits = ? WHERE student_id = ? AND topic_id = ?
+    """, (clear_bits(load_bitmap(cursor, student_id, topic_id), question_ids), student_id, topic_id))
+
+
+def rebuild(cursor, student_id=None):
+    """Recompute bitmaps (all, or one student's) from student_answers."""
+    student_filter = "AND student_id = ?" if student_id is not None else ""
+    params = (student_id,) if student_id is not None else ()
+    cursor.execute(f"DELETE FROM completion_bitmaps WHERE 1 = 1 {student_filter}", params)
+    cursor.execute(f"""
+        SELECT student_id, topic_id, question_id FROM student_answers
+        WHERE is_correct = 1 {student_filter}
+        ORDER BY student_id, topic_id
+    """, params)
+    grouped = {}
+    for sid, topic_id, question_id in cursor.fetchall():
+        grouped.setdefault((sid, topic_id), []).append(question_id)
+    cursor.executemany("""
+        INSERT INTO completion_bitmaps (student_id, topic_id, bits) VALUES (?, ?, ?)
+    """, [(sid, topic_id, set_bits(b'', ids)) for (sid, topic_id), ids in grouped.items()])
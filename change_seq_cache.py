@@ -0,0 +1,142 @@
+"""Per-process views of the progress tables kept current through change_seq.
+
+cohort_analytics and leaderboard each hold an in-memory structure built
+from the progress tables in every worker process. ChangeSeqCache is their
+shared refresh logic: at most every REFRESH_INTERVAL seconds, one read
+transaction applies only what changed, meaning students registered since
+the last refresh (ids above the highest one held) and students whose
+progress_versions.change_seq is newer. A catalog edit, or
+FULL_RELOAD_INTERVAL passing, reloads everything instead, which also picks
+up profile edits and deleted students.
+
+Subclasses implement load(cursor) and update(cursor, since). ProcessLocal
+hands each worker its own instance, locked and refreshed for the duration
+of a with block.
+"""
+import os
+import threading
+import time
+
+import database
+import topic_catalog
+
+REFRESH_INTERVAL = 5
+FULL_RELOAD_INTERVAL = 600
+
+# Students to re-read in update(): progress changed after :since, or
+# registered after :last_student_id
+CHANGED_STUDENTS = """
+    SELECT student_id FROM progress_versions WHERE change_seq > :since
+    UNION
+    SELECT id FROM students WHERE id > :last_student_id
+"""
+
+
+class ChangeSeqCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked_at = None
+        self.loaded_at = None
+        self.catalog_version = None
+        self.change_seq = 0
+        self.full_loads = 0
+        self.incremental_refreshes = 0
+
+    def load(self, cursor):
+        """Rebuild everything from the database."""
+        raise NotImplementedError
+
+    def update(self, cursor, since):
+        """Apply the changes of the students in CHANGED_STUDENTS."""
+        raise NotImplementedError
+
+    def due(self, now=None):
+        now = time.monotonic() if now is None else now
+        return self.checked_at is None or now - self.checked_at >= REFRESH_INTERVAL
+
+    def refresh(self, cursor, now=None):
+        """Bring the cache up to date if REFRESH_INTERVAL has passed; call under self.lock."""
+        now = time.monotonic() if now is None else now
+        if not self.due(now):
+            return
+        # One read transaction, so change_seq and the rows read agree
+        cursor.execute("BEGIN")
+        try:
+            catalog_version = topic_catalog.catalog_version(cursor)
+            cursor.execute("SELECT COALESCE(MAX(change_seq), 0) FROM progress_versions")
+            change_seq = cursor.fetchone()[0]
+            if (catalog_version != self.catalog_version or self.loaded_at is None
+                    or now - self.loaded_at >= FULL_RELOAD_INTERVAL):
+                self.load(cursor)
+                self.catalog_version = catalog_version
+                self.loaded_at = now
+                self.full_loads += 1
+            else:
+                self.update(cursor, self.change_seq)
+                self.incremental_refreshes += 1
+            self.change_seq = change_seq
+        finally:
+            cursor.execute("COMMIT")
+        self.checked_at = now
+
+    def stats(self):
+        return {
+            'pid': os.getpid(),
+            'change_seq': self.change_seq,
+            'full_loads': self.full_loads,
+            'incremental_refreshes': self.incremental_refreshes
+        }
+
+
+class ProcessLocal:
+    """One cache instance per worker process, built by factory on first use."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def instance(self):
+        pid = os.getpid()
+        cache = self._instances.get(pid)
+        if cache is None:
+            with self._lock:
+                cache = self._instances.setdefault(pid, self.factory())
+        return cache
+
+    def refreshed(self, cursor=None):
+        """This process's cache, refreshed and locked; use as a context manager.
+
+        A request that already holds a connection passes its cursor, so the
+        refresh does not take a second one from the pool.
+        """
+        return _Refreshed(self.instance(), cursor)
+
+
+class _Refreshed:
+    def __init__(self, cache, cursor=None):
+        self.cache = cache
+        self.cursor = cursor
+
+    def __enter__(self):
+        conn = None
+        if self.cursor is None and self.cache.due():
+            # Taken before the lock, so whoever holds the lock never waits on
+            # the pool while requests holding connections wait on the lock
+            conn = database.get_connection()
+        try:
+            self.cache.lock.acquire()
+            try:
+                cursor = self.cursor if conn is None else conn.cursor()
+                if cursor is not None:
+                    self.cache.refresh(cursor)
+            except Exception:
+                self.cache.lock.release()
+                raise
+        finally:
+            if conn is not None:
+                conn.close()
+        return self.cache
+
+    def __exit__(self, *exc_info):
+        self.cache.lock.release()
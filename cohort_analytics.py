@@ -0,0 +1,216 @@
+"""Cohort statistics over a dense student x topic matrix (NumPy).
+
+Each worker process keeps student_progress as two arrays with one row per
+student and one column per topic: completed questions (uint16) and
+whether the student has started the topic. Percentiles, histograms and
+per-department or per-topic distributions are then whole-array
+operations, a few milliseconds for 100k students.
+
+The matrix is refreshed like every change_seq_cache view: at most every
+REFRESH_INTERVAL seconds, and only with what changed since the last
+refresh.
+
+Category percentages use the same definition as student_category_progress:
+completed questions over the question totals of the topics started.
+"""
+import numpy as np
+
+from change_seq_cache import CHANGED_STUDENTS, ChangeSeqCache, ProcessLocal
+
+PERCENTILES = (10, 25, 50, 75, 90)
+# Completion ratios a topic difficulty curve reports the share of starters reaching
+CURVE_POINTS = (0.25, 0.5, 0.75, 1.0)
+
+
+class CohortMatrix(ChangeSeqCache):
+    def __init__(self):
+        super().__init__()
+        self.student_ids = np.zeros(0, dtype=np.int64)
+        self.departments = np.zeros(0, dtype=np.int32)
+        self.department_names = []
+        self._department_index = {}
+        self.graduation_years = np.zeros(0, dtype=np.int32)
+        self.topic_ids = np.zeros(0, dtype=np.int64)
+        self.topic_names = []
+        self.topic_categories = np.zeros(0, dtype=object)
+        self.totals = np.zeros(0, dtype=np.float64)
+        self.completed = np.zeros((0, 0), dtype=np.uint16)
+        self.started = np.zeros((0, 0), dtype=bool)
+        # category -> per-student percentages, dropped whenever the matrix changes
+        self._percentages = {}
+
+    def load(self, cursor):
+        cursor.execute("SELECT topic_id, topic_name, parent_topic, total_questions FROM progress_topics ORDER BY topic_id")
+        topics = cursor.fetchall()
+        self.topic_ids = np.array([row[0] for row in topics], dtype=np.int64)
+        self.topic_names = [row[1] for row in topics]
+        self.topic_categories = np.array([row[2] for row in topics], dtype=object)
+        self.totals = np.array([row[3] or 0 for row in topics], dtype=np.float64)
+
+        cursor.execute("SELECT id, department_key, COALESCE(graduation_year, 0) FROM students ORDER BY id")
+        students = cursor.fetchall()
+        self.student_ids = np.array([row[0] for row in students], dtype=np.int64)
+        self._department_index = {}
+        self.departments = self._department_codes(row[1] for row in students)
+        self.graduation_years = np.array([row[2] for row in students], dtype=np.int32)
+        self.completed = np.zeros((len(students), len(topics)), dtype=np.uint16)
+        self.started = np.zeros((len(students), len(topics)), dtype=bool)
+
+        cursor.execute("SELECT student_id, topic_id, COALESCE(completed_questions, 0) FROM student_progress")
+        self._fill(np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 3))
+
+    def update(self, cursor, since):
+        changes = {'since': since, 'last_student_id': int(self.student_ids[-1]) if len(self.student_ids) else 0}
+        cursor.execute("""
+            SELECT id, department_key, COALESCE(graduation_year, 0) FROM students
+            WHERE id > :last_student_id ORDER BY id
+        """, changes)
+        registered = cursor.fetchall()
+        if registered:
+            self.student_ids = np.concatenate([self.student_ids, [row[0] for row in registered]])
+            self.departments = np.concatenate([self.departments, self._department_codes(row[1] for row in registered)])
+            self.graduation_years = np.concatenate([self.graduation_years, [row[2] for row in registered]])
+            empty = (len(registered), len(self.topic_ids))
+            self.completed = np.concatenate([self.completed, np.zeros(empty, dtype=np.uint16)])
+            self.started = np.concatenate([self.started, np.zeros(empty, dtype=bool)])
+            self._percentages.clear()
+
+        cursor.execute(CHANGED_STUDENTS, changes)
+        changed = self._rows_of(np.array([row[0] for row in cursor.fetchall()], dtype=np.int64))
+        if not len(changed):
+            return
+        self.completed[changed] = 0
+        self.started[changed] = False
+        cursor.execute(f"""
+            SELECT sp.student_id, sp.topic_id, COALESCE(sp.completed_questions, 0) FROM student_progress sp
+            WHERE sp.student_id IN ({CHANGED_STUDENTS})
+        """, changes)
+        self._fill(np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 3))
+
+    def _department_codes(self, names):
+        codes = [self._department_index.setdefault(name, len(self._department_index)) for name in names]
+        self.department_names = list(self._department_index)
+        return np.array(codes, dtype=np.int32)
+
+    def _rows_of(self, student_ids):
+        """Matrix rows of the given students; ids not held are dropped."""
+        if not len(self.student_ids):
+            return np.zeros(0, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.student_ids, student_ids), len(self.student_ids) - 1)
+        return rows[self.student_ids[rows] == student_ids]
+
+    def _fill(self, progress_rows):
+        if not len(progress_rows) or not len(self.student_ids) or not len(self.topic_ids):
+            self._percentages.clear()
+            return
+        student_ids, topic_ids, completed = progress_rows.T
+        rows = np.minimum(np.searchsorted(self.student_ids, student_ids), len(self.student_ids) - 1)
+        columns = np.minimum(np.searchsorted(self.topic_ids, topic_ids), len(self.topic_ids) - 1)
+        # Rows of deleted students or topics wait for the next full reload
+        known = (self.student_ids[rows] == student_ids) & (self.topic_ids[columns] == topic_ids)
+        rows, columns = rows[known], columns[known]
+        self.completed[rows, columns] = np.clip(completed[known], 0, np.iinfo(np.uint16).max)
+        self.started[rows, columns] = True
+        self._percentages.clear()
+
+    def category_columns(self, category):
+        return self.topic_categories == category
+
+    def percentages(self, category):
+        """Per-student category percentage, 0 for students who started nothing."""
+        if category not in self._percentages:
+            columns = self.category_columns(category)
+            done = self.completed[:, columns].sum(axis=1, dtype=np.float64)
+            possible = (self.started[:, columns] * self.totals[columns]).sum(axis=1)
+            self._percentages[category] = np.divide(
+                done * 100, possible, out=np.zeros_like(done), where=possible > 0
+            )
+        return self._percentages[category]
+
+    def selection(self, department='', graduation_year=None):
+        """Boolean mask of the students in one department and/or graduation year."""
+        mask = np.ones(len(self.student_ids), dtype=bool)
+        if department:
+            if department not in self._department_index:
+                return np.zeros(len(self.student_ids), dtype=bool)
+            mask &= self.departments == self._department_index[department]
+        if graduation_year is not None:
+            mask &= self.graduation_years == graduation_year
+        return mask
+
+    def stats(self):
+        return {
+            **super().stats(),
+            'students': len(self.student_ids),
+            'topics': len(self.topic_ids),
+            'bytes': self.completed.nbytes + self.started.nbytes
+        }
+
+
+def distribution(values):
+    """Count, mean and PERCENTILES of a 1-d array, rounded for JSON."""
+    if not len(values):
+        return {'students': 0, 'mean': 0, 'percentiles': {str(p): 0 for p in PERCENTILES}}
+    return {
+        'students': int(len(values)),
+        'mean': round(float(values.mean()), 2),
+        'percentiles': {str(p): round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    }
+
+
+def percentiles(matrix, category, department='', graduation_year=None):
+    return distribution(matrix.percentages(category)[matrix.selection(department, graduation_year)])
+
+
+def histogram(matrix, category, bins=10, department='', graduation_year=None):
+    values = matrix.percentages(category)[matrix.selection(department, graduation_year)]
+    counts, edges = np.histogram(values, bins=bins, range=(0, 100))
+    return {'edges': [round(float(edge), 2) for edge in edges], 'counts': counts.tolist()}
+
+
+def departments(matrix, category, graduation_year=None):
+    """Percentage distribution of each department, from one sort of the cohort."""
+    selected = matrix.selection(graduation_year=graduation_year)
+    values = matrix.percentages(category)[selected]
+    codes = matrix.departments[selected]
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    result = []
+    for group in np.split(np.arange(len(codes)), bounds):
+        if not len(group):
+            continue
+        result.append({'department': matrix.department_names[codes[group[0]]] or None,
+                       **distribution(values[group])})
+    return sorted(result, key=lambda entry: entry['department'] or '')
+
+
+def topics(matrix, category, department=''):
+    """Per-topic difficulty curve: the share of starters reaching each CURVE_POINTS ratio."""
+    columns = np.flatnonzero(matrix.category_columns(category))
+    completed, started = matrix.completed[:, columns], matrix.started[:, columns]
+    if department:
+        selected = matrix.selection(department)
+        completed, started = completed[selected], started[selected]
+    totals = matrix.totals[columns]
+    starters = started.sum(axis=0)
+    mean_ratio = np.divide(completed.sum(axis=0, dtype=np.float64), totals * np.maximum(starters, 1),
+                           out=np.zeros(len(columns)), where=totals > 0)
+    # completed >= point * total; a student who has not started a topic has completed nothing in it
+    curves = {str(point): (completed >= np.maximum(np.ceil(point * totals), 1)).sum(axis=0) / np.maximum(starters, 1)
+              for point in CURVE_POINTS}
+    return [{
+        'topic_id': int(matrix.topic_ids[column]),
+        'topic_name': matrix.topic_names[column],
+        'started': int(starters[index]),
+        'mean_completion': round(float(mean_ratio[index]) * 100, 2),
+        'curve': {point: round(float(shares[index]) * 100, 2) for point, shares in curves.items()}
+    } for index, column in enumerate(columns)]
+
+
+_matrices = ProcessLocal(CohortMatrix)
+
+
+def get_matrix():
+    """The refreshed matrix for this process, locked; use as a context manager."""
+    return _matrices.refreshed()
@@ -0,0 +1,173 @@
+"""CSV and XLSX exports of cohort progress, streamed row by row.
+
+Both formats are produced by generators that pull students from
+progress.iter_cohort while SQLite steps through the query, and hand the
+encoded bytes to the server every CHUNK_ROWS rows. The header goes out
+before the query runs, and memory use does not depend on the cohort size.
+
+The XLSX workbook is a zip written to a non-seekable sink (zipfile then
+uses data descriptors), with one sheet of inline strings, so no shared
+string table has to be kept.
+"""
+import csv
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+import progress
+
+EXPORT_COLUMNS = ['Student ID', 'Name', 'Email', 'Department', 'Graduation Year'] + [
+    f"{category} {field}" for category in progress.COHORT_CATEGORIES for field in ('Completed', 'Total', '%')
+]
+# Rows encoded before a chunk is handed to the server
+CHUNK_ROWS = 500
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx')
+}
+
+# Characters a spreadsheet would read as the start of a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Control characters XML 1.0 does not allow
+XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def export_row(student):
+    row = [student['id'], student['name'], student['email'], student['department'], student['graduation_year']]
+    for key in progress.COHORT_CATEGORIES.values():
+        category = student[key]
+        row += [category['completed'], category['total'], category['percentage']]
+    return row
+
+
+def safe_text(value):
+    """Student-entered text, with formula-like values forced to plain text."""
+    return "'" + value if value.startswith(FORMULA_PREFIXES) else value
+
+
+def csv_chunks(students):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The BOM makes Excel read the file as UTF-8
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    for count, student in enumerate(students, 1):
+        writer.writerow([safe_text(value) if isinstance(value, str) else value for value in export_row(student)])
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+class ChunkSink:
+    """Write target for ZipFile that keeps bytes until the generator takes them."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+COLUMN_LETTERS = [column_letter(index) for index in range(len(EXPORT_COLUMNS))]
+
+
+def xlsx_row(number, values):
+    cells = []
+    for letter, value in zip(COLUMN_LETTERS, values):
+        ref = f'{letter}{number}'
+        if value is None:
+            continue
+        if isinstance(value, (int, float)):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            text = escape(XML_ILLEGAL.sub('', safe_text(str(value))))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Cohort progress" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    )
+}
+
+
+def xlsx_chunks(students):
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in XLSX_PARTS.items():
+            workbook.writestr(name, content)
+        # force_zip64: the sheet's final size is unknown when its header is written
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData>' + xlsx_row(1, EXPORT_COLUMNS)
+            ).encode())
+            yield sink.take()
+            for number, student in enumerate(students, 2):
+                sheet.write(xlsx_row(number, export_row(student)).encode())
+                if number % CHUNK_ROWS == 0:
+                    yield sink.take()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.take()
+
+
+def export_chunks(export_format, students):
+    return {'csv': csv_chunks, 'xlsx': xlsx_chunks}[export_format](students)
@@ -5,3 +5,29 @@ db_config = {
     'password': 'root123',
     'database': 'placement_preparation'
 }
+
+# SQLite settings used by database.py
+sqlite_config = {
+    'database': 'placement_preparation.db',
+    'profile': 'wal',       # storage profile, see database.STORAGE_PROFILES
+    'pool_size': 8,         # open connections kept per worker process
+    'pool_timeout': 30      # seconds a request waits for a free connection
+}
+
+# Per-student cache in front of the progress read endpoints, see progress_cache.py
+progress_cache_config = {
+    'max_students': 2048,   # students kept per worker process before LRU eviction
+    'ttl': 30               # seconds an entry lives; freshness is checked against progress_versions
+}
+
+# Precomputed admin reports, see reports.py
+report_config = {
+    'poll_interval': 5,     # seconds between the scheduler's checks
+    'lease': 300,           # seconds one worker may hold a report build before another takes over
+    'reports': {
+        # interval: seconds before a snapshot is rebuilt;
+        # after_completions: rebuild sooner once this many questions were completed (0: never)
+        'preparation_summary': {'interval': 600, 'after_completions': 1000},
+        'placement_summary': {'interval': 900, 'after_completions': 0}
+    }
+}
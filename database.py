@@ -0,0 +1,249 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from config import sqlite_config
+
+
+# Storage profiles. journal_mode is stored in the database file and is set
+# once at startup; the remaining PRAGMAs are per connection and are applied
+# whenever the pool opens a connection.
+STORAGE_PROFILES = {
+    # SQLite defaults: a writer blocks every reader until it commits
+    'rollback': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 60000
+    },
+    # Readers keep reading the last commit while a writer appends to the WAL.
+    # NORMAL only fsyncs at checkpoints, which is safe in WAL mode.
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 128 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000
+    },
+    # WAL with an fsync on every commit, for hosts without a battery-backed disk
+    'wal_durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16000,
+        'mmap_size': 128 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000
+    }
+}
+
+CONNECTION_PRAGMAS = ('synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout')
+
+
+def connection_pragmas(profile, **overrides):
+    """PRAGMA statements a pooled connection runs right after opening."""
+    settings = {**STORAGE_PROFILES[profile], **overrides}
+    return [f"{name} = {settings[name]}" for name in CONNECTION_PRAGMAS]
+
+
+def apply_storage_profile(database, profile):
+    """Switch the database file to the profile's journal mode."""
+    settings = STORAGE_PROFILES[profile]
+    conn = sqlite3.connect(database, timeout=settings['busy_timeout'] / 1000)
+    try:
+        return conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection became free within the pool timeout."""
+
+
+class PooledConnection:
+    """Checkout handle for a pooled sqlite3 connection.
+
+    Behaves like the underlying connection, except that close() hands the
+    connection back to its pool instead of closing it. A handle is only valid
+    for one checkout, so closing it twice never releases someone else's
+    connection.
+    """
+
+    def __init__(self, pool, conn):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_conn', conn)
+
+    def _connection(self):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return self._conn
+
+    def __getattr__(self, name):
+        return getattr(self._connection(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection(), name, value)
+
+    def __enter__(self):
+        self._connection().__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._connection().__exit__(exc_type, exc, tb)
+
+    def close(self):
+        conn = self._conn
+        if conn is not None:
+            object.__setattr__(self, '_conn', None)
+            self._pool.release(conn)
+
+
+class ConnectionPool:
+    """Fixed-size pool of open, pre-configured SQLite connections."""
+
+    def __init__(self, database, size=8, timeout=60, acquire_timeout=30, pragmas=()):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+        self.pragmas = list(pragmas)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database,
+            timeout=self.timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in self.pragmas:
+            conn.execute(f"PRAGMA {pragma}")
+        return conn
+
+    def acquire(self):
+        """Check out a connection, opening a new one while below pool size."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+
+        waited = None
+        if conn is None:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    conn = self._connect()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                start = time.perf_counter()
+                try:
+                    conn = self._idle.get(timeout=self.acquire_timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection free after {self.acquire_timeout}s "
+                        f"(pool size {self.size})"
+                    )
+                waited = time.perf_counter() - start
+
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            if waited is not None:
+                self._waits += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding it if it is unusable."""
+        with self._lock:
+            self._in_use -= 1
+        try:
+            # Never hand the next request a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            with self._lock:
+                self._created -= 1
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    def close_all(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'size': self.size,
+                'open': self._created,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_total_ms': round(self._wait_total * 1000, 3),
+                'wait_max_ms': round(self._wait_max * 1000, 3),
+                'wait_avg_ms': round(self._wait_total * 1000 / self._waits, 3) if self._waits else 0,
+                'timeouts': self._timeouts
+            }
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return this process's pool, building a fresh one after a fork."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                # Connections inherited from a parent process must not be reused
+                profile = sqlite_config['profile']
+                apply_storage_profile(sqlite_config['database'], profile)
+                _pool = ConnectionPool(
+                    sqlite_config['database'],
+                    size=sqlite_config['pool_size'],
+                    timeout=STORAGE_PROFILES[profile]['busy_timeout'] / 1000,
+                    acquire_timeout=sqlite_config['pool_timeout'],
+                    pragmas=connection_pragmas(profile)
+                )
+                _pool_pid = pid
+    return _pool
+
+
+def get_connection():
+    return get_pool().acquire()
@@ -0,0 +1,132 @@
+"""Department x graduation-year aggregates of category progress.
+
+cohort_facets keeps, per (department, graduation year, category), the
+number of students and the sum of their percentages in hundredths, and
+cohort_facet_buckets how many of them sit in each whole-percent bucket
+(0-100). Triggers on student_category_progress and students apply every
+registration, completion and profile edit as a delta, so the admin views
+read a few hundred rows at most, however many students there are.
+
+Means are exact. Medians come from the buckets, so they are rounded down
+to the whole percent.
+"""
+from topic_catalog import CATEGORIES
+
+UNKNOWN_YEAR = 0
+
+
+def rebuild(cursor):
+    """Recompute both facet tables from student_category_progress."""
+    cursor.execute("DELETE FROM cohort_facets")
+    cursor.execute("DELETE FROM cohort_facet_buckets")
+    cursor.execute("""
+        INSERT INTO cohort_facets (department_key, graduation_year, category, students, percentage_sum)
+        SELECT s.department_key, COALESCE(s.graduation_year, 0), scp.category,
+               COUNT(*), SUM(CAST(round(scp.percentage * 100) AS INTEGER))
+        FROM student_category_progress scp
+        JOIN students s ON s.id = scp.student_id
+        GROUP BY 1, 2, 3
+    """)
+    cursor.execute("""
+        INSERT INTO cohort_facet_buckets (department_key, graduation_year, category, bucket, students)
+        SELECT s.department_key, COALESCE(s.graduation_year, 0), scp.category,
+               MIN(MAX(CAST(scp.percentage AS INTEGER), 0), 100), COUNT(*)
+        FROM student_category_progress scp
+        JOIN students s ON s.id = scp.student_id
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def departments(cursor):
+    """[(department, students)] for the branch filter, by department name."""
+    # Every student has one row per category, so any category counts them
+    cursor.execute("""
+        SELECT department_key, SUM(students) FROM cohort_facets
+        WHERE category = ? AND department_key != ''
+        GROUP BY department_key
+        HAVING SUM(students) > 0
+        ORDER BY department_key
+    """, (CATEGORIES[0],))
+    return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def median_bucket(buckets, students):
+    """Lower median of a sorted [(bucket, count)] histogram holding `students`."""
+    position, seen = (students + 1) // 2, 0
+    for bucket, count in buckets:
+        seen += count
+        if seen >= position:
+            return bucket
+    return 0
+
+
+def facet_filter(department, graduation_year):
+    filters, params = [], []
+    if department:
+        filters.append("department_key = ?")
+        params.append(department)
+    if graduation_year is not None:
+        filters.append("graduation_year = ?")
+        params.append(graduation_year)
+    return ''.join(f" AND {condition}" for condition in filters), params
+
+
+def summary(cursor, department='', graduation_year=None):
+    """{category: {'students', 'mean', 'median'}} over one facet slice."""
+    condition, params = facet_filter(department, graduation_year)
+    cursor.execute(f"""
+        SELECT category, SUM(students), SUM(percentage_sum) FROM cohort_facets
+        WHERE 1 = 1 {condition}
+        GROUP BY category
+    """, params)
+    totals = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+    cursor.execute(f"""
+        SELECT category, bucket, SUM(students) FROM cohort_facet_buckets
+        WHERE students != 0 {condition}
+        GROUP BY category, bucket
+        ORDER BY category, bucket
+    """, params)
+    buckets = {}
+    for category, bucket, count in cursor.fetchall():
+        buckets.setdefault(category, []).append((bucket, count))
+
+    result = {}
+    for category in CATEGORIES:
+        students, hundredths = totals.get(category, (0, 0))
+        result[category] = {
+            'students': students,
+            'mean': round(hundredths / 100 / students, 2) if students else 0,
+            'median': median_bucket(buckets.get(category, []), students) if students else 0
+        }
+    return result
+
+
+def breakdown(cursor):
+    """Every department x graduation year with its student count and per-category mean/median."""
+    cursor.execute("""
+        SELECT department_key, graduation_year, category, students, percentage_sum FROM cohort_facets
+        WHERE students > 0
+        ORDER BY department_key, graduation_year
+    """)
+    facets = {}
+    for department, year, category, students, hundredths in cursor.fetchall():
+        facet = facets.setdefault((department, year), {
+            'department': department or None,
+            'graduation_year': year if year != UNKNOWN_YEAR else None,
+            'students': students,
+            'categories': {}
+        })
+        facet['categories'][category] = {'mean': round(hundredths / 100 / students, 2), 'students': students}
+
+    cursor.execute("""
+        SELECT department_key, graduation_year, category, bucket, students FROM cohort_facet_buckets
+        WHERE students != 0
+        ORDER BY department_key, graduation_year, category, bucket
+    """)
+    buckets = {}
+    for department, year, category, bucket, count in cursor.fetchall():
+        buckets.setdefault((department, year, category), []).append((bucket, count))
+    for (department, year), facet in facets.items():
+        for category, stats in facet['categories'].items():
+            stats['median'] = median_bucket(buckets.get((department, year, category), []), stats.pop('students'))
+    return list(facets.values())
@@ -0,0 +1,221 @@
+"""Student ranks, overall and per category, globally and per department.
+
+Each board keeps its students in a sorted list keyed by (score
+descending, student id), with scores as percentages in hundredths
+(0-MAX_SCORE). Moving a student, the rank of a score and the student at a
+given place are all O(log n), however many students share a score, so no
+request sorts the cohort. Ties share a rank (1, 2, 2, 4) and are listed by
+student id.
+
+A category score is the student's completed questions in that category
+over the category's total in the topic catalog, the same basis as the
+*_overall_progress counters and /get_progress, so finishing one short topic
+does not outrank being halfway through the whole category. Completed
+counts are read from student_category_progress. The overall score is the
+mean of the category scores.
+
+Boards are per process, built on first use and refreshed like every
+change_seq_cache view. mark_complete moves the student in the worker that
+served it as soon as the write commits; other workers catch up within
+REFRESH_INTERVAL.
+"""
+from sortedcontainers import SortedList
+
+import topic_catalog
+from change_seq_cache import CHANGED_STUDENTS, ChangeSeqCache, ProcessLocal
+from topic_catalog import CATEGORIES
+
+OVERALL = 'overall'
+SCOPES = (OVERALL,) + CATEGORIES
+# 100% in hundredths
+MAX_SCORE = 10000
+# Most students one top or around request returns
+MAX_LIMIT = 100
+
+
+class Board:
+    """Order statistics over (score, student_id), highest score first."""
+
+    def __init__(self, entries=()):
+        # Keys are (-score, student_id), so list order is board order
+        self.order = SortedList((-score, student_id) for student_id, score in entries)
+
+    @property
+    def size(self):
+        return len(self.order)
+
+    def insert(self, student_id, score):
+        self.order.add((-score, student_id))
+
+    def remove(self, student_id, score):
+        self.order.remove((-score, student_id))
+
+    def rank(self, score):
+        # (-score,) sorts before every (-score, student_id)
+        return self.order.bisect_left((-score,)) + 1
+
+    def position(self, student_id, score):
+        """0-based place of a student on the board."""
+        return self.order.index((-score, student_id))
+
+    def at(self, position):
+        """(student_id, score) at a 0-based place from the top."""
+        negated, student_id = self.order[position]
+        return student_id, -negated
+
+    def window(self, start, count):
+        """[(rank, student_id, score)] for the places start..start + count - 1."""
+        return [
+            (self.rank(-negated), student_id, -negated)
+            for negated, student_id in self.order.islice(max(start, 0), max(start + count, 0))
+        ]
+
+
+def student_scores(completed, catalog):
+    """{scope: score} from a student's {category: completed questions}."""
+    scores = {}
+    for category in CATEGORIES:
+        total = catalog.category_totals[category]
+        score = round((completed.get(category) or 0) * MAX_SCORE / total) if total else 0
+        scores[category] = min(max(score, 0), MAX_SCORE)
+    scores[OVERALL] = int(round(sum(scores[category] for category in CATEGORIES) / len(CATEGORIES)))
+    return scores
+
+
+def read_students(cursor, catalog, condition='', params=()):
+    """{student_id: (department_key, {scope: score})} for the students matching condition."""
+    cursor.execute(f"""
+        SELECT s.id, s.department_key, scp.category, scp.completed
+        FROM students s
+        JOIN student_category_progress scp ON scp.student_id = s.id
+        {condition}
+    """, params)
+    completed = {}
+    for student_id, department, category, count in cursor.fetchall():
+        completed.setdefault(student_id, (department, {}))[1][category] = count
+    return {
+        student_id: (department, student_scores(by_category, catalog))
+        for student_id, (department, by_category) in completed.items()
+    }
+
+
+class Leaderboard(ChangeSeqCache):
+    def __init__(self):
+        super().__init__()
+        self.catalog = None
+        self.last_student_id = 0
+        # (scope, department_key) -> Board; department '' is the whole cohort
+        self.boards = {}
+        # student_id -> (department_key, {scope: score})
+        self.students = {}
+
+    def load(self, cursor):
+        self.catalog = topic_catalog.load_catalog(cursor)
+        self._load(read_students(cursor, self.catalog))
+
+    def update(self, cursor, since):
+        students = read_students(cursor, self.catalog, f"WHERE s.id IN ({CHANGED_STUDENTS})",
+                                 {'since': since, 'last_student_id': self.last_student_id})
+        for student_id, entry in students.items():
+            self._place(student_id, entry)
+
+    def _load(self, students):
+        entries = {}
+        for student_id, (department, scores) in students.items():
+            for scope, score in scores.items():
+                entries.setdefault((scope, ''), []).append((student_id, score))
+                if department:
+                    entries.setdefault((scope, department), []).append((student_id, score))
+        self.boards = {key: Board(board_entries) for key, board_entries in entries.items()}
+        self.students = students
+        self.last_student_id = max(students, default=0)
+
+    def _place(self, student_id, entry):
+        """Move a student to entry's department and scores; None takes them off every board."""
+        previous = self.students.pop(student_id, None)
+        if previous is not None:
+            department, scores = previous
+            for scope, score in scores.items():
+                self.boards[(scope, '')].remove(student_id, score)
+                if department:
+                    self.boards[(scope, department)].remove(student_id, score)
+        if entry is None:
+            return
+        department, scores = entry
+        for scope, score in scores.items():
+            for key in ((scope, ''), (scope, department)) if department else ((scope, ''),):
+                if key not in self.boards:
+                    self.boards[key] = Board()
+                self.boards[key].insert(student_id, score)
+        self.students[student_id] = entry
+        self.last_student_id = max(self.last_student_id, student_id)
+
+    def record(self, cursor, student_id):
+        """Re-read one student's scores after a write; boards not yet built are left alone."""
+        if self.loaded_at is None:
+            return
+        self._place(student_id, read_students(cursor, self.catalog, "WHERE s.id = ?", (student_id,)).get(student_id))
+
+    def board(self, scope, department=''):
+        return self.boards.get((scope, department)) or Board()
+
+    def top(self, scope, department='', limit=10):
+        return self.board(scope, department).window(0, limit)
+
+    def standing(self, student_id, scope, within_department=False, around=0):
+        """The student's rank on one board and the `around` students either side of them."""
+        if student_id not in self.students:
+            return None
+        department, scores = self.students[student_id]
+        if within_department and not department:
+            return None
+        board = self.board(scope, department if within_department else '')
+        score = scores[scope]
+        position = board.position(student_id, score)
+        return {
+            'rank': board.rank(score),
+            'score': score,
+            'students': board.size,
+            'department': department or None,
+            'nearby': board.window(position - around, 2 * around + 1)
+        }
+
+    def stats(self):
+        return {**super().stats(), 'students': len(self.students), 'boards': len(self.boards)}
+
+
+def describe(cursor, entries):
+    """[{rank, student_id, name, department, percentage}] for (rank, student_id, score) entries."""
+    if not entries:
+        return []
+    ids = [student_id for _, student_id, _ in entries]
+    cursor.execute(
+        f"SELECT id, name, department FROM students WHERE id IN ({','.join('?' * len(ids))})", ids
+    )
+    profiles = {row[0]: row[1:] for row in cursor.fetchall()}
+    return [{
+        'rank': rank,
+        'student_id': student_id,
+        'name': profiles.get(student_id, (None, None))[0],
+        'department': profiles.get(student_id, (None, None))[1],
+        'percentage': score / 100
+    } for rank, student_id, score in entries]
+
+
+_leaderboards = ProcessLocal(Leaderboard)
+
+
+def get_leaderboard(cursor=None):
+    """The refreshed leaderboard for this process, locked; use as a context manager.
+
+    A request that already holds a connection passes its cursor, so the
+    refresh does not take a second one from the pool.
+    """
+    return _leaderboards.refreshed(cursor)
+
+
+def record(cursor, student_id):
+    """Move one student on this process's boards; call after the write commits."""
+    leaderboard = _leaderboards.instance()
+    with leaderboard.lock:
+        leaderboard.record(cursor, student_id)
@@ -0,0 +1,1129 @@
+"""Versioned schema migrations for the SQLite database.
+
+Each migration runs once, in its own transaction, and is recorded in the
+schema_version table. Run it at deploy time:
+
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # show applied and pending versions
+
+The app also calls migrate() on startup, which costs a single query once the
+database is current. Request handlers assume the schema is up to date.
+
+Migrations use only SQL and helpers defined in this module, never the app
+modules, so a migration keeps doing what it did when it shipped.
+"""
+import argparse
+import sqlite3
+
+from config import sqlite_config
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return register
+
+
+def table_columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+@migration(1, "core account and progress tables")
+def create_core_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            role TEXT CHECK(role IN ('student', 'company', 'admin')) NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS students (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            phone TEXT,
+            department TEXT,
+            graduation_year INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            question_text TEXT NOT NULL,
+            correct_answer TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS progress_topics (
+            topic_id INTEGER PRIMARY KEY,
+            topic_name TEXT NOT NULL,
+            total_questions INTEGER DEFAULT 0,
+            parent_topic TEXT DEFAULT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_answers (
+            answer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            question_id INTEGER NOT NULL,
+            topic_id INTEGER NOT NULL,
+            given_answer TEXT,
+            is_correct BOOLEAN DEFAULT 0,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(student_id, question_id, topic_id),
+            FOREIGN KEY (student_id) REFERENCES students(id),
+            FOREIGN KEY (topic_id) REFERENCES progress_topics(topic_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_progress (
+            progress_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            topic_id INTEGER NOT NULL,
+            completed_questions INTEGER DEFAULT 0,
+            total_questions INTEGER DEFAULT 0,
+            is_completed BOOLEAN DEFAULT 0,
+            last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(student_id, topic_id),
+            FOREIGN KEY (student_id) REFERENCES students(id),
+            FOREIGN KEY (topic_id) REFERENCES progress_topics(topic_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS aptitude_progress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            problem_id TEXT NOT NULL,
+            is_completed INTEGER DEFAULT 0,
+            UNIQUE(student_id, problem_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS communication_progress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER,
+            user_id INTEGER,
+            problem_id TEXT NOT NULL,
+            is_completed INTEGER DEFAULT 0,
+            UNIQUE(problem_id, student_id)
+        )
+    """)
+    for table in ('aptitude_overall_progress', 'dsa_overall_progress', 'communication_overall_progress'):
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                student_id INTEGER NOT NULL,
+                completed_questions INTEGER DEFAULT 0,
+                total_questions INTEGER DEFAULT 0,
+                is_completed INTEGER DEFAULT 0,
+                last_updated TIMESTAMP,
+                UNIQUE(student_id)
+            )
+        """)
+
+
+@migration(2, "rebuild legacy questions/users/students tables without an id column")
+def add_id_columns(cursor):
+    if 'id' not in table_columns(cursor, 'questions'):
+        cursor.execute("""
+            CREATE TABLE questions_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question_text TEXT NOT NULL,
+                correct_answer TEXT
+            )
+        """)
+        cursor.execute("INSERT INTO questions_new (question_text, correct_answer) SELECT question_text, correct_answer FROM questions")
+        cursor.execute("DROP TABLE questions")
+        cursor.execute("ALTER TABLE questions_new RENAME TO questions")
+
+    if 'id' not in table_columns(cursor, 'users'):
+        cursor.execute("""
+            CREATE TABLE users_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL UNIQUE,
+                password TEXT NOT NULL,
+                role TEXT NOT NULL
+            )
+        """)
+        cursor.execute("INSERT INTO users_new (name, email, password, role) SELECT name, email, password, role FROM users")
+        cursor.execute("DROP TABLE users")
+        cursor.execute("ALTER TABLE users_new RENAME TO users")
+
+    if 'id' not in table_columns(cursor, 'students'):
+        cursor.execute("""
+            CREATE TABLE students_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                phone TEXT,
+                department TEXT,
+                graduation_year INTEGER
+            )
+        """)
+        cursor.execute("INSERT INTO students_new (user_id, name, email, phone, department, graduation_year) SELECT user_id, name, email, phone, department, graduation_year FROM students")
+        cursor.execute("DROP TABLE students")
+        cursor.execute("ALTER TABLE students_new RENAME TO students")
+
+
+@migration(3, "key aptitude_progress and communication_progress by student_id")
+def key_problem_progress_by_student(cursor):
+    columns = table_columns(cursor, 'aptitude_progress')
+    if 'student_id' not in columns and 'user_id' in columns:
+        # Legacy rows were keyed by users.id; map them onto students.id
+        cursor.execute("""
+            CREATE TABLE aptitude_progress_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                student_id INTEGER NOT NULL,
+                problem_id TEXT NOT NULL,
+                is_completed INTEGER DEFAULT 0,
+                UNIQUE(student_id, problem_id)
+            )
+        """)
+        cursor.execute("""
+            INSERT OR IGNORE INTO aptitude_progress_new (student_id, problem_id, is_completed)
+            SELECT s.id, ap.problem_id, ap.is_completed
+            FROM aptitude_progress ap
+            JOIN students s ON s.user_id = ap.user_id
+        """)
+        cursor.execute("DROP TABLE aptitude_progress")
+        cursor.execute("ALTER TABLE aptitude_progress_new RENAME TO aptitude_progress")
+    elif 'student_id' not in columns:
+        cursor.execute("ALTER TABLE aptitude_progress ADD COLUMN student_id INTEGER")
+
+    columns = table_columns(cursor, 'communication_progress')
+    if 'student_id' not in columns:
+        cursor.execute("ALTER TABLE communication_progress ADD COLUMN student_id INTEGER")
+        if 'user_id' in columns:
+            cursor.execute("""
+                UPDATE communication_progress
+                SET student_id = (
+                    SELECT id FROM students WHERE user_id = communication_progress.user_id
+                )
+                WHERE user_id IS NOT NULL
+            """)
+
+
+# Topic ids are hard-coded in the practice templates, so the catalog is seeded
+# with the same ids
+DEFAULT_TOPICS = [
+    (1, 'Basic Programming', 15, 'DSA'),
+    (2, 'Arrays and Strings', 12, 'DSA'),
+    (3, 'Linked Lists', 10, 'DSA'),
+    (4, 'Stacks and Queues', 8, 'DSA'),
+    (5, 'Trees and Graphs', 10, 'DSA'),
+    (6, 'Searching and Sorting', 10, 'DSA'),
+    (7, 'Dynamic Programming', 15, 'DSA'),
+    (8, 'Recursion and Backtracking', 10, 'DSA'),
+    (9, 'Greedy Algorithms', 10, 'DSA'),
+    (10, 'Bit Manipulation', 10, 'DSA'),
+    (11, 'Problems_on_trains', 50, 'Aptitude'),
+    (12, 'time_and_distance', 50, 'Aptitude'),
+    (13, 'profit_and_loss', 50, 'Aptitude'),
+    (14, 'simple_and_compound_intrest', 50, 'Aptitude'),
+    (15, 'ration_and_proportion', 50, 'Aptitude'),
+    (16, 'probability', 50, 'Aptitude'),
+    (17, 'blood_relations', 50, 'Aptitude'),
+    (18, 'syllogism', 50, 'Aptitude'),
+    (19, 'directions', 50, 'Aptitude'),
+    (20, 'puzzles', 50, 'Aptitude'),
+    (21, 'sentence_completion', 50, 'Aptitude'),
+    (22, 'synonyms_and_atonyms', 50, 'Aptitude'),
+    (23, 'reading_comprehension', 50, 'Aptitude'),
+    (24, 'parajumbles', 50, 'Aptitude'),
+    (25, 'bar_graphs', 50, 'Aptitude'),
+    (26, 'pie_charts', 50, 'Aptitude'),
+    (27, 'line_graphs', 50, 'Aptitude'),
+    (28, 'tabulation', 50, 'Aptitude')
+]
+
+SAMPLE_QUESTIONS = [
+    ("Tell me about yourself.", "I am a [your role] with [X] years of experience in [industry/field]. I have expertise in [key skills] and have worked on [notable projects/achievements]. I'm passionate about [relevant interests] and am looking to [career goals]."),
+    ("What are your strengths and weaknesses?", "My strengths include [list 2-3 key strengths with examples]. As for weaknesses, I'm working on [mention a genuine area of improvement] and have taken steps like [specific actions] to address it."),
+    ("Why do you want to work here?", "I want to work here because [company name] is known for [specific company strengths/values]. I'm particularly interested in [specific aspects of the company] and believe my skills in [relevant skills] align well with the role."),
+    ("Describe a situation where you had to deal with a difficult coworker.", "In a previous role, I dealt with a difficult coworker by [specific approach]. I focused on [key actions taken] and the outcome was [positive result]. This taught me the importance of [key learning]."),
+    ("What are your career goals for the next five years?", "My career goals include [specific short-term goals] and [long-term aspirations]. I plan to achieve these through [specific steps/strategies]."),
+    ("Tell me about a time you failed at something and what you learned.", "A significant failure I experienced was [describe situation]. From this, I learned [key lessons] and implemented [specific changes] to prevent similar issues in the future."),
+    ("Explain the concept of closures in JavaScript.", "Closures in JavaScript are functions that have access to variables in their outer scope, even after the outer function has returned. They're useful for [specific use cases] and help maintain [specific benefits]."),
+    ("Write a function to reverse a linked list.", "To reverse a linked list, you need to [algorithm steps]. The time complexity is O(n) and space complexity is O(1). Here's how it works: [explanation]"),
+    ("What are the differences between SQL and NoSQL databases?", "SQL databases are [characteristics] while NoSQL databases are [characteristics]. The main differences are [key differences] and each is better suited for [specific use cases]."),
+    ("Describe how virtual memory works in operating systems.", "Virtual memory works by [explanation]. The key components are [components] and it provides benefits like [benefits]."),
+    ("Explain the concept of multithreading and its benefits.", "Multithreading allows [explanation]. The benefits include [benefits] and it's particularly useful for [use cases]."),
+    ("What is dynamic programming and when would you use it?", "Dynamic programming is [explanation]. It's best used when [conditions] and involves [key steps]. The main advantages are [advantages].")
+]
+
+
+@migration(4, "seed the topic catalog and sample interview questions")
+def seed_reference_data(cursor):
+    cursor.execute("SELECT COUNT(*) FROM progress_topics")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany("""
+            INSERT INTO progress_topics (topic_id, topic_name, total_questions, parent_topic)
+            VALUES (?, ?, ?, ?)
+        """, DEFAULT_TOPICS)
+
+    cursor.execute("SELECT COUNT(*) FROM questions")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany("""
+            INSERT INTO questions (question_text, correct_answer)
+            VALUES (?, ?)
+        """, SAMPLE_QUESTIONS)
+
+
+# Indexes behind the per-request lookups: identity (students.user_id),
+# per-topic answer counts, category joins on progress_topics.parent_topic and
+# the admin per-category sums over student_progress
+HOT_PATH_INDEXES = [
+    ('idx_students_user_id', 'students', 'user_id'),
+    ('idx_student_answers_progress', 'student_answers', 'student_id, topic_id, is_correct'),
+    ('idx_progress_topics_parent', 'progress_topics', 'parent_topic, topic_id, total_questions'),
+    ('idx_student_progress_completed', 'student_progress', 'student_id, topic_id, completed_questions'),
+    ('idx_communication_progress_student', 'communication_progress', 'student_id, problem_id, is_completed')
+]
+
+# Sort orders of the paginated admin student tables; see progress.COHORT_SORTS
+COHORT_SORT_INDEXES = [
+    ('idx_students_name', 'students', 'name'),
+    ('idx_students_department', 'students', 'department_key'),
+    ('idx_students_department_name', 'students', 'department_key, name'),
+    ('idx_student_category_progress_percentage', 'student_category_progress', 'category, percentage'),
+]
+
+
+@migration(5, "indexes for the progress and identity hot paths")
+def create_hot_path_indexes(cursor):
+    for name, table, columns in HOT_PATH_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+    # Give the planner statistics for the new indexes
+    cursor.execute("ANALYZE")
+
+
+@migration(6, "cache_versions counter bumped whenever progress_topics changes")
+def create_cache_versions(cursor):
+    # Workers poll this row to notice catalog edits made by other processes
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('progress_topics', 0)")
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS progress_topics_version_{event.lower()}
+            AFTER {event} ON progress_topics
+            BEGIN
+                UPDATE cache_versions SET version = version + 1 WHERE name = 'progress_topics';
+            END
+        """)
+
+
+# given_answer of the student_answers rows migration 7 backfills
+BACKFILLED_ANSWER = 'backfilled'
+
+# Per-student category counters kept next to student_progress
+OVERALL_PROGRESS_TABLES = {
+    'DSA': 'dsa_overall_progress',
+    'Aptitude': 'aptitude_overall_progress',
+    'Communication': 'communication_overall_progress'
+}
+
+
+def backfill_counted_answers(cursor):
+    """Add a BACKFILLED_ANSWER row for every counted completion with no answer.
+
+    The questions were never stored, so each missing completion takes the
+    lowest question id the student has no answer for in that topic, dated
+    with the counter's last update.
+    """
+    cursor.execute("""
+        SELECT sp.student_id, sp.topic_id, sp.completed_questions - (
+                   SELECT COUNT(*) FROM student_answers sa
+                   WHERE sa.student_id = sp.student_id AND sa.topic_id = sp.topic_id AND sa.is_correct = 1
+               ), sp.last_updated
+        FROM student_progress sp
+        WHERE sp.completed_questions > 0
+    """)
+    rows = []
+    for student_id, topic_id, count, last_updated in cursor.fetchall():
+        if count <= 0:
+            continue
+        cursor.execute("""
+            SELECT question_id FROM student_answers WHERE student_id = ? AND topic_id = ?
+        """, (student_id, topic_id))
+        taken = {row[0] for row in cursor.fetchall()}
+        question_id = 1
+        for _ in range(count):
+            while question_id in taken:
+                question_id += 1
+            rows.append((student_id, question_id, topic_id, BACKFILLED_ANSWER, last_updated))
+            question_id += 1
+    cursor.executemany("""
+        INSERT INTO student_answers (student_id, question_id, topic_id, given_answer, is_correct, timestamp)
+        VALUES (?, ?, ?, ?, 1, ?)
+    """, rows)
+
+
+@migration(7, "rebuild progress counters from student_answers")
+def rebuild_progress_counters(cursor):
+    # mark_complete now increments these counters instead of recounting, so
+    # they have to start out matching the answers on record. Progress counted
+    # before answers were recorded is first backfilled as answers, so the
+    # recount keeps it. A topic without a question total counts out of 10.
+    backfill_counted_answers(cursor)
+    cursor.execute("UPDATE student_progress SET completed_questions = 0, is_completed = 0")
+    cursor.execute("""
+        INSERT INTO student_progress (student_id, topic_id, completed_questions, total_questions, is_completed)
+        SELECT sa.student_id, sa.topic_id, COUNT(*), COALESCE(NULLIF(pt.total_questions, 0), 10),
+               COUNT(*) >= COALESCE(NULLIF(pt.total_questions, 0), 10)
+        FROM student_answers sa
+        LEFT JOIN progress_topics pt ON pt.topic_id = sa.topic_id
+        WHERE sa.is_correct = 1
+        GROUP BY sa.student_id, sa.topic_id
+        ON CONFLICT(student_id, topic_id) DO UPDATE SET
+            completed_questions = excluded.completed_questions,
+            total_questions = excluded.total_questions,
+            is_completed = excluded.is_completed
+    """)
+    for category, table in OVERALL_PROGRESS_TABLES.items():
+        cursor.execute("SELECT COALESCE(SUM(total_questions), 0) FROM progress_topics WHERE parent_topic = ?",
+                       (category,))
+        category_total = cursor.fetchone()[0] or 10
+        cursor.execute(f"UPDATE {table} SET completed_questions = 0, is_completed = 0")
+        cursor.execute(f"""
+            INSERT INTO {table} (student_id, completed_questions, total_questions, is_completed, last_updated)
+            SELECT sa.student_id, COUNT(*), :total, COUNT(*) >= :total, CURRENT_TIMESTAMP
+            FROM student_answers sa
+            JOIN progress_topics pt ON pt.topic_id = sa.topic_id
+            WHERE sa.is_correct = 1 AND pt.parent_topic = :category
+            GROUP BY sa.student_id
+            ON CONFLICT(student_id) DO UPDATE SET
+                completed_questions = excluded.completed_questions,
+                total_questions = excluded.total_questions,
+                is_completed = excluded.is_completed
+        """, {'total': category_total, 'category': category})
+
+
+# Question ids at or above this are kept in student_answers only
+BITMAP_MAX_BITS = 8192
+
+
+def completion_bits(question_ids):
+    """A completion_bitmaps blob: bit i (byte i // 8, bit i % 8) set for each question id i."""
+    question_ids = [i for i in question_ids if 0 <= i < BITMAP_MAX_BITS]
+    bits = bytearray(max(question_ids) // 8 + 1 if question_ids else 0)
+    for i in question_ids:
+        bits[i // 8] |= 1 << (i % 8)
+    return bytes(bits)
+
+
+@migration(8, "completion_bitmaps: one completion bitmap per student and topic")
+def create_completion_bitmaps(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS completion_bitmaps (
+            student_id INTEGER NOT NULL,
+            topic_id INTEGER NOT NULL,
+            bits BLOB NOT NULL,
+            PRIMARY KEY (student_id, topic_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        SELECT student_id, topic_id, question_id FROM student_answers
+        WHERE is_correct = 1
+        ORDER BY student_id, topic_id
+    """)
+    grouped = {}
+    for student_id, topic_id, question_id in cursor.fetchall():
+        grouped.setdefault((student_id, topic_id), []).append(question_id)
+    cursor.executemany("""
+        INSERT INTO completion_bitmaps (student_id, topic_id, bits) VALUES (?, ?, ?)
+    """, [(student_id, topic_id, completion_bits(ids)) for (student_id, topic_id), ids in grouped.items()])
+
+
+# Tables whose rows make up a student's progress; any write to them bumps the
+# student's progress_versions row
+VERSIONED_PROGRESS_TABLES = ('student_answers', 'student_progress', 'aptitude_progress', 'communication_progress')
+
+
+@migration(9, "per-student progress_versions counter for conditional GETs")
+def create_progress_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS progress_versions (
+            student_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for table in VERSIONED_PROGRESS_TABLES:
+        create_progress_version_triggers(cursor, table)
+
+
+def create_progress_version_triggers(cursor, table):
+    for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+            AFTER {event} ON {table}
+            WHEN {row}.student_id IS NOT NULL
+            BEGIN
+                INSERT INTO progress_versions (student_id, version) VALUES ({row}.student_id, 1)
+                ON CONFLICT(student_id) DO UPDATE SET version = version + 1;
+            END
+        """)
+
+
+def problem_ordinal(problem_id):
+    """The number a problem id such as 7, '7' or 'arrays-7' ends in; 1 when it has none."""
+    try:
+        number = int(str(problem_id).split('-')[-1])
+    except ValueError:
+        return 1
+    return number if number > 0 else 1
+
+
+@migration(10, "problem_registry and (topic_id, ordinal) keys on the per-problem progress tables")
+def key_problem_progress_by_topic(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS problem_registry (
+            topic_id INTEGER NOT NULL,
+            problem_id TEXT NOT NULL,
+            ordinal INTEGER NOT NULL,
+            PRIMARY KEY (topic_id, problem_id)
+        ) WITHOUT ROWID
+    """)
+    for table, category in (('aptitude_progress', 'Aptitude'), ('communication_progress', 'Communication')):
+        cursor.execute(f"""
+            CREATE TABLE {table}_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                student_id INTEGER NOT NULL,
+                topic_id INTEGER,
+                ordinal INTEGER,
+                problem_id TEXT NOT NULL,
+                is_completed INTEGER DEFAULT 0,
+                UNIQUE(student_id, topic_id, ordinal)
+            )
+        """)
+        # Old rows only carry the problem id, which is the same '1', '2', ...
+        # in every topic. Recover the topic from the matching student_answers
+        # row when exactly one topic of the category has it; otherwise the
+        # row keeps a NULL topic_id.
+        cursor.execute("""
+            SELECT sa.student_id, sa.question_id, MIN(sa.topic_id), COUNT(*)
+            FROM student_answers sa
+            JOIN progress_topics pt ON pt.topic_id = sa.topic_id
+            WHERE pt.parent_topic = ? AND sa.given_answer IS NOT ?
+            GROUP BY sa.student_id, sa.question_id
+        """, (category, BACKFILLED_ANSWER))
+        answered = {(row[0], row[1]): row[2] for row in cursor.fetchall() if row[3] == 1}
+        cursor.execute(f"SELECT student_id, problem_id, is_completed FROM {table} WHERE student_id IS NOT NULL")
+        rows, registry = [], set()
+        for student_id, problem_id, is_completed in cursor.fetchall():
+            ordinal = problem_ordinal(problem_id)
+            topic_id = answered.get((student_id, ordinal))
+            rows.append((student_id, topic_id, ordinal, problem_id, is_completed))
+            if topic_id is not None:
+                registry.add((topic_id, str(problem_id), ordinal))
+        cursor.executemany(f"""
+            INSERT OR IGNORE INTO {table}_new (student_id, topic_id, ordinal, problem_id, is_completed)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        cursor.executemany("""
+            INSERT OR IGNORE INTO problem_registry (topic_id, problem_id, ordinal) VALUES (?, ?, ?)
+        """, sorted(registry))
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        cursor.execute(f"CREATE INDEX idx_{table}_topic ON {table} (student_id, topic_id, is_completed)")
+        create_progress_version_triggers(cursor, table)
+    # Dropped with the old communication_progress table
+    for name, table, columns in HOT_PATH_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+@migration(11, "daily_activity rollup of completions per student, day and category")
+def create_daily_activity(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_activity (
+            student_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            category TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (student_id, day, category)
+        ) WITHOUT ROWID
+    """)
+    # Every completed answer lands in its UTC day, whichever path wrote it
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS student_answers_daily_activity
+        AFTER INSERT ON student_answers
+        WHEN NEW.is_correct = 1
+        BEGIN
+            INSERT INTO daily_activity (student_id, day, category, completed)
+            VALUES (
+                NEW.student_id,
+                date(COALESCE(NEW.timestamp, 'now')),
+                COALESCE((SELECT parent_topic FROM progress_topics WHERE topic_id = NEW.topic_id), 'Other'),
+                1
+            )
+            ON CONFLICT(student_id, day, category) DO UPDATE SET completed = completed + 1;
+        END
+    """)
+    # Unchecking takes the completion back off the day it was counted on;
+    # a day left with nothing is dropped so it no longer extends a streak
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS student_answers_daily_activity_delete
+        AFTER DELETE ON student_answers
+        WHEN OLD.is_correct = 1
+        BEGIN
+            UPDATE daily_activity SET completed = completed - 1
+            WHERE student_id = OLD.student_id
+              AND day = date(COALESCE(OLD.timestamp, 'now'))
+              AND category = COALESCE((SELECT parent_topic FROM progress_topics WHERE topic_id = OLD.topic_id), 'Other');
+            DELETE FROM daily_activity
+            WHERE student_id = OLD.student_id
+              AND day = date(COALESCE(OLD.timestamp, 'now'))
+              AND completed <= 0;
+        END
+    """)
+    cursor.execute("""
+        INSERT INTO daily_activity (student_id, day, category, completed)
+        SELECT sa.student_id, date(sa.timestamp), COALESCE(pt.parent_topic, 'Other'), COUNT(*)
+        FROM student_answers sa
+        LEFT JOIN progress_topics pt ON pt.topic_id = sa.topic_id
+        WHERE sa.is_correct = 1 AND sa.timestamp IS NOT NULL
+        GROUP BY sa.student_id, date(sa.timestamp), COALESCE(pt.parent_topic, 'Other')
+    """)
+
+
+@migration(12, "student_category_progress rollup maintained from student_progress")
+def create_category_rollup(cursor):
+    # One row per (student, category) with the same sums the admin pages used
+    # to compute per student: completed questions and the question totals of
+    # the topics the student has started
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_category_progress (
+            student_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            percentage REAL GENERATED ALWAYS AS (
+                CASE WHEN total > 0 THEN round(completed * 100.0 / total, 2) ELSE 0 END
+            ) VIRTUAL,
+            PRIMARY KEY (student_id, category)
+        ) WITHOUT ROWID
+    """)
+    add_new = """
+        INSERT INTO student_category_progress (student_id, category, completed, total)
+        SELECT NEW.student_id, pt.parent_topic, COALESCE(NEW.completed_questions, 0), COALESCE(pt.total_questions, 0)
+        FROM progress_topics pt
+        WHERE pt.topic_id = NEW.topic_id AND pt.parent_topic IS NOT NULL
+        ON CONFLICT(student_id, category) DO UPDATE SET
+            completed = completed + excluded.completed,
+            total = total + excluded.total;
+    """
+    remove_old = """
+        UPDATE student_category_progress SET
+            completed = completed - COALESCE(OLD.completed_questions, 0),
+            total = total - COALESCE((SELECT total_questions FROM progress_topics WHERE topic_id = OLD.topic_id), 0)
+        WHERE student_id = OLD.student_id
+          AND category = (SELECT parent_topic FROM progress_topics WHERE topic_id = OLD.topic_id);
+    """
+    # INSERT OR REPLACE does not fire the DELETE trigger, so writers must
+    # upsert student_progress with ON CONFLICT ... DO UPDATE
+    for event, body in (('INSERT', add_new), ('UPDATE', remove_old + add_new), ('DELETE', remove_old)):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS student_progress_category_{event.lower()}
+            AFTER {event} ON student_progress
+            BEGIN
+                {body}
+            END
+        """)
+    # A catalog edit changes the totals of every student who started the topic
+    for event, row in (('UPDATE OF total_questions, parent_topic', 'NEW'), ('DELETE', 'OLD')):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS progress_topics_category_{event.split()[0].lower()}
+            AFTER {event} ON progress_topics
+            BEGIN
+                DELETE FROM student_category_progress
+                WHERE student_id IN (SELECT student_id FROM student_progress WHERE topic_id = {row}.topic_id);
+                INSERT INTO student_category_progress (student_id, category, completed, total)
+                SELECT sp.student_id, pt.parent_topic, SUM(COALESCE(sp.completed_questions, 0)),
+                       SUM(COALESCE(pt.total_questions, 0))
+                FROM student_progress sp
+                JOIN progress_topics pt ON pt.topic_id = sp.topic_id
+                WHERE pt.parent_topic IS NOT NULL
+                  AND sp.student_id IN (SELECT student_id FROM student_progress WHERE topic_id = {row}.topic_id)
+                GROUP BY sp.student_id, pt.parent_topic;
+            END
+        """)
+    cursor.execute("""
+        INSERT INTO student_category_progress (student_id, category, completed, total)
+        SELECT sp.student_id, pt.parent_topic, SUM(COALESCE(sp.completed_questions, 0)),
+               SUM(COALESCE(pt.total_questions, 0))
+        FROM student_progress sp
+        JOIN progress_topics pt ON pt.topic_id = sp.topic_id
+        WHERE pt.parent_topic IS NOT NULL
+        GROUP BY sp.student_id, pt.parent_topic
+        ON CONFLICT(student_id, category) DO UPDATE SET
+            completed = excluded.completed,
+            total = excluded.total
+    """)
+
+
+@migration(13, "a rollup row per student and category, and indexes for sorted admin pages")
+def index_cohort_sorts(cursor):
+    # Keyset pages sorted by a category percentage walk this index, which
+    # only works if every student has a row for every category
+    categories = "('DSA'), ('Communication'), ('Aptitude')"
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO student_category_progress (student_id, category)
+        SELECT s.id, c.column1 FROM students s, (VALUES {categories}) c
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS students_category_insert
+        AFTER INSERT ON students
+        BEGIN
+            INSERT OR IGNORE INTO student_category_progress (student_id, category)
+            SELECT NEW.id, column1 FROM (VALUES {categories});
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS students_category_delete
+        AFTER DELETE ON students
+        BEGIN
+            DELETE FROM student_category_progress WHERE student_id = OLD.id;
+        END
+    """)
+    # Re-total in place instead of deleting, so untouched categories keep their row
+    for event, row in (('UPDATE OF total_questions, parent_topic', 'NEW'), ('DELETE', 'OLD')):
+        name = f"progress_topics_category_{event.split()[0].lower()}"
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(f"""
+            CREATE TRIGGER {name}
+            AFTER {event} ON progress_topics
+            BEGIN
+                UPDATE student_category_progress SET completed = 0, total = 0
+                WHERE student_id IN (SELECT student_id FROM student_progress WHERE topic_id = {row}.topic_id);
+                INSERT INTO student_category_progress (student_id, category, completed, total)
+                SELECT sp.student_id, pt.parent_topic, SUM(COALESCE(sp.completed_questions, 0)),
+                       SUM(COALESCE(pt.total_questions, 0))
+                FROM student_progress sp
+                JOIN progress_topics pt ON pt.topic_id = sp.topic_id
+                WHERE pt.parent_topic IS NOT NULL
+                  AND sp.student_id IN (SELECT student_id FROM student_progress WHERE topic_id = {row}.topic_id)
+                GROUP BY sp.student_id, pt.parent_topic
+                ON CONFLICT(student_id, category) DO UPDATE SET
+                    completed = excluded.completed,
+                    total = excluded.total;
+            END
+        """)
+    # Row-value seeks need a plain column, and department is nullable
+    cursor.execute("""
+        ALTER TABLE students ADD COLUMN department_key TEXT
+        GENERATED ALWAYS AS (COALESCE(department, '')) VIRTUAL
+    """)
+    for name, table, columns in COHORT_SORT_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+@migration(14, "students_fts full-text index over student name, email, department and id")
+def create_student_search(cursor):
+    # External content: the index stores only tokens and reads rows back from students
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+            name, email, department, id,
+            content='students', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+        )
+    """)
+    new_row = "NEW.id, NEW.name, NEW.email, NEW.department, NEW.id"
+    old_row = "'delete', OLD.id, OLD.name, OLD.email, OLD.department, OLD.id"
+    for event, body in (
+        ('INSERT', f"INSERT INTO students_fts (rowid, name, email, department, id) VALUES ({new_row});"),
+        ('DELETE', f"INSERT INTO students_fts (students_fts, rowid, name, email, department, id) VALUES ({old_row});"),
+        ('UPDATE OF id, name, email, department',
+         f"INSERT INTO students_fts (students_fts, rowid, name, email, department, id) VALUES ({old_row});\n"
+         f"INSERT INTO students_fts (rowid, name, email, department, id) VALUES ({new_row});"),
+    ):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS students_fts_{event.split()[0].lower()}
+            AFTER {event} ON students
+            BEGIN
+                {body}
+            END
+        """)
+    cursor.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+    # bm25 weights of name, email, department and id
+    cursor.execute("INSERT INTO students_fts (students_fts, rank) VALUES ('rank', 'bm25(10.0, 4.0, 1.0, 2.0)')")
+
+
+def facet_delta(sign, department, year, category, percentage, source):
+    """Trigger statements adding (sign '') or removing (sign '-') rows of source from the facets."""
+    return f"""
+        INSERT INTO cohort_facets (department_key, graduation_year, category, students, percentage_sum)
+        SELECT {department}, COALESCE({year}, 0), {category}, {sign}1,
+               {sign}CAST(round({percentage} * 100) AS INTEGER)
+        {source}
+        ON CONFLICT(department_key, graduation_year, category) DO UPDATE SET
+            students = students + excluded.students,
+            percentage_sum = percentage_sum + excluded.percentage_sum;
+        INSERT INTO cohort_facet_buckets (department_key, graduation_year, category, bucket, students)
+        SELECT {department}, COALESCE({year}, 0), {category},
+               MIN(MAX(CAST({percentage} AS INTEGER), 0), 100), {sign}1
+        {source}
+        ON CONFLICT(department_key, graduation_year, category, bucket) DO UPDATE SET
+            students = students + excluded.students;
+    """
+
+
+@migration(15, "cohort_facets: student counts and progress per department, graduation year and category")
+def create_cohort_facets(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cohort_facets (
+            department_key TEXT NOT NULL,
+            graduation_year INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            students INTEGER NOT NULL DEFAULT 0,
+            -- Sum of the students' percentages in hundredths, so it never drifts
+            percentage_sum INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (department_key, graduation_year, category)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cohort_facet_buckets (
+            department_key TEXT NOT NULL,
+            graduation_year INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            students INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (department_key, graduation_year, category, bucket)
+        ) WITHOUT ROWID
+    """)
+
+    def student_row(row):
+        return facet_delta('-' if row == 'OLD' else '', 's.department_key', 's.graduation_year',
+                           f'{row}.category', f'{row}.percentage',
+                           f'FROM students s WHERE s.id = {row}.student_id')
+
+    def rollup_rows(row):
+        return facet_delta('-' if row == 'OLD' else '', f'{row}.department_key', f'{row}.graduation_year',
+                           'scp.category', 'scp.percentage',
+                           f'FROM student_category_progress scp WHERE scp.student_id = {row}.id')
+
+    triggers = {
+        'student_category_progress_facets_insert': (
+            "AFTER INSERT ON student_category_progress", student_row('NEW')),
+        'student_category_progress_facets_update': (
+            "AFTER UPDATE OF completed, total ON student_category_progress "
+            "WHEN OLD.percentage IS NOT NEW.percentage", student_row('OLD') + student_row('NEW')),
+        # A no-op when the student row is already gone; see students_facets_delete
+        'student_category_progress_facets_delete': (
+            "AFTER DELETE ON student_category_progress", student_row('OLD')),
+        # BEFORE, so the student's rollup rows and department are still readable
+        'students_facets_delete': ("BEFORE DELETE ON students", rollup_rows('OLD')),
+        'students_facets_update': (
+            "AFTER UPDATE OF department, graduation_year ON students", rollup_rows('OLD') + rollup_rows('NEW')),
+    }
+    for name, (event, body) in triggers.items():
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name}
+            {event}
+            BEGIN
+                {body}
+            END
+        """)
+    cursor.execute("""
+        INSERT INTO cohort_facets (department_key, graduation_year, category, students, percentage_sum)
+        SELECT s.department_key, COALESCE(s.graduation_year, 0), scp.category,
+               COUNT(*), SUM(CAST(round(scp.percentage * 100) AS INTEGER))
+        FROM student_category_progress scp
+        JOIN students s ON s.id = scp.student_id
+        GROUP BY 1, 2, 3
+    """)
+    cursor.execute("""
+        INSERT INTO cohort_facet_buckets (department_key, graduation_year, category, bucket, students)
+        SELECT s.department_key, COALESCE(s.graduation_year, 0), scp.category,
+               MIN(MAX(CAST(scp.percentage AS INTEGER), 0), 100), COUNT(*)
+        FROM student_category_progress scp
+        JOIN students s ON s.id = scp.student_id
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+@migration(16, "progress_versions.change_seq: commit order of progress changes for incremental readers")
+def add_progress_change_seq(cursor):
+    # version counts one student's changes; change_seq orders every student's
+    # latest change, so a reader can fetch everything newer than what it holds
+    cursor.execute("ALTER TABLE progress_versions ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_progress_versions_change_seq ON progress_versions (change_seq)")
+    for event in ('INSERT', 'UPDATE OF version'):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS progress_versions_change_seq_{event.split()[0].lower()}
+            AFTER {event} ON progress_versions
+            BEGIN
+                UPDATE progress_versions
+                SET change_seq = (SELECT COALESCE(MAX(change_seq), 0) + 1 FROM progress_versions)
+                WHERE student_id = NEW.student_id;
+            END
+        """)
+
+
+@migration(17, "report_snapshots: precomputed admin reports served stale-while-revalidate")
+def create_report_snapshots(cursor):
+    # payload is NULL until the first build; lease_until marks a build in
+    # progress so that only one worker runs it
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS report_snapshots (
+            name TEXT PRIMARY KEY,
+            payload TEXT,
+            fragment TEXT,
+            generated_at REAL,
+            duration_ms REAL,
+            completions INTEGER NOT NULL DEFAULT 0,
+            lease_until REAL
+        )
+    """)
+
+
+# Shapes of the placement tables in the deployed database; created here
+# for databases that were never set up with them
+PLACEMENT_TABLES = {
+    'companies': """
+        company_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        email TEXT NOT NULL UNIQUE,
+        phone TEXT NOT NULL UNIQUE,
+        password TEXT NOT NULL
+    """,
+    'jobs': """
+        job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        company_id INTEGER,
+        job_title TEXT NOT NULL,
+        job_description TEXT,
+        required_skills TEXT,
+        salary REAL DEFAULT NULL,
+        deadline TEXT DEFAULT NULL,
+        FOREIGN KEY (company_id) REFERENCES companies(company_id) ON DELETE CASCADE
+    """,
+    'applications': """
+        application_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER,
+        usn TEXT,
+        status TEXT CHECK(status IN ('Applied', 'Under Review', 'Rejected', 'Accepted')) DEFAULT 'Applied',
+        applied_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (job_id) REFERENCES jobs (job_id) ON DELETE CASCADE
+    """,
+    'interviews': """
+        interview_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        application_id INTEGER,
+        interview_date TEXT DEFAULT NULL,
+        interview_status TEXT CHECK(interview_status IN ('Scheduled', 'Completed', 'Cancelled')) DEFAULT 'Scheduled',
+        FOREIGN KEY (application_id) REFERENCES applications(application_id) ON DELETE CASCADE
+    """,
+    'job_offers': """
+        offer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER,
+        usn TEXT,
+        offer_status TEXT CHECK(offer_status IN ('Pending', 'Accepted', 'Declined')) DEFAULT 'Pending',
+        offer_date TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (job_id) REFERENCES jobs(job_id) ON DELETE CASCADE
+    """
+}
+
+PLACEMENT_INDEXES = (
+    ('idx_jobs_company', 'jobs', 'company_id'),
+    ('idx_applications_job_usn', 'applications', 'job_id, usn'),
+    ('idx_interviews_application', 'interviews', 'application_id, interview_status'),
+    ('idx_job_offers_job_usn', 'job_offers', 'job_id, usn, offer_status'),
+)
+
+
+# Stage flags of the applications row being updated
+APPLICATION_INTERVIEWED = """EXISTS (
+    SELECT 1 FROM interviews i
+    WHERE i.application_id = applications.application_id AND i.interview_status IS NOT 'Cancelled'
+)"""
+APPLICATION_OFFERED = """EXISTS (
+    SELECT 1 FROM job_offers jo WHERE jo.job_id = applications.job_id AND jo.usn = applications.usn
+)"""
+APPLICATION_ACCEPTED = """EXISTS (
+    SELECT 1 FROM job_offers jo
+    WHERE jo.job_id = applications.job_id AND jo.usn = applications.usn AND jo.offer_status = 'Accepted'
+)"""
+
+
+def funnel_delta(sign, row):
+    """Trigger statement adding (sign '') or removing (sign '-') one application from placement_funnel."""
+    return f"""
+        INSERT INTO placement_funnel (job_id, applied, interviewed, offered, accepted)
+        VALUES (COALESCE({row}.job_id, 0), {sign}1, {sign}{row}.interviewed, {sign}{row}.offered, {sign}{row}.accepted)
+        ON CONFLICT(job_id) DO UPDATE SET
+            applied = applied + excluded.applied,
+            interviewed = interviewed + excluded.interviewed,
+            offered = offered + excluded.offered,
+            accepted = accepted + excluded.accepted;
+    """
+
+
+@migration(18, "per-application funnel stages and the placement_funnel rollup")
+def create_placement_funnel(cursor):
+    for table, columns in PLACEMENT_TABLES.items():
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+    cursor.execute("PRAGMA table_info(applications)")
+    existing = {row[1] for row in cursor.fetchall()}
+    for column, definition in (
+        ('interviewed', 'INTEGER NOT NULL DEFAULT 0'),
+        ('offered', 'INTEGER NOT NULL DEFAULT 0'),
+        ('accepted', 'INTEGER NOT NULL DEFAULT 0'),
+    ):
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE applications ADD COLUMN {column} {definition}")
+    for name, table, columns in PLACEMENT_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS placement_funnel (
+            job_id INTEGER PRIMARY KEY,
+            applied INTEGER NOT NULL DEFAULT 0,
+            interviewed INTEGER NOT NULL DEFAULT 0,
+            offered INTEGER NOT NULL DEFAULT 0,
+            accepted INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    def application_stages(condition):
+        return f"""
+            UPDATE applications SET
+                interviewed = {APPLICATION_INTERVIEWED},
+                offered = {APPLICATION_OFFERED},
+                accepted = {APPLICATION_ACCEPTED}
+            WHERE {condition};
+        """
+
+    def offer_stages(row):
+        return application_stages(f"job_id = {row}.job_id AND usn = {row}.usn")
+
+    triggers = {
+        # The stage updates below move the funnel through applications_funnel_update
+        'applications_funnel_insert': ("AFTER INSERT ON applications", funnel_delta('', 'NEW')),
+        'applications_funnel_delete': ("AFTER DELETE ON applications", funnel_delta('-', 'OLD')),
+        'applications_funnel_update': (
+            "AFTER UPDATE OF job_id, interviewed, offered, accepted ON applications",
+            funnel_delta('-', 'OLD') + funnel_delta('', 'NEW')),
+        'applications_stages_insert': (
+            "AFTER INSERT ON applications", application_stages("application_id = NEW.application_id")),
+        'applications_stages_update': (
+            "AFTER UPDATE OF job_id, usn ON applications", application_stages("application_id = NEW.application_id")),
+        'interviews_stages_insert': (
+            "AFTER INSERT ON interviews", application_stages("application_id = NEW.application_id")),
+        'interviews_stages_update': (
+            "AFTER UPDATE ON interviews",
+            application_stages("application_id IN (OLD.application_id, NEW.application_id)")),
+        'interviews_stages_delete': (
+            "AFTER DELETE ON interviews", application_stages("application_id = OLD.application_id")),
+        'job_offers_stages_insert': ("AFTER INSERT ON job_offers", offer_stages('NEW')),
+        'job_offers_stages_update': ("AFTER UPDATE ON job_offers", offer_stages('OLD') + offer_stages('NEW')),
+        'job_offers_stages_delete': ("AFTER DELETE ON job_offers", offer_stages('OLD')),
+    }
+    for name, (event, body) in triggers.items():
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {name}
+            {event}
+            BEGIN
+                {body}
+            END
+        """)
+    cursor.execute(application_stages("1 = 1"))
+    cursor.execute("""
+        INSERT INTO placement_funnel (job_id, applied, interviewed, offered, accepted)
+        SELECT COALESCE(job_id, 0), COUNT(*), SUM(interviewed), SUM(offered), SUM(accepted)
+        FROM applications
+        GROUP BY 1
+    """)
+
+
+def ensure_version_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def current_version(conn):
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(database=None, target=None):
+    """Apply every pending migration up to target and return their versions."""
+    conn = sqlite3.connect(database or sqlite_config['database'], timeout=60, isolation_level=None)
+    applied = []
+    try:
+        ensure_version_table(conn)
+        for version, description, func in sorted(MIGRATIONS, key=lambda m: m[0]):
+            if target is not None and version > target:
+                break
+            if version <= current_version(conn):
+                continue
+            # IMMEDIATE takes the write lock up front, so two workers starting
+            # together cannot both apply the same migration
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if version <= current_version(conn):
+                    conn.execute("ROLLBACK")
+                    continue
+                func(conn.cursor())
+                conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (version, description)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied.append(version)
+            print(f"Applied migration {version}: {description}")
+    finally:
+        conn.close()
+    return applied
+
+
+def status(database=None):
+    conn = sqlite3.connect(database or sqlite_config['database'])
+    try:
+        ensure_version_table(conn)
+        applied = {row[0]: row[1] for row in conn.execute("SELECT version, applied_at FROM schema_version")}
+    finally:
+        conn.close()
+    return [
+        (version, description, applied.get(version))
+        for version, description, _ in sorted(MIGRATIONS, key=lambda m: m[0])
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    parser.add_argument('--database', help='SQLite file (default: config.sqlite_config)')
+    parser.add_argument('--target', type=int, help='stop after this version')
+    parser.add_argument('--status', action='store_true', help='list migrations without applying them')
+    args = parser.parse_args()
+
+    if args.status:
+        for version, description, applied_at in status(args.database):
+            print(f"{version:>4}  {'applied ' + str(applied_at) if applied_at else 'pending':<28}  {description}")
+        return
+
+    applied = migrate(args.database, args.target)
+    if not applied:
+        print("Schema is up to date.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Applied -> interviewed -> offered -> accepted funnel of the placement tables.
+
+Every application carries its own stage flags, kept current by triggers
+on interviews, job_offers and applications itself:
+
+    interviewed  an interview that was not cancelled
+    offered      a job offer for the same job and USN
+    accepted     such an offer with status 'Accepted'
+
+placement_funnel holds the counts per job. Triggers on applications apply
+every insert, delete and stage change as a delta, so a funnel per company
+or job reads one row per job however many applications there are.
+
+Applications identify the student by USN only, which students does not
+store, so there is no per-department funnel yet.
+"""
+STAGES = ('applied', 'interviewed', 'offered', 'accepted')
+
+# Stage flags of the applications row being updated
+INTERVIEWED = """EXISTS (
+    SELECT 1 FROM interviews i
+    WHERE i.application_id = applications.application_id AND i.interview_status IS NOT 'Cancelled'
+)"""
+OFFERED = """EXISTS (
+    SELECT 1 FROM job_offers jo WHERE jo.job_id = applications.job_id AND jo.usn = applications.usn
+)"""
+ACCEPTED = """EXISTS (
+    SELECT 1 FROM job_offers jo
+    WHERE jo.job_id = applications.job_id AND jo.usn = applications.usn AND jo.offer_status = 'Accepted'
+)"""
+
+# by -> (selected columns, their result keys, GROUP BY)
+GROUPINGS = {
+    'company': ("c.company_id, c.name", ('company_id', 'company'), "c.company_id"),
+    'job': ("j.job_id, c.company_id, c.name, j.job_title", ('job_id', 'company_id', 'company', 'job_title'), "f.job_id")
+}
+
+
+def rebuild(cursor):
+    """Recompute every application's stage flags and the funnel counts."""
+    cursor.execute(f"""
+        UPDATE applications SET
+            interviewed = {INTERVIEWED},
+            offered = {OFFERED},
+            accepted = {ACCEPTED}
+    """)
+    cursor.execute("DELETE FROM placement_funnel")
+    cursor.execute("""
+        INSERT INTO placement_funnel (job_id, applied, interviewed, offered, accepted)
+        SELECT COALESCE(job_id, 0), COUNT(*), SUM(interviewed), SUM(offered), SUM(accepted)
+        FROM applications
+        GROUP BY 1
+    """)
+
+
+def funnel_filter(company_id):
+    if company_id is None:
+        return "", []
+    return " AND j.company_id = ?", [company_id]
+
+
+def stage_counts(counts):
+    """{stage: count} plus each stage's share of the applications, in percent."""
+    result = dict(zip(STAGES, counts))
+    result['rates'] = {
+        stage: round(result[stage] * 100 / result['applied'], 2) if result['applied'] else 0
+        for stage in STAGES[1:]
+    }
+    return result
+
+
+def funnel(cursor, by=None, company_id=None):
+    """The whole funnel, or one funnel per company or job (by)."""
+    condition, params = funnel_filter(company_id)
+    if by is None:
+        cursor.execute(f"""
+            SELECT COALESCE(SUM(f.applied), 0), COALESCE(SUM(f.interviewed), 0),
+                   COALESCE(SUM(f.offered), 0), COALESCE(SUM(f.accepted), 0)
+            FROM placement_funnel f
+            LEFT JOIN jobs j ON j.job_id = f.job_id
+            WHERE 1 = 1 {condition}
+        """, params)
+        return stage_counts(cursor.fetchone())
+
+    columns, keys, group_by = GROUPINGS[by]
+    cursor.execute(f"""
+        SELECT {columns}, SUM(f.applied), SUM(f.interviewed), SUM(f.offered), SUM(f.accepted)
+        FROM placement_funnel f
+        LEFT JOIN jobs j ON j.job_id = f.job_id
+        LEFT JOIN companies c ON c.company_id = j.company_id
+        WHERE 1 = 1 {condition}
+        GROUP BY {group_by}
+        HAVING SUM(f.applied) > 0
+        ORDER BY SUM(f.applied) DESC, {group_by}
+    """, params)
+    groups = []
+    for row in cursor.fetchall():
+        group = dict(zip(keys, row[:len(keys)]))
+        group.update(stage_counts(row[len(keys):]))
+        groups.append(group)
+    return groups
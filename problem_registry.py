@@ -0,0 +1,96 @@
+"""Canonical (topic_id, ordinal) keys for practice problems.
+
+The practice pages send a topic_id with a free-form problem id ('7',
+'arrays-7', 'two-sum'). problem_registry gives each (topic_id, problem_id)
+its own ordinal the first time it is seen: the number the id ends in while
+no other problem of the topic holds it, so numbered problems keep lining up
+with their student_answers rows, and otherwise the topic's next free
+ordinal. aptitude_progress / communication_progress store that
+(topic_id, ordinal) pair as indexed integer columns, so counting a topic's
+completed problems is an equality lookup.
+"""
+# Category -> per-problem completion table
+PROBLEM_TABLES = {
+    'Aptitude': 'aptitude_progress',
+    'Communication': 'communication_progress'
+}
+
+
+def problem_number(problem_id):
+    """The number a problem id ends in (7, '7', 'arrays-7'), or None."""
+    try:
+        number = int(str(problem_id).split('-')[-1])
+    except ValueError:
+        return None
+    return number if number > 0 else None
+
+
+def resolve(cursor, topic_id, problem_id):
+    """(topic_id, ordinal) for a problem id, registering it on first sight.
+
+    Registration is a single INSERT ... SELECT in the caller's write
+    transaction, so two problems first seen at the same time cannot be
+    given the same ordinal. Ordinals depend on what the database already
+    holds, so they are looked up rather than cached in the process: a
+    rolled-back registration must not leave a stale ordinal behind.
+    """
+    topic_id, problem_id = int(topic_id), str(problem_id)
+    cursor.execute("""
+        SELECT ordinal FROM problem_registry WHERE topic_id = ? AND problem_id = ?
+    """, (topic_id, problem_id))
+    row = cursor.fetchone()
+    if row:
+        return topic_id, row[0]
+
+    number = problem_number(problem_id)
+    cursor.execute("""
+        INSERT OR IGNORE INTO problem_registry (topic_id, problem_id, ordinal)
+        SELECT :topic_id, :problem_id, CASE
+            WHEN :number IS NOT NULL AND NOT EXISTS (
+                SELECT 1 FROM problem_registry WHERE topic_id = :topic_id AND ordinal = :number
+            ) THEN :number
+            ELSE (SELECT COALESCE(MAX(ordinal), 0) + 1 FROM problem_registry WHERE topic_id = :topic_id)
+        END
+    """, {'topic_id': topic_id, 'problem_id': problem_id, 'number': number})
+    cursor.execute("""
+        SELECT ordinal FROM problem_registry WHERE topic_id = ? AND problem_id = ?
+    """, (topic_id, problem_id))
+    return topic_id, cursor.fetchone()[0]
+
+
+def mark_problem(cursor, category, student_id, topic_id, problem_id, is_completed=1):
+    """Set one problem's completion flag; returns its (topic_id, ordinal)."""
+    topic_id, ordinal = resolve(cursor, topic_id, problem_id)
+    cursor.execute(f"""
+        INSERT INTO {PROBLEM_TABLES[category]} (student_id, topic_id, ordinal, problem_id, is_completed)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(student_id, topic_id, ordinal) DO UPDATE SET
+            problem_id = excluded.problem_id,
+            is_completed = excluded.is_completed
+    """, (student_id, topic_id, ordinal, str(problem_id), is_completed))
+    return topic_id, ordinal
+
+
+def count_completed(cursor, category, student_id, topic_id):
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM {PROBLEM_TABLES[category]}
+        WHERE student_id = ? AND topic_id = ? AND is_completed = 1
+    """, (student_id, topic_id))
+    return cursor.fetchone()[0]
+
+
+def completion_map(cursor, category, student_id):
+    """{topic_id: {ordinal: completed}} as strings, for JSON.
+
+    Rows migrated from before topic keys whose topic could not be recovered
+    are listed under 'unassigned'.
+    """
+    cursor.execute(f"""
+        SELECT topic_id, ordinal, is_completed FROM {PROBLEM_TABLES[category]}
+        WHERE student_id = ?
+    """, (student_id,))
+    result = {}
+    for topic_id, ordinal, is_completed in cursor.fetchall():
+        key = str(topic_id) if topic_id is not None else 'unassigned'
+        result.setdefault(key, {})[str(ordinal)] = bool(is_completed)
+    return result
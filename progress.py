@@ -0,0 +1,581 @@
+"""Student progress queries shared by the progress endpoints."""
+import base64
+import json
+
+import bitmaps
+import problem_registry
+import student_search
+from topic_catalog import CATEGORIES
+
+
+def completed_by_topic(cursor, student_id):
+    """Map topic_id -> completed answers for one student, in a single query."""
+    cursor.execute("""
+        SELECT topic_id, COUNT(*) FROM student_answers
+        WHERE student_id = ? AND is_correct = 1
+        GROUP BY topic_id
+    """, (student_id,))
+    return {topic_id: completed for topic_id, completed in cursor.fetchall()}
+
+
+def category_progress(cursor, student_id, catalog):
+    """Percentage complete per category plus the total completed count."""
+    completed_by_category = {category: 0 for category in CATEGORIES}
+    total_completed = 0
+    for topic_id, completed in completed_by_topic(cursor, student_id).items():
+        parent_topic = catalog.parent_of(topic_id)
+        if parent_topic is None:
+            continue
+        if parent_topic in completed_by_category:
+            completed_by_category[parent_topic] += completed
+        total_completed += completed
+
+    progress_data = {}
+    for category in CATEGORIES:
+        total = catalog.category_totals[category]
+        if total > 0:
+            progress_data[category] = round(completed_by_category[category] / total * 100, 2)
+        else:
+            progress_data[category] = 0
+    progress_data['total_completed'] = total_completed
+    return progress_data
+
+
+def progress_version(cursor, user_id):
+    """(student_id, progress version) for a user, or None if not a student.
+
+    Triggers bump progress_versions on every write to the progress tables,
+    so a student whose version is unchanged has unchanged progress.
+    """
+    cursor.execute("""
+        SELECT s.id, COALESCE(pv.version, 0) FROM students s
+        LEFT JOIN progress_versions pv ON pv.student_id = s.id
+        WHERE s.user_id = ?
+    """, (user_id,))
+    return cursor.fetchone()
+
+
+# Per-student category counters kept next to student_progress
+OVERALL_TABLES = {
+    'DSA': 'dsa_overall_progress',
+    'Aptitude': 'aptitude_overall_progress',
+    'Communication': 'communication_overall_progress'
+}
+
+
+def record_completion(cursor, student_id, topic_id, question_id, catalog, given_answer='completed'):
+    """Record one completed question and move the counters if it is new.
+
+    The answer insert is a single statement against the
+    UNIQUE(student_id, question_id, topic_id) constraint: it returns the new
+    row only when it added one, so concurrent duplicate clicks cannot both
+    count. The counters in student_progress and the *_overall_progress
+    tables are only incremented for that row, so a completion costs the
+    same however many answers the student already has.
+    Returns (added, completed questions in the topic).
+    """
+    cursor.execute("""
+        INSERT INTO student_answers
+        (student_id, question_id, topic_id, given_answer, is_correct)
+        VALUES (?, ?, ?, ?, 1)
+        ON CONFLICT(student_id, question_id, topic_id) DO NOTHING
+        RETURNING answer_id
+    """, (student_id, question_id, topic_id, given_answer))
+    added = cursor.fetchone() is not None
+
+    topic_total = catalog.total_for(topic_id) or 10
+    if not added:
+        cursor.execute("""
+            SELECT completed_questions FROM student_progress
+            WHERE student_id = ? AND topic_id = ?
+        """, (student_id, topic_id))
+        row = cursor.fetchone()
+        return False, row[0] if row else 0
+
+    bitmaps.mark(cursor, student_id, topic_id, [question_id])
+    cursor.execute("""
+        INSERT INTO student_progress
+        (student_id, topic_id, completed_questions, total_questions, is_completed, last_updated)
+        VALUES (?, ?, 1, ?, 1 >= ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(student_id, topic_id) DO UPDATE SET
+            completed_questions = completed_questions + 1,
+            total_questions = excluded.total_questions,
+            is_completed = completed_questions + 1 >= excluded.total_questions,
+            last_updated = CURRENT_TIMESTAMP
+        RETURNING completed_questions
+    """, (student_id, topic_id, topic_total, topic_total))
+    completed_questions = cursor.fetchone()[0]
+
+    parent_topic = catalog.parent_of(topic_id)
+    if parent_topic in OVERALL_TABLES:
+        category_total = catalog.category_totals[parent_topic] or 10
+        cursor.execute(f"""
+            INSERT INTO {OVERALL_TABLES[parent_topic]}
+            (student_id, completed_questions, total_questions, is_completed, last_updated)
+            VALUES (?, 1, ?, 1 >= ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(student_id) DO UPDATE SET
+                completed_questions = completed_questions + 1,
+                total_questions = excluded.total_questions,
+                is_completed = completed_questions + 1 >= excluded.total_questions,
+                last_updated = CURRENT_TIMESTAMP
+        """, (student_id, category_total, category_total))
+
+    return True, completed_questions
+
+
+def remove_completion(cursor, student_id, topic_id, question_id, catalog):
+    """Undo one completed question and move the counters back if it was recorded.
+
+    The mirror of record_completion: the student_answers delete returns the
+    row only when there was one to remove, and only then is its bit cleared
+    and, where the topic has a student_progress row, the topic and category
+    counters decremented. The daily_activity trigger takes it off its day.
+    Returns (removed, completed questions in the topic).
+    """
+    cursor.execute("""
+        DELETE FROM student_answers
+        WHERE student_id = ? AND question_id = ? AND topic_id = ?
+        RETURNING answer_id
+    """, (student_id, question_id, topic_id))
+    removed = cursor.fetchone() is not None
+    if removed:
+        bitmaps.unmark(cursor, student_id, topic_id, [question_id])
+
+    cursor.execute("""
+        SELECT completed_questions FROM student_progress
+        WHERE student_id = ? AND topic_id = ?
+    """, (student_id, topic_id))
+    row = cursor.fetchone()
+    if not removed or row is None:
+        return removed, row[0] if row else 0
+
+    cursor.execute("""
+        UPDATE student_progress SET
+            completed_questions = MAX(completed_questions - 1, 0),
+            is_completed = completed_questions - 1 >= total_questions,
+            last_updated = CURRENT_TIMESTAMP
+        WHERE student_id = ? AND topic_id = ?
+        RETURNING completed_questions
+    """, (student_id, topic_id))
+    completed_questions = cursor.fetchone()[0]
+
+    parent_topic = catalog.parent_of(topic_id)
+    if parent_topic in OVERALL_TABLES:
+        cursor.execute(f"""
+            UPDATE {OVERALL_TABLES[parent_topic]} SET
+                completed_questions = MAX(completed_questions - 1, 0),
+                is_completed = completed_questions - 1 >= total_questions,
+                last_updated = CURRENT_TIMESTAMP
+            WHERE student_id = ?
+        """, (student_id,))
+
+    return True, completed_questions
+
+
+# Rows per multi-row INSERT; 4 parameters each keeps well under SQLite's limit
+BATCH_CHUNK = 500
+
+
+def record_completions(cursor, student_id, completions, catalog, given_answer='completed'):
+    """Record many (topic_id, question_id) completions with set-based writes.
+
+    New answers are inserted with multi-row INSERT ... ON CONFLICT DO NOTHING
+    RETURNING, so
+    only rows that were actually added come back; the topic and category
+    counters are then moved once per topic and once per category.
+    Returns {topic_id: number of new completions}.
+    """
+    completions = list(dict.fromkeys((int(t), int(q)) for t, q in completions))
+    added_questions = {}
+    for start in range(0, len(completions), BATCH_CHUNK):
+        chunk = completions[start:start + BATCH_CHUNK]
+        values = ', '.join(['(?, ?, ?, ?, 1)'] * len(chunk))
+        params = [value for topic_id, question_id in chunk
+                  for value in (student_id, question_id, topic_id, given_answer)]
+        cursor.execute(f"""
+            INSERT INTO student_answers
+            (student_id, question_id, topic_id, given_answer, is_correct)
+            VALUES {values}
+            ON CONFLICT(student_id, question_id, topic_id) DO NOTHING
+            RETURNING topic_id, question_id
+        """, params)
+        for topic_id, question_id in cursor.fetchall():
+            added_questions.setdefault(topic_id, []).append(question_id)
+
+    for topic_id, question_ids in added_questions.items():
+        bitmaps.mark(cursor, student_id, topic_id, question_ids)
+    added_by_topic = {topic_id: len(question_ids) for topic_id, question_ids in added_questions.items()}
+
+    topic_rows = []
+    for topic_id, added in added_by_topic.items():
+        topic_total = catalog.total_for(topic_id) or 10
+        topic_rows.append((student_id, topic_id, added, topic_total, added, topic_total))
+    cursor.executemany("""
+        INSERT INTO student_progress
+        (student_id, topic_id, completed_questions, total_questions, is_completed, last_updated)
+        VALUES (?, ?, ?, ?, ? >= ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(student_id, topic_id) DO UPDATE SET
+            completed_questions = completed_questions + excluded.completed_questions,
+            total_questions = excluded.total_questions,
+            is_completed = completed_questions + excluded.completed_questions >= excluded.total_questions,
+            last_updated = CURRENT_TIMESTAMP
+    """, topic_rows)
+
+    added_by_category = {}
+    for topic_id, added in added_by_topic.items():
+        parent_topic = catalog.parent_of(topic_id)
+        if parent_topic in OVERALL_TABLES:
+            added_by_category[parent_topic] = added_by_category.get(parent_topic, 0) + added
+    for parent_topic, added in added_by_category.items():
+        category_total = catalog.category_totals[parent_topic] or 10
+        cursor.execute(f"""
+            INSERT INTO {OVERALL_TABLES[parent_topic]}
+            (student_id, completed_questions, total_questions, is_completed, last_updated)
+            VALUES (?, ?, ?, ? >= ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(student_id) DO UPDATE SET
+                completed_questions = completed_questions + excluded.completed_questions,
+                total_questions = excluded.total_questions,
+                is_completed = completed_questions + excluded.completed_questions >= excluded.total_questions,
+                last_updated = CURRENT_TIMESTAMP
+        """, (student_id, added, category_total, added, category_total))
+
+    return added_by_topic
+
+
+def topic_progress(cursor, student_id, topic_ids, catalog):
+    """Completed / total / percent for the given topics, in one query."""
+    topic_ids = list(dict.fromkeys(int(topic_id) for topic_id in topic_ids))
+    if not topic_ids:
+        return {}
+    placeholders = ', '.join('?' * len(topic_ids))
+    cursor.execute(f"""
+        SELECT topic_id, completed_questions FROM student_progress
+        WHERE student_id = ? AND topic_id IN ({placeholders})
+    """, (student_id, *topic_ids))
+    completed = dict(cursor.fetchall())
+    result = {}
+    for topic_id in topic_ids:
+        total = catalog.total_for(topic_id) or 10
+        done = completed.get(topic_id, 0) or 0
+        result[topic_id] = {
+            'completed': done,
+            'total': total,
+            'percent': round(done / total * 100) if total > 0 else 0,
+            'parent_topic': catalog.parent_of(topic_id) or 'Unknown'
+        }
+    return result
+
+
+# Sections /progress_snapshot can return
+SNAPSHOT_FIELDS = ('categories', 'topics', 'problems', 'aptitude', 'communication')
+
+
+def snapshot(cursor, student_id, catalog, fields=SNAPSHOT_FIELDS):
+    """The requested progress sections for one student.
+
+    Run it inside one read transaction so every section reflects the same
+    committed state. Topic ids are returned as strings, matching JSON keys.
+    """
+    result = {}
+    if 'categories' in fields:
+        result['categories'] = category_progress(cursor, student_id, catalog)
+    if 'topics' in fields:
+        topics = topic_progress(cursor, student_id, catalog.topics, catalog)
+        result['topics'] = {str(topic_id): topic for topic_id, topic in topics.items()}
+    if 'problems' in fields:
+        result['problems'] = {
+            str(topic_id): bitmaps.members(bits)
+            for topic_id, bits in bitmaps.load_bitmaps(cursor, student_id).items()
+        }
+    for section, category in (('aptitude', 'Aptitude'), ('communication', 'Communication')):
+        if section in fields:
+            result[section] = problem_registry.completion_map(cursor, category, student_id)
+    return result
+
+
+def find_counter_drift(cursor, catalog, student_id=None):
+    """Compare the maintained counters with a full recount of student_answers.
+
+    Returns a list of (table, student_id, topic_id or category, stored, actual)
+    for every counter that disagrees.
+    """
+    student_filter = "AND student_id = ?" if student_id is not None else ""
+    params = (student_id,) if student_id is not None else ()
+    drift = []
+
+    cursor.execute(f"""
+        SELECT student_id, topic_id, COUNT(*) FROM student_answers
+        WHERE is_correct = 1 {student_filter}
+        GROUP BY student_id, topic_id
+    """, params)
+    actual_topics = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+    cursor.execute(f"""
+        SELECT student_id, topic_id, completed_questions FROM student_progress
+        WHERE 1 = 1 {student_filter}
+    """, params)
+    stored_topics = {(row[0], row[1]): row[2] or 0 for row in cursor.fetchall()}
+    for key in sorted(set(actual_topics) | set(stored_topics)):
+        stored, actual = stored_topics.get(key, 0), actual_topics.get(key, 0)
+        if stored != actual:
+            drift.append(('student_progress', key[0], key[1], stored, actual))
+
+    actual_categories = {}
+    for (sid, topic_id), completed in actual_topics.items():
+        parent_topic = catalog.parent_of(topic_id)
+        if parent_topic in OVERALL_TABLES:
+            actual_categories[(sid, parent_topic)] = actual_categories.get((sid, parent_topic), 0) + completed
+    for category, table in OVERALL_TABLES.items():
+        cursor.execute(f"SELECT student_id, completed_questions FROM {table} WHERE 1 = 1 {student_filter}", params)
+        stored = {row[0]: row[1] or 0 for row in cursor.fetchall()}
+        students = set(stored) | {sid for sid, cat in actual_categories if cat == category}
+        for sid in sorted(students):
+            actual = actual_categories.get((sid, category), 0)
+            if stored.get(sid, 0) != actual:
+                drift.append((table, sid, category, stored.get(sid, 0), actual))
+    return drift
+
+
+def rebuild_counters(cursor, catalog, student_id=None):
+    """Reset every counter (or one student's) to a full recount."""
+    student_filter = "AND student_id = ?" if student_id is not None else ""
+    params = (student_id,) if student_id is not None else ()
+    cursor.execute(f"UPDATE student_progress SET completed_questions = 0, is_completed = 0 WHERE 1 = 1 {student_filter}", params)
+    cursor.execute(f"""
+        SELECT student_id, topic_id, COUNT(*) FROM student_answers
+        WHERE is_correct = 1 {student_filter}
+        GROUP BY student_id, topic_id
+    """, params)
+    rows = cursor.fetchall()
+    totals = {}
+    for sid, topic_id, completed in rows:
+        topic_total = catalog.total_for(topic_id) or 10
+        cursor.execute("""
+            INSERT INTO student_progress
+            (student_id, topic_id, completed_questions, total_questions, is_completed)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(student_id, topic_id) DO UPDATE SET
+                completed_questions = excluded.completed_questions,
+                total_questions = excluded.total_questions,
+                is_completed = excluded.is_completed
+        """, (sid, topic_id, completed, topic_total, 1 if completed >= topic_total else 0))
+        parent_topic = catalog.parent_of(topic_id)
+        if parent_topic in OVERALL_TABLES:
+            totals[(sid, parent_topic)] = totals.get((sid, parent_topic), 0) + completed
+
+    for category, table in OVERALL_TABLES.items():
+        cursor.execute(f"UPDATE {table} SET completed_questions = 0, is_completed = 0 WHERE 1 = 1 {student_filter}", params)
+        category_total = catalog.category_totals[category] or 10
+        cursor.executemany(f"""
+            INSERT INTO {table} (student_id, completed_questions, total_questions, is_completed, last_updated)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(student_id) DO UPDATE SET
+                completed_questions = excluded.completed_questions,
+                total_questions = excluded.total_questions,
+                is_completed = excluded.is_completed
+        """, [
+            (sid, completed, category_total, 1 if completed >= category_total else 0)
+            for (sid, cat), completed in totals.items() if cat == category
+        ])
+
+
+def category_rollup_source(student_filter=""):
+    return f"""
+        SELECT sp.student_id, pt.parent_topic, SUM(COALESCE(sp.completed_questions, 0)),
+               SUM(COALESCE(pt.total_questions, 0))
+        FROM student_progress sp
+        JOIN progress_topics pt ON pt.topic_id = sp.topic_id
+        WHERE pt.parent_topic IS NOT NULL {student_filter}
+        GROUP BY sp.student_id, pt.parent_topic
+    """
+
+
+def rebuild_category_rollup(cursor, student_id=None):
+    """Recompute student_category_progress (all, or one student's) from student_progress."""
+    student_filter = "AND sp.student_id = ?" if student_id is not None else ""
+    params = (student_id,) if student_id is not None else ()
+    cursor.execute(f"""
+        UPDATE student_category_progress SET completed = 0, total = 0
+        WHERE 1 = 1 {student_filter.replace('sp.', '')}
+    """, params)
+    cursor.execute(f"""
+        INSERT INTO student_category_progress (student_id, category, completed, total)
+        {category_rollup_source(student_filter)}
+        ON CONFLICT(student_id, category) DO UPDATE SET
+            completed = excluded.completed,
+            total = excluded.total
+    """, params)
+
+
+def find_rollup_drift(cursor, student_id=None):
+    """(student_id, category, stored, recomputed) for rollup rows that disagree."""
+    student_filter = "AND sp.student_id = ?" if student_id is not None else ""
+    params = (student_id,) if student_id is not None else ()
+    cursor.execute(category_rollup_source(student_filter), params)
+    actual = {(row[0], row[1]): (row[2], row[3]) for row in cursor.fetchall()}
+    cursor.execute(f"""
+        SELECT student_id, category, completed, total FROM student_category_progress
+        WHERE 1 = 1 {student_filter.replace('sp.', '')}
+    """, params)
+    stored = {(row[0], row[1]): (row[2], row[3]) for row in cursor.fetchall()}
+    return [
+        (key[0], key[1], stored.get(key, (0, 0)), actual.get(key, (0, 0)))
+        for key in sorted(set(actual) | set(stored))
+        if stored.get(key, (0, 0)) != actual.get(key, (0, 0))
+    ]
+
+
+# Category -> key used for it in the admin views' dicts and sort parameter
+COHORT_CATEGORIES = {'DSA': 'dsa', 'Aptitude': 'apti', 'Communication': 'comm'}
+
+# Sort name -> keyset columns, each order backed by an index from
+# migrations.COHORT_SORT_INDEXES; the last column makes every key unique
+COHORT_SORTS = {
+    'id': ['s.id'],
+    'name': ['s.name', 's.id'],
+    'department': ['s.department_key', 's.name', 's.id'],
+    **{key: [f'{key}.percentage', f'{key}.student_id'] for key in COHORT_CATEGORIES.values()},
+    # Only with a search; bm25 rank of the match, best first
+    'relevance': ['students_fts.rank', 's.id']
+}
+COHORT_PAGE_SIZE = 50
+
+
+def encode_page_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_page_cursor(token):
+    """Key values from encode_page_cursor; ValueError if the token is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid page cursor: {e}") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid page cursor")
+    return values
+
+
+def iter_cohort(cursor, search='', department='', sort='id', descending=False, after=None, limit=None):
+    """Matching students with completed/total/percentage per category, in sort order.
+
+    Rows are yielded as SQLite steps through the result, so a caller that
+    streams them never holds more than one in memory.
+
+    Each student's three rollup rows are joined by primary key. The table
+    the sort order comes from drives the query through its index: that
+    category's rollup rows when sorting by a category, students otherwise
+    (CROSS JOIN keeps SQLite from reordering the loops). A search is
+    answered from students_fts, which drives the query when sorting by
+    relevance and otherwise restricts the sorted walk to its matches. `after` is the sort key of
+    the previous page's last row, so every page is an index seek plus
+    `limit` rows however deep it is.
+    """
+    match = student_search.match_expression(search)
+    broad = match is not None and student_search.is_broad(cursor, match)
+    if department and sort == 'department':
+        # Within one department this is the name order, which the index can seek
+        sort = 'name'
+    if sort == 'relevance' and (match is None or broad):
+        sort = 'id'
+    keys = COHORT_SORTS[sort]
+    tables, filters, params = ['students s'], [], []
+    if match is not None:
+        if sort == 'relevance':
+            tables.insert(0, 'students_fts')
+            filters.append("students_fts MATCH ? AND s.id = students_fts.rowid")
+        elif broad:
+            # Most rows match, so probing each row of the sorted walk is cheaper
+            # than materializing the match list
+            filters.append("EXISTS (SELECT 1 FROM students_fts WHERE students_fts MATCH ? AND rowid = s.id)")
+        else:
+            filters.append("s.id IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?)")
+        params.append(match)
+    for category, key in COHORT_CATEGORIES.items():
+        table = f"student_category_progress {key}"
+        filters.append(f"{key}.student_id = s.id AND {key}.category = '{category}'")
+        tables.insert(0 if key == sort else len(tables), table)
+    if department:
+        filters.append("s.department_key = ?")
+        params.append(department)
+    if after is not None:
+        if len(after) != len(keys):
+            raise ValueError("Page cursor does not match the sort order")
+        filters.append(f"({', '.join(keys)}) {'<' if descending else '>'} ({', '.join('?' * len(keys))})")
+        params += after
+    direction = ' DESC' if descending else ''
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = "LIMIT ?"
+        params.append(limit)
+
+    columns = ', '.join(f'{key}.{column}' for key in COHORT_CATEGORIES.values()
+                        for column in ('completed', 'total', 'percentage'))
+    cursor.execute(f"""
+        SELECT s.id, s.name, s.email, s.department, s.graduation_year, {columns}, {', '.join(keys)}
+        FROM {' CROSS JOIN '.join(tables)}
+        WHERE {' AND '.join(filters)}
+        ORDER BY {', '.join(key + direction for key in keys)}
+        {limit_clause}
+    """, params)
+    for row in cursor:
+        student = {'id': row[0], 'name': row[1], 'email': row[2], 'department': row[3], 'graduation_year': row[4]}
+        for index, key in enumerate(COHORT_CATEGORIES.values()):
+            completed, total, percentage = row[5 + index * 3:8 + index * 3]
+            student[key] = {'completed': completed, 'total': total, 'percentage': percentage}
+        student['sort_key'] = list(row[5 + len(COHORT_CATEGORIES) * 3:])
+        yield student
+
+
+def cohort_progress(cursor, search='', department='', sort='id', descending=False, after=None, limit=None):
+    """iter_cohort as a list."""
+    return list(iter_cohort(cursor, search, department, sort, descending, after, limit))
+
+
+def cohort_page(cursor, search='', department='', sort='id', descending=False, page_cursor=None,
+                page_size=COHORT_PAGE_SIZE):
+    """(students, next_cursor) for one page; next_cursor is None on the last page."""
+    after = decode_page_cursor(page_cursor) if page_cursor else None
+    students = cohort_progress(cursor, search, department, sort, descending, after, page_size + 1)
+    if len(students) <= page_size:
+        return students, None
+    students = students[:page_size]
+    return students, encode_page_cursor(students[-1]['sort_key'])
+
+
+def main():
+    import argparse
+    import sqlite3
+
+    from config import sqlite_config
+    from topic_catalog import load_catalog
+
+    parser = argparse.ArgumentParser(description="Check progress counters against a full recount.")
+    parser.add_argument('--database', default=sqlite_config['database'])
+    parser.add_argument('--student', type=int, help='only check this student id')
+    parser.add_argument('--repair', action='store_true', help='rebuild the counters that drifted')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    cursor = conn.cursor()
+    catalog = load_catalog(cursor)
+    drift = find_counter_drift(cursor, catalog, args.student)
+    for table, student_id, key, stored, actual in drift:
+        print(f"{table}: student {student_id} {key}: stored {stored}, recount {actual}")
+    print(f"{len(drift)} counter(s) out of sync")
+    rollup_drift = find_rollup_drift(cursor, args.student)
+    for student_id, category, stored, actual in rollup_drift:
+        print(f"student_category_progress: student {student_id} {category}: "
+              f"stored {stored[0]}/{stored[1]}, recomputed {actual[0]}/{actual[1]}")
+    print(f"{len(rollup_drift)} category rollup row(s) out of sync")
+    if args.repair and (drift or rollup_drift):
+        for student_id in sorted({row[1] for row in drift}):
+            rebuild_counters(cursor, catalog, student_id)
+        for student_id in sorted({row[0] for row in rollup_drift}):
+            rebuild_category_rollup(cursor, student_id)
+        conn.commit()
+        print("Counters rebuilt")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Per-student cache for the progress read endpoints.
+
+/get_progress, /get_aptitude_progress, /get_communication_progress and
+/student_progress are served from here once a student's result has been
+computed. Entries are grouped per student, so the progress writers drop
+everything for that student with one invalidate() after they commit.
+
+The cache is per process, and writers invalidate only the worker that
+served the write. Other workers notice the change through the student's
+progress_versions counter: each entry is stored with the version it was
+computed at, and a lookup given the current version treats an entry from
+any other version as a miss (counted as stale). Triggers bump the counter
+on every write to the progress tables, so an entry is served only while
+the student's progress is unchanged.
+
+The TTL no longer decides freshness on the versioned endpoints. It bounds
+how long an entry lives, so idle students' results are dropped, and it is
+the only staleness limit for lookups made without a version.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import progress_cache_config
+
+
+class ProgressCache:
+    def __init__(self, max_students=2048, ttl=30):
+        self.max_students = max_students
+        self.ttl = ttl
+        # student_id -> {key: (expires_at, version, value)}, least recently used first
+        self._entries = OrderedDict()
+        # user_id -> student_id, so a hit needs no students lookup
+        self._students = {}
+        self._user_of = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale = 0
+        self.invalidations = 0
+
+    def lookup(self, user_id, key, version=None):
+        """Cached value for the user's student, or None.
+
+        When version is given, an entry stored under another progress
+        version is treated as a miss, which also catches writes served by
+        other workers.
+        """
+        now = time.monotonic()
+        with self._lock:
+            student_id = self._students.get(user_id)
+            entries = self._entries.get(student_id)
+            entry = entries.get(key) if entries else None
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, stored_version, value = entry
+            if expires_at <= now:
+                del entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if version is not None and stored_version != version:
+                del entries[key]
+                self.stale += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(student_id)
+            self.hits += 1
+            return value
+
+    def store(self, user_id, student_id, key, value, version=None):
+        with self._lock:
+            self._students[user_id] = student_id
+            self._user_of[student_id] = user_id
+            entries = self._entries.setdefault(student_id, {})
+            entries[key] = (time.monotonic() + self.ttl, version, value)
+            self._entries.move_to_end(student_id)
+            while len(self._entries) > self.max_students:
+                evicted, _ = self._entries.popitem(last=False)
+                self._students.pop(self._user_of.pop(evicted, None), None)
+                self.evictions += 1
+
+    def invalidate(self, student_id):
+        """Drop every cached result for one student."""
+        with self._lock:
+            if self._entries.pop(student_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._students.clear()
+            self._user_of.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'pid': os.getpid(),
+                'students': len(self._entries),
+                'entries': sum(len(entries) for entries in self._entries.values()),
+                'max_students': self.max_students,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'stale': self.stale,
+                'invalidations': self.invalidations
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache():
+    """The cache for this process; a forked worker starts with an empty one."""
+    pid = os.getpid()
+    cache = _caches.get(pid)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(pid)
+            if cache is None:
+                cache = ProgressCache(
+                    max_students=progress_cache_config['max_students'],
+                    ttl=progress_cache_config['ttl']
+                )
+                _caches[pid] = cache
+    return cache
@@ -0,0 +1,144 @@
+"""Live progress events for open dashboard tabs (server-sent events).
+
+Each /progress_events stream subscribes a bounded queue to its student.
+The progress writers publish a small delta after they commit, which
+reaches every tab served by the same worker process.
+
+Writes handled by other worker processes are picked up by one watcher
+thread per process. Every POLL_INTERVAL seconds it reads the
+progress_versions rows of the subscribed students in a single query and
+sends a 'changed' event when a version moved, so the cost does not grow
+with the number of open tabs.
+"""
+import os
+import queue
+import threading
+import time
+
+import database
+
+# Seconds between the watcher's progress_versions reads
+POLL_INTERVAL = 2
+# Events buffered per stream before a slow client starts losing them
+QUEUE_SIZE = 32
+# Open streams one worker process accepts
+MAX_SUBSCRIBERS = 1000
+
+
+class BrokerFull(Exception):
+    pass
+
+
+class ProgressBroker:
+    def __init__(self, poll_interval=POLL_INTERVAL, max_subscribers=MAX_SUBSCRIBERS):
+        self.poll_interval = poll_interval
+        self.max_subscribers = max_subscribers
+        # student_id -> set of subscriber queues
+        self._subscribers = {}
+        # student_id -> last progress version announced to its subscribers
+        self._versions = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._watcher = None
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, student_id, version=None):
+        """Register a stream; returns the queue its events arrive on."""
+        events = queue.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise BrokerFull(f"{self._count} progress streams already open")
+            self._subscribers.setdefault(student_id, set()).add(events)
+            self._count += 1
+            if version is not None:
+                self._versions.setdefault(student_id, version)
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name='progress-events', daemon=True)
+                self._watcher.start()
+        return events
+
+    def unsubscribe(self, student_id, events):
+        with self._lock:
+            subscribers = self._subscribers.get(student_id)
+            if subscribers and events in subscribers:
+                subscribers.discard(events)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[student_id]
+                    self._versions.pop(student_id, None)
+
+    def publish(self, student_id, event, version=None):
+        """Send event to every stream of one student in this process."""
+        with self._lock:
+            if version is not None:
+                self._versions[student_id] = max(version, self._versions.get(student_id, 0))
+            subscribers = list(self._subscribers.get(student_id, ()))
+        for events in subscribers:
+            try:
+                events.put_nowait(event)
+                self.published += 1
+            except queue.Full:
+                # The client is not reading; it resyncs on its next fetch
+                self.dropped += 1
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                students = list(self._subscribers)
+            if not students:
+                continue
+            try:
+                changed = self._changed_versions(students)
+            except Exception as e:
+                print(f"Progress event watcher error: {e}")
+                continue
+            for student_id, version in changed:
+                self.publish(student_id, {'type': 'changed', 'version': version}, version)
+
+    def _changed_versions(self, students):
+        conn = database.get_connection()
+        try:
+            placeholders = ', '.join('?' * len(students))
+            rows = conn.execute(f"""
+                SELECT student_id, version FROM progress_versions
+                WHERE student_id IN ({placeholders})
+            """, students).fetchall()
+        finally:
+            conn.close()
+        with self._lock:
+            return [
+                (student_id, version) for student_id, version in rows
+                if student_id in self._versions and version > self._versions[student_id]
+            ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'streams': self._count,
+                'students': len(self._subscribers),
+                'published': self.published,
+                'dropped': self.dropped
+            }
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker():
+    """The broker for this process; a forked worker gets its own watcher."""
+    pid = os.getpid()
+    broker = _brokers.get(pid)
+    if broker is None:
+        with _brokers_lock:
+            broker = _brokers.setdefault(pid, ProgressBroker())
+    return broker
+
+
+def current_version(cursor, student_id):
+    cursor.execute("SELECT version FROM progress_versions WHERE student_id = ?", (student_id,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
@@ -0,0 +1,347 @@
+"""Admin reports precomputed in the background, served stale-while-revalidate.
+
+Each report is a builder that scans the progress or placement tables and
+returns JSON-able data, plus a template that renders it as an HTML
+fragment. Both are stored in report_snapshots with the time they were
+generated and the student_answers high-water mark at that moment.
+
+A snapshot is due again once its interval has passed, or once
+after_completions questions have been completed since it was built (see
+config.report_config). One scheduler thread per worker process checks
+every poll_interval seconds and rebuilds what is due. A lease on the
+snapshot row makes sure that only one worker runs a given build.
+
+Requests never wait for a build once a snapshot exists: get_report returns
+the stored snapshot, marks it stale if it is due, and wakes the scheduler.
+Only the very first request for a report builds it inline.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from jinja2 import Environment, FileSystemLoader
+
+import database
+from config import report_config
+
+APPLICATION_STATUSES = ('Applied', 'Under Review', 'Rejected', 'Accepted')
+OFFER_STATUSES = ('Pending', 'Accepted', 'Declined')
+# (label, lowest percentage) of the completion bands, highest first
+COMPLETION_BANDS = (('Complete', 100), ('75-99%', 75), ('50-74%', 50), ('25-49%', 25), ('1-24%', 0.01), ('0%', 0))
+
+fragments = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'admin', 'reports')),
+    autoescape=True
+)
+
+
+def preparation_summary(cursor):
+    """Completion bands per category, uptake per topic and recent activity."""
+    cursor.execute("SELECT COUNT(*) FROM students")
+    students = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT COUNT(*) FROM students s
+        WHERE NOT EXISTS (SELECT 1 FROM student_progress sp WHERE sp.student_id = s.id)
+    """)
+    not_started = cursor.fetchone()[0]
+
+    band_case = ' '.join(f"WHEN percentage >= {low} THEN {index}" for index, (_, low) in enumerate(COMPLETION_BANDS))
+    cursor.execute(f"""
+        SELECT category, CASE {band_case} END AS band, COUNT(*)
+        FROM student_category_progress
+        GROUP BY category, band
+    """)
+    bands = {}
+    for category, band, count in cursor.fetchall():
+        bands.setdefault(category, [0] * len(COMPLETION_BANDS))[band] = count
+
+    cursor.execute("""
+        SELECT pt.topic_id, pt.topic_name, pt.parent_topic, pt.total_questions,
+               COUNT(sp.student_id),
+               COALESCE(SUM(sp.completed_questions >= pt.total_questions), 0),
+               COALESCE(AVG(sp.completed_questions * 100.0 / NULLIF(pt.total_questions, 0)), 0)
+        FROM progress_topics pt
+        LEFT JOIN student_progress sp ON sp.topic_id = pt.topic_id
+        WHERE pt.parent_topic IS NOT NULL
+        GROUP BY pt.topic_id
+        ORDER BY pt.parent_topic, pt.topic_id
+    """)
+    topics = [{
+        'topic_id': topic_id,
+        'topic_name': topic_name,
+        'category': category,
+        'questions': total,
+        'started': started,
+        'finished': finished,
+        'mean_completion': round(mean, 2)
+    } for topic_id, topic_name, category, total, started, finished, mean in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT COUNT(DISTINCT CASE WHEN day >= date('now', '-6 days') THEN student_id END),
+               COUNT(DISTINCT student_id),
+               COALESCE(SUM(CASE WHEN day >= date('now', '-6 days') THEN completed END), 0),
+               COALESCE(SUM(completed), 0)
+        FROM daily_activity
+        WHERE day >= date('now', '-29 days')
+    """)
+    active_7, active_30, completed_7, completed_30 = cursor.fetchone()
+    return {
+        'students': students,
+        'not_started': not_started,
+        'bands': [label for label, _ in COMPLETION_BANDS],
+        'categories': bands,
+        'topics': topics,
+        'activity': {
+            'active_7_days': active_7,
+            'active_30_days': active_30,
+            'completed_7_days': completed_7,
+            'completed_30_days': completed_30
+        }
+    }
+
+
+def placement_summary(cursor):
+    """Companies, jobs, applications and offers, overall and per company."""
+    cursor.execute("SELECT COUNT(*) FROM companies")
+    companies = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*), COALESCE(SUM(deadline IS NULL OR deadline >= date('now')), 0) FROM jobs")
+    jobs, open_jobs = cursor.fetchone()
+    cursor.execute("SELECT status, COUNT(*) FROM applications GROUP BY status")
+    applications = dict.fromkeys(APPLICATION_STATUSES, 0)
+    applications.update(cursor.fetchall())
+    cursor.execute("SELECT offer_status, COUNT(*) FROM job_offers GROUP BY offer_status")
+    offers = dict.fromkeys(OFFER_STATUSES, 0)
+    offers.update(cursor.fetchall())
+    cursor.execute("SELECT COUNT(DISTINCT usn) FROM job_offers WHERE offer_status = 'Accepted'")
+    placed = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT c.name, COUNT(DISTINCT j.job_id), COUNT(a.application_id),
+               COALESCE(SUM(a.status = 'Accepted'), 0)
+        FROM companies c
+        LEFT JOIN jobs j ON j.company_id = c.company_id
+        LEFT JOIN applications a ON a.job_id = j.job_id
+        GROUP BY c.company_id
+        ORDER BY COUNT(a.application_id) DESC, c.name
+    """)
+    by_company = [{
+        'company': name,
+        'jobs': company_jobs,
+        'applications': company_applications,
+        'accepted': accepted
+    } for name, company_jobs, company_applications, accepted in cursor.fetchall()]
+    return {
+        'companies': companies,
+        'jobs': jobs,
+        'open_jobs': open_jobs,
+        'applications': applications,
+        'offers': offers,
+        'placed_students': placed,
+        'by_company': by_company
+    }
+
+
+# name -> (title, builder, fragment template)
+REPORTS = {
+    'preparation_summary': ('Preparation summary', preparation_summary, 'preparation_summary.html'),
+    'placement_summary': ('Placement summary', placement_summary, 'placement_summary.html')
+}
+
+
+def report_settings(name):
+    settings = {'interval': 600, 'after_completions': 0}
+    settings.update(report_config['reports'].get(name, {}))
+    return settings
+
+
+def completions(cursor):
+    """High-water mark of student_answers ids: questions completed so far."""
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'student_answers'")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def is_due(name, snapshot, completed, now):
+    settings = report_settings(name)
+    if now - snapshot['generated_at'] >= settings['interval']:
+        return True
+    return bool(settings['after_completions']) and completed - snapshot['completions'] >= settings['after_completions']
+
+
+def read_snapshot(cursor, name):
+    cursor.execute("""
+        SELECT payload, fragment, generated_at, duration_ms, completions FROM report_snapshots
+        WHERE name = ? AND payload IS NOT NULL
+    """, (name,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    payload, fragment, generated_at, duration_ms, completed = row
+    return {
+        'name': name,
+        'title': REPORTS[name][0],
+        'data': json.loads(payload),
+        'fragment': fragment,
+        'generated_at': generated_at,
+        'duration_ms': duration_ms,
+        'completions': completed
+    }
+
+
+def build(cursor, name):
+    """(data, fragment, duration_ms) of one report, computed now."""
+    title, builder, template = REPORTS[name]
+    started = time.perf_counter()
+    data = builder(cursor)
+    fragment = fragments.get_template(template).render(title=title, report=data)
+    return data, fragment, (time.perf_counter() - started) * 1000
+
+
+def regenerate(name, cursor=None):
+    """Rebuild and store one report unless another worker holds its lease; True if rebuilt.
+
+    A caller that already holds a connection passes its cursor, so the build
+    does not take a second one from the pool.
+    """
+    if cursor is not None:
+        return _regenerate(cursor, name)
+    conn = database.get_connection()
+    try:
+        return _regenerate(conn.cursor(), name)
+    finally:
+        conn.close()
+
+
+def _regenerate(cursor, name):
+    conn = cursor.connection
+    now = time.time()
+    cursor.execute("""
+        INSERT INTO report_snapshots (name, lease_until) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET lease_until = excluded.lease_until
+        WHERE report_snapshots.lease_until IS NULL OR report_snapshots.lease_until < ?
+        RETURNING name
+    """, (name, now + report_config['lease'], now))
+    claimed = cursor.fetchone() is not None
+    conn.commit()
+    if not claimed:
+        return False
+    try:
+        # Taken first: completions during the build count towards the next one
+        completed = completions(cursor)
+        data, fragment, duration_ms = build(cursor, name)
+    except Exception:
+        cursor.execute("UPDATE report_snapshots SET lease_until = NULL WHERE name = ?", (name,))
+        conn.commit()
+        raise
+    cursor.execute("""
+        UPDATE report_snapshots
+        SET payload = ?, fragment = ?, generated_at = ?, duration_ms = ?, completions = ?, lease_until = NULL
+        WHERE name = ?
+    """, (json.dumps(data), fragment, time.time(), duration_ms, completed, name))
+    conn.commit()
+    return True
+
+
+class ReportScheduler:
+    def __init__(self, poll_interval=None):
+        self.poll_interval = poll_interval or report_config['poll_interval']
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.failures = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='report-scheduler', daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        """Check for due reports now instead of at the next poll."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"Report scheduler error: {e}")
+
+    def run_due(self):
+        """Rebuild every report that is due; returns the names rebuilt here."""
+        conn = database.get_connection()
+        try:
+            cursor = conn.cursor()
+            completed = completions(cursor)
+            now = time.time()
+            due = []
+            for name in REPORTS:
+                snapshot = read_snapshot(cursor, name)
+                if snapshot is None or is_due(name, snapshot, completed, now):
+                    due.append(name)
+        finally:
+            conn.close()
+
+        rebuilt = []
+        for name in due:
+            try:
+                if regenerate(name):
+                    rebuilt.append(name)
+                    self.builds += 1
+            except Exception as e:
+                self.failures += 1
+                print(f"Report {name} failed: {e}")
+        return rebuilt
+
+    def stats(self):
+        return {
+            'pid': os.getpid(),
+            'running': self._thread is not None,
+            'builds': self.builds,
+            'failures': self.failures
+        }
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler():
+    """The running scheduler for this process; a forked worker starts its own thread."""
+    pid = os.getpid()
+    scheduler = _schedulers.get(pid)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.setdefault(pid, ReportScheduler())
+    scheduler.start()
+    return scheduler
+
+
+def get_report(cursor, name):
+    """The stored snapshot of a report, with 'stale' and 'age_seconds' added."""
+    scheduler = get_scheduler()
+    snapshot = read_snapshot(cursor, name)
+    if snapshot is None:
+        # Nothing stored yet: build it here, on the caller's connection, or
+        # compute a private copy if another worker is already building it
+        if regenerate(name, cursor):
+            snapshot = read_snapshot(cursor, name)
+        else:
+            completed = completions(cursor)
+            data, fragment, duration_ms = build(cursor, name)
+            snapshot = {
+                'name': name, 'title': REPORTS[name][0], 'data': data, 'fragment': fragment,
+                'generated_at': time.time(), 'duration_ms': duration_ms, 'completions': completed
+            }
+
+    now = time.time()
+    snapshot['stale'] = is_due(name, snapshot, completions(cursor), now)
+    if snapshot['stale']:
+        scheduler.wake()
+    snapshot['age_seconds'] = round(now - snapshot['generated_at'], 1)
+    snapshot['generated'] = datetime.fromtimestamp(snapshot['generated_at'], timezone.utc).isoformat(timespec='seconds')
+    return snapshot
@@ -0,0 +1,63 @@
+"""Full-text student search over the students_fts index (SQLite FTS5).
+
+students_fts is an external-content index on students (name, email,
+department and id), kept in step by triggers on students, so registration
+and profile edits need no extra code. The last word typed is matched as a
+prefix, so 'asha ra' finds 'Asha Rao' while it is being typed, and matches
+are ranked by bm25 with name hits weighted highest.
+
+Ranking reads every match, so a search matching more than BROAD_MATCHES
+students (a single letter, a common surname) is listed in id order instead.
+"""
+import re
+
+# bm25 weight of each indexed column: name, email, department, id
+RANK_WEIGHTS = (10.0, 4.0, 1.0, 2.0)
+SEARCH_LIMIT = 20
+BROAD_MATCHES = 5000
+
+
+def match_expression(text):
+    """FTS5 MATCH string requiring every word of text, the last as a prefix, or None.
+
+    Only words reach FTS5, quoted, so operators and punctuation typed into
+    the search box cannot cause a syntax error.
+    """
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def is_broad(cursor, match):
+    """Whether match finds more than BROAD_MATCHES students; stops counting there."""
+    cursor.execute("""
+        SELECT COUNT(*) FROM (SELECT rowid FROM students_fts WHERE students_fts MATCH ? LIMIT ?)
+    """, (match, BROAD_MATCHES + 1))
+    return cursor.fetchone()[0] > BROAD_MATCHES
+
+
+def search(cursor, text, department='', limit=SEARCH_LIMIT):
+    """Best matches for text, optionally within one department, best first."""
+    match = match_expression(text)
+    if match is None:
+        return []
+    params = [match]
+    department_filter = ""
+    if department:
+        department_filter = "AND s.department_key = ?"
+        params.append(department)
+    params.append(limit)
+    order = 'students_fts.rowid' if is_broad(cursor, match) else 'students_fts.rank'
+    cursor.execute(f"""
+        SELECT s.id, s.name, s.email, s.department
+        FROM students_fts
+        CROSS JOIN students s ON s.id = students_fts.rowid
+        WHERE students_fts MATCH ? {department_filter}
+        ORDER BY {order}
+        LIMIT ?
+    """, params)
+    return [
+        {'id': row[0], 'name': row[1], 'email': row[2], 'department': row[3]}
+        for row in cursor.fetchall()
+    ]
@@ -0,0 +1,63 @@
+import sqlite3
+from datetime import date
+
+import activity
+import bitmaps
+import migrations
+import progress
+import topic_catalog
+
+
+def test_rollup_streaks_and_heatmap(tmp_path):
+    path = str(tmp_path / 'activity.db')
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    # Topic 1 is DSA and 11 is Aptitude in the seeded catalog
+    conn.executemany("""
+        INSERT INTO student_answers (student_id, question_id, topic_id, given_answer, is_correct, timestamp)
+        VALUES (1, ?, ?, 'completed', 1, ?)
+    """, [
+        (1, 1, '2026-01-01 09:00:00'),
+        (2, 1, '2026-01-02 10:00:00'),
+        (3, 11, '2026-01-02 23:59:00'),
+        (4, 1, '2026-01-03 08:00:00'),
+        (5, 1, '2026-01-05 08:00:00'),
+        (6, 1, '2026-01-06 08:00:00'),
+    ])
+    cursor = conn.cursor()
+
+    assert activity.streaks(cursor, 1, today=date(2026, 1, 7)) == {
+        'current_streak': 2, 'longest_streak': 3, 'active_days': 5, 'last_active': '2026-01-06'
+    }
+    assert activity.streaks(cursor, 1, today=date(2026, 1, 8))['current_streak'] == 0
+
+    days = activity.heatmap(cursor, 1, days=3, today=date(2026, 1, 3))
+    assert days == [
+        {'date': '2026-01-01', 'completed': 1, 'categories': {'DSA': 1}},
+        {'date': '2026-01-02', 'completed': 2, 'categories': {'Aptitude': 1, 'DSA': 1}},
+        {'date': '2026-01-03', 'completed': 1, 'categories': {'DSA': 1}},
+    ]
+    conn.close()
+
+
+def test_uncheck_and_recheck_move_the_day(tmp_path):
+    path = str(tmp_path / 'activity.db')
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    # Answered before the counters existed: no student_progress row
+    cursor.execute("""
+        INSERT INTO student_answers (student_id, question_id, topic_id, given_answer, is_correct, timestamp)
+        VALUES (1, 1, 1, 'completed', 1, '2026-01-01 09:00:00')
+    """)
+    bitmaps.mark(cursor, 1, 1, [1])
+
+    assert progress.remove_completion(cursor, 1, 1, 1, catalog) == (True, 0)
+    assert not bitmaps.has_bit(bitmaps.load_bitmap(cursor, 1, 1), 1)
+    assert activity.streaks(cursor, 1, today=date(2026, 1, 1))['active_days'] == 0
+
+    assert progress.record_completion(cursor, 1, 1, 1, catalog) == (True, 1)
+    cursor.execute("SELECT day, category, completed FROM daily_activity WHERE student_id = 1")
+    assert cursor.fetchall() == [(date.today().isoformat(), 'DSA', 1)]
+    conn.close()
@@ -0,0 +1,52 @@
+import sqlite3
+
+import change_seq_cache
+import cohort_analytics
+import migrations
+import progress
+import topic_catalog
+
+
+def stored_percentages(cursor, category):
+    cursor.execute("""
+        SELECT percentage FROM student_category_progress WHERE category = ? ORDER BY student_id
+    """, (category,))
+    return [round(row[0], 2) for row in cursor.fetchall()]
+
+
+def test_matrix_follows_progress_incrementally(tmp_path):
+    path = str(tmp_path / 'analytics.db')
+    migrations.migrate(path)
+    conn = sqlite3.connect(path, isolation_level=None)
+    cursor = conn.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    dsa_topics = catalog.category_topics['DSA']
+    cursor.executemany("""
+        INSERT INTO students (id, user_id, name, email, department, graduation_year) VALUES (?, ?, ?, ?, ?, ?)
+    """, [(i, i, f'Student {i}', f's{i}@example.com', 'CSE' if i % 2 else 'ECE', 2026) for i in range(1, 6)])
+    for student_id in range(1, 6):
+        for question_id in range(1, student_id + 1):
+            progress.record_completion(cursor, student_id, dsa_topics[0], question_id, catalog)
+
+    matrix = cohort_analytics.CohortMatrix()
+    matrix.refresh(cursor, now=1000)
+    assert [round(value, 2) for value in matrix.percentages('DSA')] == stored_percentages(cursor, 'DSA')
+
+    # A completion on a second topic and a new student, picked up without a full reload
+    progress.record_completion(cursor, 2, dsa_topics[1], 1, catalog)
+    cursor.execute("""
+        INSERT INTO students (id, user_id, name, email, department, graduation_year)
+        VALUES (6, 6, 'Student 6', 's6@example.com', 'MECH', 2027)
+    """)
+    progress.record_completion(cursor, 6, dsa_topics[0], 1, catalog)
+    matrix.refresh(cursor, now=1000 + change_seq_cache.REFRESH_INTERVAL)
+    assert matrix.full_loads == 1 and matrix.incremental_refreshes == 1
+    assert [round(value, 2) for value in matrix.percentages('DSA')] == stored_percentages(cursor, 'DSA')
+
+    assert cohort_analytics.percentiles(matrix, 'DSA', department='MECH')['students'] == 1
+    assert sum(cohort_analytics.histogram(matrix, 'DSA', bins=5)['counts']) == 6
+    assert [entry['department'] for entry in cohort_analytics.departments(matrix, 'DSA')] == ['CSE', 'ECE', 'MECH']
+    curve = {entry['topic_id']: entry for entry in cohort_analytics.topics(matrix, 'DSA')}
+    assert curve[dsa_topics[0]]['started'] == 6
+    assert curve[dsa_topics[1]]['started'] == 1
+    conn.close()
@@ -0,0 +1,37 @@
+import csv
+import io
+import sqlite3
+import zipfile
+from xml.etree import ElementTree
+
+import cohort_export
+import migrations
+import progress
+
+
+def test_csv_and_xlsx_hold_the_same_rows(tmp_path, monkeypatch):
+    path = str(tmp_path / 'export.db')
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    conn.executemany("""
+        INSERT INTO students (id, user_id, name, email, department, graduation_year) VALUES (?, ?, ?, ?, ?, ?)
+    """, [(i, i, f'Student {i}', f's{i}@example.com', 'CSE', 2026) for i in range(1, 8)]
+        + [(8, 8, '=HYPERLINK("x")', 's8@example.com', None, None)])
+    # Several chunks per export
+    monkeypatch.setattr(cohort_export, 'CHUNK_ROWS', 3)
+
+    chunks = list(cohort_export.csv_chunks(progress.iter_cohort(conn.cursor())))
+    assert len(chunks) > 2
+    rows = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8-sig'))))
+    assert rows[0] == cohort_export.EXPORT_COLUMNS
+    assert [row[0] for row in rows[1:]] == [str(i) for i in range(1, 9)]
+    assert rows[8][1] == '\'=HYPERLINK("x")'
+
+    workbook = zipfile.ZipFile(io.BytesIO(b''.join(
+        cohort_export.xlsx_chunks(progress.iter_cohort(conn.cursor()))
+    )))
+    assert workbook.testzip() is None
+    sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+    namespace = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+    assert len(sheet.findall(f'{namespace}sheetData/{namespace}row')) == 9
+    conn.close()
@@ -0,0 +1,233 @@
+import sqlite3
+import threading
+
+import pytest
+
+import bitmaps
+import database
+import migrations
+import problem_registry
+import progress
+import topic_catalog
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / 'completion.db')
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO students (id, user_id, name, email) VALUES (1, 1, 'Test Student', 'test@example.com')")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_counters_match_recount(db):
+    cursor = db.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    dsa_topic = catalog.category_topics['DSA'][0]
+    aptitude_topic = catalog.category_topics['Aptitude'][0]
+
+    assert progress.record_completion(cursor, 1, dsa_topic, 1, catalog) == (True, 1)
+    assert progress.record_completion(cursor, 1, dsa_topic, 2, catalog) == (True, 2)
+    # Completing the same question again leaves every counter alone
+    assert progress.record_completion(cursor, 1, dsa_topic, 2, catalog) == (False, 2)
+    assert progress.record_completion(cursor, 1, aptitude_topic, 1, catalog) == (True, 1)
+    db.commit()
+
+    assert progress.find_counter_drift(cursor, catalog) == []
+    cursor.execute("SELECT completed_questions FROM dsa_overall_progress WHERE student_id = 1")
+    assert cursor.fetchone()[0] == 2
+    cursor.execute("SELECT completed_questions FROM aptitude_overall_progress WHERE student_id = 1")
+    assert cursor.fetchone()[0] == 1
+
+    # Unchecking moves the counters back; unchecking again changes nothing
+    assert progress.remove_completion(cursor, 1, dsa_topic, 2, catalog) == (True, 1)
+    assert progress.remove_completion(cursor, 1, dsa_topic, 2, catalog) == (False, 1)
+    assert progress.find_counter_drift(cursor, catalog) == []
+    assert bitmaps.members(bitmaps.load_bitmap(cursor, 1, dsa_topic)) == [1]
+    cursor.execute("SELECT completed FROM student_category_progress WHERE student_id = 1 AND category = 'DSA'")
+    assert cursor.fetchone()[0] == 1
+
+
+def test_rebuild_repairs_drift(db):
+    cursor = db.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    topic_id = catalog.category_topics['DSA'][0]
+    progress.record_completion(cursor, 1, topic_id, 1, catalog)
+    cursor.execute("UPDATE student_progress SET completed_questions = 5 WHERE student_id = 1")
+
+    assert progress.find_counter_drift(cursor, catalog, 1) == [('student_progress', 1, topic_id, 5, 1)]
+    progress.rebuild_counters(cursor, catalog, 1)
+    assert progress.find_counter_drift(cursor, catalog, 1) == []
+
+
+def test_migration_keeps_progress_counted_without_answers(tmp_path):
+    path = str(tmp_path / 'backfill.db')
+    migrations.migrate(path, target=6)
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    topic_id = catalog.category_topics['DSA'][0]
+    # Three completions counted, only question 2 recorded as an answer
+    cursor.execute("INSERT INTO students (id, user_id, name, email) VALUES (1, 1, 'Test Student', 'test@example.com')")
+    cursor.execute("""
+        INSERT INTO student_progress (student_id, topic_id, completed_questions, total_questions)
+        VALUES (1, ?, 3, 10)
+    """, (topic_id,))
+    cursor.execute("""
+        INSERT INTO student_answers (student_id, question_id, topic_id, given_answer, is_correct)
+        VALUES (1, 2, ?, 'completed', 1)
+    """, (topic_id,))
+    conn.commit()
+
+    migrations.migrate(path)
+    cursor.execute("SELECT question_id FROM student_answers WHERE student_id = 1 ORDER BY question_id")
+    assert [row[0] for row in cursor.fetchall()] == [1, 2, 3]
+    assert progress.find_counter_drift(cursor, catalog) == []
+    assert progress.topic_progress(cursor, 1, [topic_id], catalog)[topic_id]['completed'] == 3
+    assert bitmaps.members(bitmaps.load_bitmap(cursor, 1, topic_id)) == [1, 2, 3]
+    conn.close()
+
+
+def test_batch_matches_single_completions(db):
+    cursor = db.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    dsa_topic = catalog.category_topics['DSA'][0]
+    aptitude_topic = catalog.category_topics['Aptitude'][0]
+    progress.record_completion(cursor, 1, dsa_topic, 1, catalog)
+
+    added = progress.record_completions(
+        cursor, 1, [(dsa_topic, 1), (dsa_topic, 2), (dsa_topic, 2), (aptitude_topic, 3)], catalog
+    )
+    assert added == {dsa_topic: 1, aptitude_topic: 1}
+    assert progress.find_counter_drift(cursor, catalog) == []
+    assert progress.topic_progress(cursor, 1, [dsa_topic], catalog)[dsa_topic]['completed'] == 2
+    assert bitmaps.members(bitmaps.load_bitmap(cursor, 1, dsa_topic)) == [1, 2]
+
+
+def test_category_rollup_follows_progress(db):
+    cursor = db.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    dsa_topic = catalog.category_topics['DSA'][0]
+    progress.record_completion(cursor, 1, dsa_topic, 1, catalog)
+    progress.record_completions(cursor, 1, [(dsa_topic, 2), (catalog.category_topics['Aptitude'][0], 1)], catalog)
+
+    total = catalog.total_for(dsa_topic)
+    [student] = progress.cohort_progress(cursor)
+    assert student['dsa'] == {'completed': 2, 'total': total, 'percentage': round(200 / total, 2)}
+    assert student['comm'] == {'completed': 0, 'total': 0, 'percentage': 0}
+
+    # Catalog edits re-total every student who started the topic
+    cursor.execute("UPDATE progress_topics SET total_questions = 40 WHERE topic_id = ?", (dsa_topic,))
+    assert progress.cohort_progress(cursor)[0]['dsa']['total'] == 40
+    cursor.execute("DELETE FROM student_progress WHERE topic_id = ?", (dsa_topic,))
+    assert progress.find_rollup_drift(cursor) == []
+    assert progress.cohort_progress(cursor, department='ECE') == []
+
+
+@pytest.mark.parametrize('sort', list(progress.COHORT_SORTS))
+def test_cohort_pages_cover_every_student_once(db, sort):
+    cursor = db.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    dsa_topic = catalog.category_topics['DSA'][0]
+    cursor.executemany("""
+        INSERT INTO students (id, user_id, name, email, department) VALUES (?, ?, ?, ?, ?)
+    """, [(i, i, f'Student {i % 3}', f's{i}@example.com', [None, 'CSE', 'ECE'][i % 3]) for i in range(2, 9)])
+    for student_id in range(1, 9):
+        for question_id in range(1, student_id % 4 + 1):
+            progress.record_completion(cursor, student_id, dsa_topic, question_id, catalog)
+
+    for descending in (False, True):
+        everyone = progress.cohort_progress(cursor, sort=sort, descending=descending)
+        seen, page_cursor = [], None
+        while True:
+            students, page_cursor = progress.cohort_page(
+                cursor, sort=sort, descending=descending, page_cursor=page_cursor, page_size=3
+            )
+            seen += [student['id'] for student in students]
+            if page_cursor is None:
+                break
+        assert seen == [student['id'] for student in everyone]
+        assert sorted(seen) == list(range(1, 9))
+
+
+def test_bitmap_operations():
+    bits = bitmaps.set_bits(b'', [0, 9, 70])
+    assert len(bits) == 9
+    assert [bitmaps.has_bit(bits, i) for i in (0, 1, 9, 70, 71, 5000)] == [True, False, True, True, False, False]
+    assert bitmaps.popcount(bits) == 3
+    assert bitmaps.members(bitmaps.set_bits(bits, [1])) == [0, 1, 9, 70]
+
+
+def test_progress_writes_bump_version(db):
+    cursor = db.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    topic_id = catalog.category_topics['DSA'][0]
+    assert progress.progress_version(cursor, 1) == (1, 0)
+
+    progress.record_completion(cursor, 1, topic_id, 1, catalog)
+    _, version = progress.progress_version(cursor, 1)
+    assert version > 0
+    # A duplicate completion writes nothing
+    progress.record_completion(cursor, 1, topic_id, 1, catalog)
+    assert progress.progress_version(cursor, 1) == (1, version)
+
+
+def test_problem_ids_count_per_topic(db):
+    cursor = db.cursor()
+    # The same page-level id in two topics is two different problems
+    assert problem_registry.mark_problem(cursor, 'Aptitude', 1, 11, '3') == (11, 3)
+    assert problem_registry.mark_problem(cursor, 'Aptitude', 1, 12, '3') == (12, 3)
+    assert problem_registry.mark_problem(cursor, 'Aptitude', 1, 12, 'q-4') == (12, 4)
+    assert problem_registry.count_completed(cursor, 'Aptitude', 1, 11) == 1
+    assert problem_registry.count_completed(cursor, 'Aptitude', 1, 12) == 2
+    assert problem_registry.completion_map(cursor, 'Aptitude', 1) == {'11': {'3': True}, '12': {'3': True, '4': True}}
+    # Ids without a number, or whose number is taken, get the topic's next ordinal
+    assert problem_registry.resolve(cursor, 12, 'two-sum') == (12, 5)
+    assert problem_registry.resolve(cursor, 12, 'arrays-3') == (12, 6)
+    assert problem_registry.resolve(cursor, 12, 'two-sum') == (12, 5)
+
+
+def test_concurrent_duplicates_count_once(tmp_path):
+    path = str(tmp_path / 'race.db')
+    migrations.migrate(path)
+    database.apply_storage_profile(path, 'wal')
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO students (id, user_id, name, email) VALUES (1, 1, 'Test Student', 'test@example.com')")
+    conn.commit()
+    catalog = topic_catalog.load_catalog(conn.cursor())
+    topic_id = catalog.category_topics['DSA'][0]
+    conn.close()
+
+    threads_per_question, questions = 16, 5
+    pool = database.ConnectionPool(path, size=threads_per_question, timeout=30,
+                                   pragmas=database.connection_pragmas('wal'))
+    barrier = threading.Barrier(threads_per_question)
+    added = {question_id: [] for question_id in range(1, questions + 1)}
+
+    def click(question_id):
+        # Every thread holds its connection before the barrier releases them together
+        handle = pool.acquire()
+        try:
+            barrier.wait()
+            was_added, _ = progress.record_completion(handle.cursor(), 1, topic_id, question_id, catalog)
+            handle.commit()
+            added[question_id].append(was_added)
+        finally:
+            handle.close()
+
+    for question_id in added:
+        threads = [threading.Thread(target=click, args=(question_id,)) for _ in range(threads_per_question)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert {q: results.count(True) for q, results in added.items()} == {q: 1 for q in added}
+    assert all(len(results) == threads_per_question for results in added.values())
+    conn = sqlite3.connect(path)
+    assert progress.find_counter_drift(conn.cursor(), catalog) == []
+    assert conn.execute("SELECT completed_questions FROM student_progress WHERE student_id = 1").fetchone()[0] == questions
+    conn.close()
+    pool.close_all()
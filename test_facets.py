@@ -0,0 +1,43 @@
+import sqlite3
+
+import facets
+import migrations
+import progress
+import topic_catalog
+
+
+def snapshot(cursor):
+    cursor.execute("SELECT * FROM cohort_facets WHERE students != 0 ORDER BY 1, 2, 3")
+    totals = cursor.fetchall()
+    cursor.execute("SELECT * FROM cohort_facet_buckets WHERE students != 0 ORDER BY 1, 2, 3, 4")
+    return totals, cursor.fetchall()
+
+
+def test_incremental_facets_match_rebuild(tmp_path):
+    path = str(tmp_path / 'facets.db')
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    dsa_topic = catalog.category_topics['DSA'][0]
+    cursor.executemany("""
+        INSERT INTO students (id, user_id, name, email, department, graduation_year) VALUES (?, ?, ?, ?, ?, ?)
+    """, [(i, i, f'Student {i}', f's{i}@example.com', 'CSE' if i % 2 else 'ECE', 2026) for i in range(1, 6)])
+    for student_id in range(1, 6):
+        for question_id in range(1, student_id + 1):
+            progress.record_completion(cursor, student_id, dsa_topic, question_id, catalog)
+    cursor.execute("UPDATE students SET department = 'ECE', graduation_year = NULL WHERE id = 3")
+    cursor.execute("DELETE FROM students WHERE id = 4")
+
+    # CSE is now students 1 and 5
+    total = catalog.total_for(dsa_topic)
+    cse = facets.summary(cursor, 'CSE')['DSA']
+    assert cse['students'] == 2
+    assert cse['mean'] == round((round(100 / total, 2) + round(500 / total, 2)) / 2, 2)
+    assert cse['median'] == int(round(100 / total, 2))
+    assert facets.departments(cursor) == [('CSE', 2), ('ECE', 2)]
+
+    incremental = snapshot(cursor)
+    facets.rebuild(cursor)
+    assert snapshot(cursor) == incremental
+    conn.close()
@@ -0,0 +1,93 @@
+import random
+import sqlite3
+
+import change_seq_cache
+import leaderboard
+import migrations
+import progress
+import topic_catalog
+
+
+def test_board_matches_a_sorted_cohort():
+    rng = random.Random(7)
+    scores = {student_id: rng.choice([0, 0, 5000, 10000, rng.randint(0, 10000)]) for student_id in range(1, 300)}
+    board = leaderboard.Board(scores.items())
+    for _ in range(500):
+        student_id = rng.randint(1, 400)
+        if student_id in scores:
+            board.remove(student_id, scores.pop(student_id))
+        if rng.random() < 0.8:
+            scores[student_id] = rng.choice([0, 10000, rng.randint(0, 10000)])
+            board.insert(student_id, scores[student_id])
+
+    ordered = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    assert board.window(0, len(ordered) + 5) == [
+        (1 + sum(other > score for other in scores.values()), student_id, score) for student_id, score in ordered
+    ]
+    for position, (student_id, score) in enumerate(ordered):
+        assert board.position(student_id, score) == position
+
+
+def test_ranks_follow_completions(tmp_path):
+    path = str(tmp_path / 'leaderboard.db')
+    migrations.migrate(path)
+    conn = sqlite3.connect(path, isolation_level=None)
+    cursor = conn.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    dsa_topic = catalog.category_topics['DSA'][0]
+    cursor.executemany("""
+        INSERT INTO students (id, user_id, name, email, department, graduation_year) VALUES (?, ?, ?, ?, ?, ?)
+    """, [(i, i, f'Student {i}', f's{i}@example.com', 'CSE' if i % 2 else 'ECE', 2026) for i in range(1, 6)])
+    for student_id in range(1, 5):
+        for question_id in range(1, student_id + 1):
+            progress.record_completion(cursor, student_id, dsa_topic, question_id, catalog)
+
+    board = leaderboard.Leaderboard()
+    board.refresh(cursor, now=1000)
+    assert [student_id for _, student_id, _ in board.top('DSA', limit=5)] == [4, 3, 2, 1, 5]
+    assert board.standing(3, 'DSA', within_department=True)['rank'] == 1
+
+    # Recorded in this process at once
+    for question_id in range(1, 6):
+        progress.record_completion(cursor, 1, dsa_topic, question_id, catalog)
+    board.record(cursor, 1)
+    assert board.standing(1, 'DSA')['rank'] == 1
+
+    # Written elsewhere: picked up by the next refresh through change_seq
+    cursor.execute("""
+        INSERT INTO students (id, user_id, name, email, department, graduation_year)
+        VALUES (6, 6, 'Student 6', 's6@example.com', 'ECE', 2027)
+    """)
+    for question_id in range(1, 7):
+        progress.record_completion(cursor, 6, dsa_topic, question_id, catalog)
+    board.refresh(cursor, now=1000 + change_seq_cache.REFRESH_INTERVAL)
+    assert board.full_loads == 1 and board.incremental_refreshes == 1
+    standing = board.standing(6, 'DSA', within_department=True, around=1)
+    assert (standing['rank'], standing['students']) == (1, 3)
+    assert [student_id for _, student_id, _ in standing['nearby']] == [6, 4]
+    conn.close()
+
+
+def test_scores_use_catalog_totals(tmp_path):
+    path = str(tmp_path / 'leaderboard.db')
+    migrations.migrate(path)
+    conn = sqlite3.connect(path, isolation_level=None)
+    cursor = conn.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    cursor.executemany("""
+        INSERT INTO students (id, user_id, name, email) VALUES (?, ?, ?, ?)
+    """, [(i, i, f'Student {i}', f's{i}@example.com') for i in (1, 2)])
+    # Student 1 finishes one topic; student 2 is halfway through every topic
+    first = catalog.category_topics['DSA'][0]
+    progress.record_completions(cursor, 1, [(first, q) for q in range(1, catalog.total_for(first) + 1)], catalog)
+    progress.record_completions(cursor, 2, [
+        (topic_id, q) for topic_id in catalog.category_topics['DSA']
+        for q in range(1, catalog.total_for(topic_id) // 2 + 1)
+    ], catalog)
+
+    board = leaderboard.Leaderboard()
+    board.refresh(cursor, now=1000)
+    assert [student_id for _, student_id, _ in board.top('DSA')] == [2, 1]
+    standing = board.standing(1, 'DSA')
+    assert standing['score'] == round(catalog.total_for(first) * leaderboard.MAX_SCORE / catalog.category_totals['DSA'])
+    conn.close()
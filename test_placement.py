@@ -0,0 +1,45 @@
+import sqlite3
+
+import migrations
+import placement
+
+
+def snapshot(cursor):
+    cursor.execute("""
+        SELECT * FROM placement_funnel
+        WHERE applied != 0 OR interviewed != 0 OR offered != 0 OR accepted != 0
+        ORDER BY 1, 2
+    """)
+    return cursor.fetchall()
+
+
+def test_incremental_funnel_matches_rebuild(tmp_path):
+    path = str(tmp_path / 'placement.db')
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO companies (company_id, name, email, phone, password) VALUES (1, 'Acme', 'a@x', '1', 'x')")
+    cursor.executemany("INSERT INTO jobs (job_id, company_id, job_title) VALUES (?, 1, ?)",
+                       [(1, 'Engineer'), (2, 'Analyst')])
+    cursor.executemany("INSERT INTO applications (job_id, usn) VALUES (?, ?)",
+                       [(1, f'USN{i}') for i in range(1, 5)] + [(2, 'USN1'), (2, 'USN9')])
+    cursor.executemany("INSERT INTO interviews (application_id, interview_status) VALUES (?, ?)",
+                       [(1, 'Completed'), (2, 'Scheduled'), (3, 'Cancelled'), (5, 'Completed')])
+    cursor.executemany("INSERT INTO job_offers (job_id, usn, offer_status) VALUES (?, ?, ?)",
+                       [(1, 'USN1', 'Pending'), (1, 'USN2', 'Accepted'), (2, 'USN9', 'Declined')])
+    cursor.execute("UPDATE job_offers SET offer_status = 'Accepted' WHERE job_id = 1 AND usn = 'USN1'")
+    cursor.execute("UPDATE interviews SET interview_status = 'Cancelled' WHERE application_id = 2")
+    cursor.execute("DELETE FROM applications WHERE application_id = 3")
+
+    assert placement.funnel(cursor) == {
+        'applied': 5, 'interviewed': 2, 'offered': 3, 'accepted': 2,
+        'rates': {'interviewed': 40.0, 'offered': 60.0, 'accepted': 40.0}
+    }
+    jobs = {group['job_title']: group for group in placement.funnel(cursor, 'job', company_id=1)}
+    assert (jobs['Engineer']['applied'], jobs['Engineer']['accepted']) == (3, 2)
+    assert (jobs['Analyst']['applied'], jobs['Analyst']['offered']) == (2, 1)
+
+    incremental = snapshot(cursor)
+    placement.rebuild(cursor)
+    assert snapshot(cursor) == incremental
+    conn.close()
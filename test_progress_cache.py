@@ -0,0 +1,25 @@
+from progress_cache import ProgressCache
+
+
+def test_lru_eviction_and_invalidation():
+    cache = ProgressCache(max_students=2, ttl=60)
+    cache.store(101, 1, 'progress', {'DSA': 10})
+    cache.store(102, 2, 'progress', {'DSA': 20})
+    assert cache.lookup(101, 'progress') == {'DSA': 10}
+
+    # Student 2 is now least recently used
+    cache.store(103, 3, 'progress', {'DSA': 30})
+    assert cache.lookup(102, 'progress') is None
+    assert cache.lookup(101, 'progress') == {'DSA': 10}
+
+    cache.invalidate(1)
+    assert cache.lookup(101, 'progress') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['invalidations']) == (2, 2, 1, 1)
+
+
+def test_expired_entries_are_misses():
+    cache = ProgressCache(max_students=10, ttl=0)
+    cache.store(101, 1, 'aptitude', {'progress': {}})
+    assert cache.lookup(101, 'aptitude') is None
+    assert cache.stats()['expirations'] == 1
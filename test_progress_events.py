@@ -0,0 +1,23 @@
+import queue
+
+import pytest
+
+from progress_events import BrokerFull, ProgressBroker
+
+
+def test_publish_reaches_only_that_students_streams():
+    broker = ProgressBroker(poll_interval=3600, max_subscribers=3)
+    first, second = broker.subscribe(1, version=5), broker.subscribe(1, version=5)
+    other = broker.subscribe(2, version=1)
+    with pytest.raises(BrokerFull):
+        broker.subscribe(3)
+
+    broker.publish(1, {'type': 'progress', 'version': 6}, 6)
+    assert first.get_nowait() == second.get_nowait() == {'type': 'progress', 'version': 6}
+    with pytest.raises(queue.Empty):
+        other.get_nowait()
+
+    broker.unsubscribe(1, first)
+    broker.unsubscribe(1, second)
+    assert broker.stats()['streams'] == 1
+    assert broker.stats()['students'] == 1
@@ -0,0 +1,83 @@
+import sqlite3
+
+import pytest
+
+import migrations
+
+# (description, query, index the plan must use)
+HOT_QUERIES = [
+    ("student lookup",
+     "SELECT id FROM students WHERE user_id = ?",
+     'idx_students_user_id'),
+    ("topic completion count",
+     """SELECT COUNT(*) FROM student_answers
+        WHERE student_id = ? AND topic_id = ? AND is_correct = 1""",
+     'idx_student_answers_progress'),
+    ("category totals",
+     "SELECT SUM(total_questions) FROM progress_topics WHERE parent_topic = ?",
+     'idx_progress_topics_parent'),
+    ("category completion count",
+     """SELECT COUNT(*) FROM student_answers sa
+        JOIN progress_topics pt ON sa.topic_id = pt.topic_id
+        WHERE sa.student_id = ? AND pt.parent_topic = ?""",
+     'idx_student_answers_progress'),
+    ("admin category sums",
+     """SELECT SUM(sp.completed_questions), SUM(pt.total_questions)
+        FROM student_progress sp
+        JOIN progress_topics pt ON sp.topic_id = pt.topic_id
+        WHERE sp.student_id = ? AND pt.parent_topic = ?""",
+     'idx_student_progress_completed'),
+    ("communication problem map",
+     "SELECT problem_id, is_completed FROM communication_progress WHERE student_id = ?",
+     'idx_communication_progress_student'),
+    ("aptitude topic count",
+     """SELECT COUNT(*) FROM aptitude_progress
+        WHERE student_id = ? AND topic_id = ? AND is_completed = 1""",
+     'idx_aptitude_progress_topic'),
+    ("progress version",
+     """SELECT s.id, COALESCE(pv.version, 0) FROM students s
+        LEFT JOIN progress_versions pv ON pv.student_id = s.id
+        WHERE s.user_id = ?""",
+     'idx_students_user_id'),
+    ("student category rollup",
+     "SELECT category, completed, total, percentage FROM student_category_progress WHERE student_id = ?",
+     'PRIMARY KEY'),
+    ("cohort page by category percentage",
+     """SELECT dsa.student_id, s.name FROM student_category_progress dsa CROSS JOIN students s
+        WHERE s.id = dsa.student_id AND dsa.category = ? AND (dsa.percentage, dsa.student_id) > (?, ?)
+        ORDER BY dsa.percentage, dsa.student_id LIMIT ?""",
+     'idx_student_category_progress_percentage'),
+    ("cohort page by name within a department",
+     """SELECT s.id FROM students s
+        WHERE s.department_key = ? AND (s.name, s.id) > (?, ?)
+        ORDER BY s.name, s.id LIMIT ?""",
+     'idx_students_department_name'),
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / 'plans.db')
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+def query_plan(conn, query):
+    params = (1,) * query.count('?')
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+@pytest.mark.parametrize('description, query, index', HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_index(db, description, query, index):
+    plan = query_plan(db, query)
+    assert any(index in step for step in plan), plan
+    # Every table the query touches must be searched, never scanned
+    assert not [step for step in plan if step.startswith('SCAN')], plan
+
+
+def test_migrations_are_recorded_once(tmp_path):
+    path = str(tmp_path / 'versions.db')
+    assert migrations.migrate(path) == [m[0] for m in sorted(migrations.MIGRATIONS)]
+    assert migrations.migrate(path) == []
@@ -0,0 +1,50 @@
+import sqlite3
+import time
+
+import database
+import migrations
+import progress
+import reports
+import topic_catalog
+
+
+def test_snapshots_are_served_stale_until_the_scheduler_rebuilds(tmp_path, monkeypatch):
+    path = str(tmp_path / 'reports.db')
+    migrations.migrate(path)
+    monkeypatch.setattr(database, 'get_connection', database.ConnectionPool(path).acquire)
+    monkeypatch.setitem(reports.report_config['reports'], 'preparation_summary',
+                        {'interval': 600, 'after_completions': 3})
+    conn = sqlite3.connect(path, isolation_level=None)
+    cursor = conn.cursor()
+    catalog = topic_catalog.load_catalog(cursor)
+    dsa_topic = catalog.category_topics['DSA'][0]
+    cursor.executemany("""
+        INSERT INTO students (id, user_id, name, email, department) VALUES (?, ?, ?, ?, 'CSE')
+    """, [(i, i, f'Student {i}', f's{i}@example.com') for i in range(1, 4)])
+    progress.record_completion(cursor, 1, dsa_topic, 1, catalog)
+
+    # Not started: the test runs the scheduler's checks itself
+    scheduler = reports.ReportScheduler()
+    monkeypatch.setattr(reports, 'get_scheduler', lambda: scheduler)
+    assert scheduler.run_due() == list(reports.REPORTS)
+    assert scheduler.run_due() == []
+    report = reports.get_report(cursor, 'preparation_summary')
+    assert not report['stale']
+    assert (report['data']['students'], report['data']['not_started']) == (3, 2)
+    assert 'Completion by category' in report['fragment']
+
+    # Past after_completions: the old snapshot is still served, marked stale
+    for question_id in range(2, 5):
+        progress.record_completion(cursor, 2, dsa_topic, question_id, catalog)
+    report = reports.get_report(cursor, 'preparation_summary')
+    assert report['stale'] and report['data']['not_started'] == 2
+    assert not reports.get_report(cursor, 'placement_summary')['stale']
+
+    assert scheduler.run_due() == ['preparation_summary']
+    report = reports.get_report(cursor, 'preparation_summary')
+    assert not report['stale'] and report['data']['not_started'] == 1
+
+    # A build leased by another worker is left to it
+    cursor.execute("UPDATE report_snapshots SET lease_until = ? WHERE name = 'placement_summary'", (time.time() + 60,))
+    assert not reports.regenerate('placement_summary')
+    conn.close()
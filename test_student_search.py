@@ -0,0 +1,35 @@
+import sqlite3
+
+import migrations
+import progress
+import student_search
+
+
+def test_index_follows_students_and_ranks_names_first(tmp_path):
+    path = str(tmp_path / 'search.db')
+    migrations.migrate(path)
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.executemany("""
+        INSERT INTO students (id, user_id, name, email, department) VALUES (?, ?, ?, ?, ?)
+    """, [
+        (1, 1, 'Asha Rao', 'asha@example.com', 'CSE'),
+        (2, 2, 'Ravi Kumar', 'rao.ravi@example.com', 'ECE'),
+        (3, 3, 'Meera Iyer', 'meera@example.com', 'CSE'),
+    ])
+
+    def ids(text, department=''):
+        return [student['id'] for student in student_search.search(cursor, text, department)]
+
+    # The last word is a prefix; a name hit outranks an email hit
+    assert ids('rao') == [1, 2]
+    assert ids('ra') == [2, 1]
+    assert ids('asha ra') == [1]
+    assert ids('ra', department='ECE') == [2]
+    assert ids('"(*') == [] and ids('rao AND') == []
+
+    cursor.execute("UPDATE students SET name = 'Meera Rao' WHERE id = 3")
+    cursor.execute("DELETE FROM students WHERE id = 1")
+    assert ids('rao') == [3, 2]
+    assert [s['id'] for s in progress.cohort_progress(cursor, 'rao', 'CSE', sort='relevance')] == [3]
+    conn.close()
@@ -0,0 +1,90 @@
+"""In-process copy of the progress_topics catalog.
+
+The catalog is small and changes rarely, so every worker loads it once and
+answers topic -> category and per-topic / per-category totals from memory.
+Triggers on progress_topics bump cache_versions.progress_topics; each worker
+compares that counter with the version it loaded at most once every
+CHECK_INTERVAL seconds and reloads when another process changed the catalog.
+"""
+import threading
+import time
+
+CATEGORIES = ('DSA', 'Communication', 'Aptitude')
+
+# Seconds a worker trusts its catalog before re-checking the version row
+CHECK_INTERVAL = 5
+
+
+class TopicCatalog:
+    def __init__(self, rows, version=0):
+        # rows: (topic_id, topic_name, parent_topic, total_questions)
+        self.version = version
+        self.topics = {}
+        self.category_totals = {category: 0 for category in CATEGORIES}
+        self.category_topics = {category: [] for category in CATEGORIES}
+        for topic_id, topic_name, parent_topic, total_questions in rows:
+            total_questions = total_questions or 0
+            self.topics[topic_id] = {
+                'topic_id': topic_id,
+                'topic_name': topic_name,
+                'parent_topic': parent_topic,
+                'total_questions': total_questions
+            }
+            if parent_topic in self.category_totals:
+                self.category_totals[parent_topic] += total_questions
+                self.category_topics[parent_topic].append(topic_id)
+
+    def get(self, topic_id):
+        # Topic ids arrive as ints from JSON and as strings from query args
+        try:
+            return self.topics.get(int(topic_id))
+        except (TypeError, ValueError):
+            return None
+
+    def __contains__(self, topic_id):
+        return self.get(topic_id) is not None
+
+    def parent_of(self, topic_id):
+        topic = self.get(topic_id)
+        return topic['parent_topic'] if topic else None
+
+    def total_for(self, topic_id):
+        topic = self.get(topic_id)
+        return topic['total_questions'] if topic else None
+
+
+def catalog_version(cursor):
+    cursor.execute("SELECT version FROM cache_versions WHERE name = 'progress_topics'")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def load_catalog(cursor):
+    version = catalog_version(cursor)
+    cursor.execute("SELECT topic_id, topic_name, parent_topic, total_questions FROM progress_topics")
+    return TopicCatalog(cursor.fetchall(), version)
+
+
+_catalog = None
+_checked_at = 0.0
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(cursor):
+    """Return the process-wide catalog, reloading it if progress_topics changed."""
+    global _catalog, _checked_at
+    now = time.monotonic()
+    if _catalog is not None and now - _checked_at < CHECK_INTERVAL:
+        return _catalog
+    with _catalog_lock:
+        if _catalog is None or catalog_version(cursor) != _catalog.version:
+            _catalog = load_catalog(cursor)
+        _checked_at = now
+    return _catalog
+
+
+def invalidate():
+    """Drop this process's catalog, e.g. right after editing progress_topics."""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None